@@ -0,0 +1,84 @@
+"""Throughput benchmark of the cross-encoder inference backends.
+
+Each backend scores the same (query, passage) pairs, several times after a warm-up,
+and reports the pairs scored per second, the mean latency of a batch, and the largest
+score difference with the PyTorch backend.
+
+Usage:
+    uv run python -m benchmarks.crossencoder_throughput
+    uv run python -m benchmarks.crossencoder_throughput --backends onnx int8 --threads 4 --batch-size 64
+"""
+import argparse
+import time
+
+import numpy as np
+
+from src.services.crossencoder import load_crossencoder
+
+
+QUERIES = [
+    "What is the capital of France?",
+    "How do vaccines train the immune system?",
+    "Who painted the ceiling of the Sistine Chapel?",
+    "Why is the sky blue?",
+]
+
+PASSAGES = [
+    "Paris is the capital and most populous city of France.",
+    "Vaccines expose the immune system to an antigen so that it can recognise the pathogen later.",
+    "Michelangelo painted the ceiling of the Sistine Chapel between 1508 and 1512.",
+    "Rayleigh scattering of sunlight by the molecules of the atmosphere makes the sky look blue.",
+    "Berlin is the capital of Germany and its largest city, with about 3.9 million inhabitants.",
+    "The French Revolution began in 1789 and ended the absolute monarchy.",
+]
+
+
+def make_pairs(num_pairs):
+    pairs = [(query, passage) for query in QUERIES for passage in PASSAGES]
+    return [pairs[i % len(pairs)] for i in range(num_pairs)]
+
+
+def run_backend(backend, pairs, batch_size, repeats, threads, onnx_file):
+    model, backend = load_crossencoder(backend, threads=threads, onnx_file=onnx_file)
+
+    # Warm up the runtime before measuring
+    scores = model.predict(pairs[:batch_size], batch_size=batch_size)
+
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        scores = model.predict(pairs, batch_size=batch_size)
+        latencies.append(time.perf_counter() - start)
+
+    return backend, np.asarray(scores), {
+        "pairs_per_s": len(pairs) / np.mean(latencies),
+        "batch_ms": np.mean(latencies) * 1000 * batch_size / len(pairs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "int8"])
+    parser.add_argument("--pairs", type=int, default=1024)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--onnx-file", default=None)
+    args = parser.parse_args()
+
+    pairs = make_pairs(args.pairs)
+    reference = None
+
+    print(f"{'backend':<8} {'pairs/s':>10} {'ms/batch':>10} {'max |diff|':>12}")
+    for backend in args.backends:
+        backend, scores, result = run_backend(
+            backend, pairs, args.batch_size, args.repeats, args.threads, args.onnx_file
+        )
+        if reference is None:
+            reference = scores
+        max_diff = np.abs(scores - reference).max()
+        print(f"{backend:<8} {result['pairs_per_s']:>10.1f} {result['batch_ms']:>10.2f} {max_diff:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
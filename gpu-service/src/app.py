@@ -5,6 +5,7 @@ from flasgger import Swagger
 from src.routes.rerank import rerank_bp
 from src.routes.summarize import summarize_bp
 from src.routes.detect_hallucination import detect_hallucination_bp
+from src.routes.metrics import metrics_bp
 
 
 app = Flask(__name__)
@@ -14,6 +15,7 @@ swagger = Swagger(app)
 app.register_blueprint(rerank_bp)
 app.register_blueprint(summarize_bp)
 app.register_blueprint(detect_hallucination_bp)
+app.register_blueprint(metrics_bp)
 
 
 if __name__ == '__main__':
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from src.services.hallucination import hdm
+from src.services.hallucination import detection_queue
 from src.utils.logger import get_logger
 
 
@@ -7,6 +7,48 @@ logger = get_logger("hallucination_detection")
 detect_hallucination_bp = Blueprint('detect_hallucination', __name__)
 
 
+def validate_item(data):
+    """
+    Validate a hallucination detection item.
+
+    Args:
+        data (dict): The item, with query, context and response fields.
+
+    Returns:
+        str: The error message, or None if the item is valid.
+
+    Raises:
+        KeyError: If a field is missing.
+    """
+    for field in ("query", "context", "response"):
+        if not isinstance(data[field], str):
+            logger.warning(f"Invalid {field} format: {field} should be a string")
+            return f'{field} should be a string'
+    return None
+
+
+def validate_timeout(data):
+    """
+    Validate the optional time limit of a request.
+
+    Args:
+        data (dict): The request body.
+
+    Returns:
+        str: The error message, or None if the time limit is valid or missing.
+    """
+    timeout = data.get("timeout")
+    if timeout is None:
+        return None
+    if isinstance(timeout, bool) or not isinstance(timeout, (int, float)):
+        logger.warning("Invalid timeout format: timeout should be a number")
+        return 'timeout should be a number'
+    if timeout <= 0:
+        logger.warning("Invalid timeout value: timeout should be greater than 0")
+        return 'timeout should be greater than 0'
+    return None
+
+
 @detect_hallucination_bp.route('/detect_hallucination', methods=['POST'])
 async def detect_hallucination():
     """
@@ -30,6 +72,9 @@ async def detect_hallucination():
             response:
               type: string
               description: The response to analyze.
+            timeout:
+              type: number
+              description: Time limit of the detection, in seconds (default HALLUCINATION_TIMEOUT).
     responses:
       200:
         description: Hallucination detection results.
@@ -63,19 +108,13 @@ async def detect_hallucination():
         logger.info("Received hallucination detection request")
         data = request.get_json()
 
-        query = data["query"]
-        context = data["context"]
-        response = data["response"]
-
-        logger.debug(f"Processing query: '{query[:50]}...' with context length: {len(context)}")
+        error = validate_item(data) or validate_timeout(data)
+        if error:
+            return jsonify({'error': error}), 400
 
-        results = hdm.apply(query, context, response)
+        logger.debug(f"Processing query: '{data['query'][:50]}...' with context length: {len(data['context'])}")
 
-        keys = ["hallucination_detected", "hallucination_severity", "ck_results"]
-        results = {
-            k: results[k]
-            for k in keys
-        }
+        results = detection_queue.detect_one(data["query"], data["context"], data["response"], timeout=data.get("timeout"))
 
         hallucination_detected = results["hallucination_detected"]
         logger.info(f"Hallucination detection completed. Result: {hallucination_detected}")
@@ -89,3 +128,92 @@ async def detect_hallucination():
         logger.exception(f"Error in hallucination detection: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+
+@detect_hallucination_bp.route('/detect_hallucination_batch', methods=['POST'])
+async def detect_hallucination_batch():
+    """
+    Detect hallucinations in several responses. The items are queued with the concurrent
+    requests and checked one after the other, in their order of arrival.
+    ---
+    tags:
+      - Hallucination Detection
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  query:
+                    type: string
+                    description: The query string.
+                  context:
+                    type: string
+                    description: The context text.
+                  response:
+                    type: string
+                    description: The response to analyze.
+            timeout:
+              type: number
+              description: Time limit of each item, in seconds (default HALLUCINATION_TIMEOUT).
+    responses:
+      200:
+        description: |
+          Hallucination detection results, in the order of the items. The result of an item
+          that failed or timed out is `{"error": "..."}`.
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+      400:
+        description: Error message.
+    """
+    try:
+        logger.info("Received hallucination detection batch request")
+        data = request.get_json()
+
+        items = data["items"]
+        if not isinstance(items, list):
+            logger.warning("Invalid items format: items should be a list")
+            return jsonify({'error': 'items should be a list'}), 400
+        if not all(isinstance(item, dict) for item in items):
+            logger.warning("Invalid item format: each item should be a dict")
+            return jsonify({'error': 'each item should be a dict'}), 400
+
+        for i, item in enumerate(items):
+            error = validate_item(item)
+            if error:
+                return jsonify({'error': f"item {i}: {error}"}), 400
+        error = validate_timeout(data)
+        if error:
+            return jsonify({'error': error}), 400
+
+        logger.debug(f"Processing {len(items)} hallucination detection items")
+        results = detection_queue.detect_many(
+            [(item["query"], item["context"], item["response"]) for item in items],
+            timeout=data.get("timeout"),
+        )
+
+        results = [
+            {'error': str(result)} if isinstance(result, Exception) else result
+            for result in results
+        ]
+        failed = sum("error" in result for result in results)
+        logger.info(f"Batch hallucination detection completed for {len(items)} items, {failed} failed")
+
+        return jsonify({'results': results})
+    except KeyError as ke:
+        error_msg = f"Missing required parameter: {str(ke)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 400
+    except Exception as e:
+        logger.exception(f"Error in batch hallucination detection: {str(e)}")
+        return jsonify({'error': str(e)}), 400
@@ -0,0 +1,47 @@
+from flask import Blueprint, jsonify
+from src.services.crossencoder import batcher, crossencoder_backend, score_cache
+from src.services.hallucination import detection_queue
+from src.services.summarizer import sentence_cache_stats
+from src.utils.logger import get_logger
+
+
+logger = get_logger("metrics")
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Report runtime counters of the service.
+    ---
+    tags:
+      - Metrics
+    responses:
+      200:
+        description: Counters grouped by service.
+        schema:
+          type: object
+          properties:
+            crossencoder:
+              type: object
+              description: Inference backend, micro-batching settings, queue depth and batch counters of the cross-encoder.
+            score_cache:
+              type: object
+              description: Pairs answered from the score cache, pairs scored by the model and hit ratio.
+            sentence_cache:
+              type: object
+              description: Hits and misses of the cache of document sentences.
+            hallucination:
+              type: object
+              description: Hallucination detection queue - default time limit (timeout), queued requests (queue_depth), requests run (requests), timed out and failed requests (timeouts, errors) and mean time spent in the queue (mean_wait_ms).
+    """
+    logger.debug("Received metrics request")
+    return jsonify({
+        "crossencoder": {
+            "backend": crossencoder_backend,
+            **batcher.stats(),
+        },
+        "score_cache": score_cache.stats(),
+        "sentence_cache": sentence_cache_stats(),
+        "hallucination": detection_queue.stats(),
+    })
@@ -1,6 +1,5 @@
 from flask import Blueprint, request, jsonify
-from sentence_transformers import CrossEncoder
-from src.services.crossencoder import crossencoder
+from src.services.crossencoder import score_pairs
 from src.utils.logger import get_logger
 
 
@@ -80,7 +79,7 @@ async def rerank():
             doc["text"] for doc in documents
         ]
 
-        scores = crossencoder.predict([
+        scores = score_pairs([
             (query, text)
             for text in texts
         ])
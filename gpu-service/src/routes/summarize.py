@@ -1,7 +1,5 @@
 from flask import Blueprint, request, jsonify
-import numpy as np
-from sentence_splitter import split_text_into_sentences
-from src.services.crossencoder import crossencoder
+from src.services.summarizer import summarize_documents
 from src.utils.logger import get_logger
 
 
@@ -9,6 +7,64 @@ logger = get_logger("summarize_service")
 summarize_bp = Blueprint('summarize', __name__)
 
 
+def validate_item(data):
+    """
+    Validate a summarization item.
+
+    Args:
+        data (dict): The item, with query, document and length fields. The document can
+            be replaced by its sentences, when already split.
+
+    Returns:
+        str: The error message, or None if the item is valid.
+
+    Raises:
+        KeyError: If a field is missing.
+    """
+    query = data["query"]
+    if not isinstance(query, str):
+        logger.warning("Invalid query format: query should be a string")
+        return 'query should be a string'
+    if len(query) == 0:
+        logger.warning("Empty query received")
+        return 'query should not be empty'
+
+    if "sentences" in data:
+        sentences = data["sentences"]
+        if not isinstance(sentences, list) or not all(isinstance(s, str) for s in sentences):
+            logger.warning("Invalid sentences format: sentences should be a list of strings")
+            return 'sentences should be a list of strings'
+        if not any(sentences):
+            logger.warning("Empty sentences received")
+            return 'sentences should not be empty'
+    else:
+        document = data["document"]
+        if not isinstance(document, str):
+            logger.warning("Invalid document format: document should be a string")
+            return 'document should be a string'
+        if len(document) == 0:
+            logger.warning("Empty document received")
+            return 'document should not be empty'
+
+    doc_length = data["length"]
+    if not isinstance(doc_length, int):
+        logger.warning("Invalid length format: length should be an integer")
+        return 'length should be an integer'
+    if doc_length <= 0:
+        logger.warning("Invalid length value: length should be greater than 0")
+        return 'length should be greater than 0'
+
+    return None
+
+
+def to_item(data):
+    """Convert a validated request item to a `summarize_documents` item."""
+    sentences = data.get("sentences")
+    if sentences is not None:
+        sentences = [s for s in sentences if len(s) > 0]
+    return (data["query"], data.get("document"), data["length"], sentences)
+
+
 @summarize_bp.route('/summarize', methods=['POST'])
 async def summarize():
     """
@@ -29,6 +85,11 @@ async def summarize():
             document:
               type: string
               description: The document to summarize.
+            sentences:
+              type: array
+              items:
+                type: string
+              description: The sentences of the document, sent instead of the document to skip segmentation.
             length:
               type: integer
               description: The desired summary length.
@@ -47,66 +108,97 @@ async def summarize():
         logger.info("Received summarize request")
         data = request.get_json()
 
-        query = data["query"]
-        if not isinstance(query, str):
-            logger.warning("Invalid query format: query should be a string")
-            return jsonify({'error': 'query should be a string'}), 400
-        if len(query) == 0:
-            logger.warning("Empty query received")
-            return jsonify({'error': 'query should not be empty'}), 400
-
-        document = data["document"]
-        if not isinstance(document, str):
-            logger.warning("Invalid document format: document should be a string")
-            return jsonify({'error': 'document should be a string'}), 400
-        if len(document) == 0:
-            logger.warning("Empty document received")
-            return jsonify({'error': 'document should not be empty'}), 400
+        error = validate_item(data)
+        if error:
+            return jsonify({'error': error}), 400
 
-        doc_length = data["length"]
-        if not isinstance(doc_length, int):
-            logger.warning("Invalid length format: length should be an integer")
-            return jsonify({'error': 'length should be an integer'}), 400
-        if doc_length <= 0:
-            logger.warning("Invalid length value: length should be greater than 0")
-            return jsonify({'error': 'length should be greater than 0'}), 400
+        logger.debug(f"Summarizing document with target length {data['length']}")
+        summary = summarize_documents([to_item(data)])[0]
 
-        logger.debug(f"Summarizing document of length {len(document)} with target length {doc_length}")
-
-        sentences = split_text_into_sentences(
-            text=document,
-            language='en',
-        )
-
-        sentences = [s for s in sentences if len(s) > 0]
-        logger.debug(f"Split document into {len(sentences)} sentences")
-
-        sentences_length = [len(s) for s in sentences]
-        sentences = np.array(sentences)
+        logger.info(f"Summarization completed successfully. Summary length: {len(summary)}")
+        return jsonify({'summary': summary})
+    except KeyError as ke:
+        error_msg = f"Missing required parameter: {str(ke)}"
+        logger.error(error_msg)
+        return jsonify({'error': error_msg}), 400
+    except Exception as e:
+        logger.exception(f"Error in summarize service: {str(e)}")
+        return jsonify({'error': str(e)}), 400
 
-        logger.debug(f"Calculating relevance scores for sentences based on query: '{query[:50]}...'")
-        scores = crossencoder.predict([(query, s) for s in sentences])
 
-        index = np.argsort(scores).tolist()[::-1]
+@summarize_bp.route('/summarize_batch', methods=['POST'])
+async def summarize_batch():
+    """
+    Summarize several documents, each based on its query. The sentences of all the
+    documents are scored together, in as few cross-encoder batches as possible.
+    ---
+    tags:
+      - Summarize
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            items:
+              type: array
+              items:
+                type: object
+                properties:
+                  query:
+                    type: string
+                    description: The query string.
+                  document:
+                    type: string
+                    description: The document to summarize.
+                  sentences:
+                    type: array
+                    items:
+                      type: string
+                    description: The sentences of the document, sent instead of the document to skip segmentation.
+                  length:
+                    type: integer
+                    description: The desired summary length.
+    responses:
+      200:
+        description: Generated summaries, in the order of the items.
+        schema:
+          type: object
+          properties:
+            summaries:
+              type: array
+              items:
+                type: string
+      400:
+        description: Error message.
+    """
+    try:
+        logger.info("Received summarize batch request")
+        data = request.get_json()
 
-        total_length = 0
-        for i in range(len(index)):
-            total_length += sentences_length[index[i]]
-            if total_length > doc_length:
-                break
+        items = data["items"]
+        if not isinstance(items, list):
+            logger.warning("Invalid items format: items should be a list")
+            return jsonify({'error': 'items should be a list'}), 400
+        if not all(isinstance(item, dict) for item in items):
+            logger.warning("Invalid item format: each item should be a dict")
+            return jsonify({'error': 'each item should be a dict'}), 400
 
-        index = index[:i+1]
-        index = np.sort(index)
+        for i, item in enumerate(items):
+            error = validate_item(item)
+            if error:
+                return jsonify({'error': f"item {i}: {error}"}), 400
 
-        sentences = sentences[index]
-        summary = "\n".join(sentences)
+        logger.debug(f"Summarizing {len(items)} documents")
+        summaries = summarize_documents([to_item(item) for item in items])
 
-        logger.info(f"Summarization completed successfully. Summary length: {len(summary)}")
-        return jsonify({'summary': summary})
+        logger.info(f"Batch summarization completed successfully for {len(items)} documents")
+        return jsonify({'summaries': summaries})
     except KeyError as ke:
         error_msg = f"Missing required parameter: {str(ke)}"
         logger.error(error_msg)
         return jsonify({'error': error_msg}), 400
     except Exception as e:
-        logger.exception(f"Error in summarize service: {str(e)}")
+        logger.exception(f"Error in summarize batch service: {str(e)}")
         return jsonify({'error': str(e)}), 400
@@ -0,0 +1,163 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from src.utils.logger import get_logger
+
+
+logger = get_logger("batching")
+
+# Queued to stop the scheduling thread
+_STOP = object()
+
+
+class MicroBatcher:
+    """Scheduler grouping the scoring requests of concurrent callers into shared batches.
+
+    Callers block in `submit` while a background thread collects the pending requests,
+    for up to `max_wait_ms` after the first one or until `max_batch` pairs are pending,
+    scores them with a single `predict` call, and hands each caller its own scores.
+    Pairs are sorted by length before scoring, so that the model batches pad little.
+
+    A request is never split: a request larger than `max_batch` is scored alone.
+    """
+
+    def __init__(self, predict, max_batch=256, max_wait_ms=5.0):
+        """
+        Initialize the MicroBatcher.
+
+        Args:
+            predict (callable): Function scoring a list of (query, text) pairs.
+            max_batch (int): Number of pending pairs triggering a batch without waiting.
+            max_wait_ms (float): Maximum time a request waits for other requests, in milliseconds.
+        """
+        self.predict = predict
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queue = queue.Queue()
+        self._carry = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "pairs": 0, "batches": 0, "wait_ms": 0.0, "errors": 0}
+
+    def submit(self, pairs):
+        """
+        Score pairs, batched with the pairs submitted concurrently.
+
+        Args:
+            pairs (list): The (query, text) pairs to score.
+
+        Returns:
+            np.ndarray: The score of each pair, in order.
+
+        Raises:
+            Exception: The error raised by `predict` for the batch holding the pairs.
+        """
+        if not pairs:
+            return np.array([], dtype=np.float32)
+
+        self._start()
+        future = Future()
+        self._queue.put((list(pairs), future, time.perf_counter()))
+        return future.result()
+
+    def stop(self):
+        """Stop the scheduling thread once the pending requests are scored."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        """
+        Report the scheduler settings and counters.
+
+        Returns:
+            dict: Settings, queue depth, and request, pair and batch counters.
+        """
+        counters = dict(self._counters)
+        batches = counters["batches"]
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize() + (self._carry is not None),
+            "requests": counters["requests"],
+            "pairs": counters["pairs"],
+            "batches": batches,
+            "errors": counters["errors"],
+            "mean_batch_requests": counters["requests"] / batches if batches else 0.0,
+            "mean_batch_pairs": counters["pairs"] / batches if batches else 0.0,
+            "mean_wait_ms": counters["wait_ms"] / counters["requests"] if counters["requests"] else 0.0,
+        }
+
+    def _start(self):
+        """Start the scheduling thread on first use, after the worker process is forked."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Collect and score batches until stopped."""
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._score(batch)
+
+    def _collect(self):
+        """Wait for a request, then gather the requests arriving until the batch is full or the wait is over."""
+        first = self._carry if self._carry is not None else self._queue.get()
+        self._carry = None
+        if first is _STOP:
+            return None
+
+        batch = [first]
+        size = len(first[0])
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while size < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP or size + len(item[0]) > self.max_batch:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[0])
+
+        return batch
+
+    def _score(self, batch):
+        """Score the pairs of a batch with one predict call and resolve each request."""
+        pairs = [pair for item in batch for pair in item[0]]
+        order = np.argsort([len(query) + len(text) for query, text in pairs], kind="stable")
+
+        start = time.perf_counter()
+        try:
+            sorted_scores = self.predict([pairs[i] for i in order])
+        except Exception as e:
+            logger.exception(f"Scoring a batch of {len(pairs)} pairs failed: {str(e)}")
+            self._counters["errors"] += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        scores = np.empty(len(pairs), dtype=np.float32)
+        scores[order] = sorted_scores
+
+        self._counters["requests"] += len(batch)
+        self._counters["pairs"] += len(pairs)
+        self._counters["batches"] += 1
+        self._counters["wait_ms"] += sum((start - submitted_at) * 1000 for _, _, submitted_at in batch)
+        logger.debug(f"Scored {len(pairs)} pairs of {len(batch)} requests in one batch")
+
+        offset = 0
+        for item_pairs, future, _ in batch:
+            future.set_result(scores[offset:offset + len(item_pairs)])
+            offset += len(item_pairs)
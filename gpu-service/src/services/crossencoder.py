@@ -1,4 +1,128 @@
+import importlib.util
+import os
+import torch
 from sentence_transformers import CrossEncoder
+from src.services.batching import MicroBatcher
+from src.services.score_cache import ScoreCache
+from src.utils.logger import get_logger
 
 
-crossencoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L6-v2", device='cuda')
\ No newline at end of file
+logger = get_logger("crossencoder")
+
+MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L6-v2"
+
+BACKENDS = ("auto", "torch", "onnx", "int8")
+
+# Number of pairs per cross-encoder forward pass
+CROSSENCODER_BATCH_SIZE = int(os.environ.get("CROSSENCODER_BATCH_SIZE", 128))
+
+
+def resolve_backend(backend):
+    """
+    Resolve the `auto` backend for the current machine.
+
+    Args:
+        backend (str): One of `BACKENDS`.
+
+    Returns:
+        str: `torch` when a GPU is available, else `onnx` when ONNX Runtime is installed,
+            else `int8`. Other backends are returned unchanged.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown cross-encoder backend '{backend}', expected one of {', '.join(BACKENDS)}")
+    if backend != "auto":
+        return backend
+    if torch.cuda.is_available():
+        return "torch"
+    if importlib.util.find_spec("onnxruntime") is not None:
+        return "onnx"
+    return "int8"
+
+
+def load_crossencoder(backend=None, device=None, threads=None, onnx_file=None):
+    """
+    Load the cross-encoder with an inference backend.
+
+    - `torch`: the PyTorch model, on the GPU if available.
+    - `onnx`: the ONNX export of the model, run by ONNX Runtime on CPU. Needs the `onnx`
+      extra (`uv sync --extra onnx`).
+    - `int8`: the PyTorch model on CPU, with its linear layers dynamically quantized to int8.
+
+    Args:
+        backend (str): One of `BACKENDS`. Defaults to CROSSENCODER_BACKEND, or `auto`.
+        device (str): Device of the `torch` backend. Defaults to CROSSENCODER_DEVICE, or
+            `cuda` when available.
+        threads (int): Intra-op threads of the CPU backends. Defaults to CROSSENCODER_THREADS,
+            or the runtime default.
+        onnx_file (str): ONNX file of the model repository, e.g. `onnx/model_qint8_avx512.onnx`
+            for a quantized export. Defaults to CROSSENCODER_ONNX_FILE, or `onnx/model.onnx`.
+
+    Returns:
+        tuple: The CrossEncoder and the name of the backend used.
+    """
+    backend = resolve_backend(backend or os.environ.get("CROSSENCODER_BACKEND", "auto"))
+    threads = threads or int(os.environ.get("CROSSENCODER_THREADS", 0)) or None
+
+    if backend == "onnx":
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        if threads:
+            session_options.intra_op_num_threads = threads
+
+        model = CrossEncoder(
+            MODEL_NAME,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={
+                "file_name": onnx_file or os.environ.get("CROSSENCODER_ONNX_FILE", "onnx/model.onnx"),
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options,
+            },
+        )
+    else:
+        if backend == "int8":
+            device = "cpu"
+        device = device or os.environ.get("CROSSENCODER_DEVICE") or ("cuda" if torch.cuda.is_available() else "cpu")
+        if threads and device == "cpu":
+            torch.set_num_threads(threads)
+
+        model = CrossEncoder(MODEL_NAME, device=device)
+        if backend == "int8":
+            torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+    logger.info(f"Loaded cross-encoder {MODEL_NAME} with the {backend} backend on {model.device}")
+    return model, backend
+
+
+crossencoder, crossencoder_backend = load_crossencoder()
+
+batcher = MicroBatcher(
+    lambda pairs: crossencoder.predict(pairs, batch_size=CROSSENCODER_BATCH_SIZE),
+    max_batch=int(os.environ.get("CROSSENCODER_MAX_BATCH", 256)),
+    max_wait_ms=float(os.environ.get("CROSSENCODER_MAX_WAIT_MS", 5)),
+)
+
+score_cache = ScoreCache(
+    model_id=f"{MODEL_NAME}:{crossencoder_backend}",
+    max_entries=int(os.environ.get("SCORE_CACHE_SIZE", 100000)),
+)
+
+
+def score_pairs(pairs):
+    """
+    Score (query, text) pairs with the cross-encoder.
+
+    Cached scores are reused (see `ScoreCache`), and the other pairs are batched with
+    the pairs of concurrent requests (see `MicroBatcher`).
+
+    Args:
+        pairs (list): The (query, text) pairs to score.
+
+    Returns:
+        np.ndarray: The relevance score of each pair, in order.
+    """
+    return score_cache.get_or_score(pairs, batcher.submit)
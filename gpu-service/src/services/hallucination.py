@@ -1,9 +1,34 @@
 import os
 from hdm2 import HallucinationDetectionModel
+from src.services.hallucination_queue import HallucinationQueue
 
 
 os.environ['TRANSFORMERS_CACHE'] = '/root/.cache/huggingface'
 os.environ['HF_HOME'] = '/root/.cache/huggingface'
 
+RESULT_KEYS = ["hallucination_detected", "hallucination_severity", "ck_results"]
+
 
 hdm = HallucinationDetectionModel()
+
+
+def detect(query, context, response):
+    """
+    Detect hallucinations in a response.
+
+    Args:
+        query (str): The query.
+        context (str): The context supporting the response.
+        response (str): The response to check.
+
+    Returns:
+        dict: The detection result.
+    """
+    result = hdm.apply(query, context, response)
+    return {k: result[k] for k in RESULT_KEYS}
+
+
+detection_queue = HallucinationQueue(
+    detect,
+    timeout=float(os.environ.get("HALLUCINATION_TIMEOUT", 120)),
+)
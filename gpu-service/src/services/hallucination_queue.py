@@ -0,0 +1,176 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from src.utils.logger import get_logger
+
+
+logger = get_logger("hallucination_queue")
+
+# Queued to stop the detection thread
+_STOP = object()
+
+
+class HallucinationQueue:
+    """FIFO queue running the hallucination detections one at a time.
+
+    `hdm.apply` checks a single response, so the detections are not batched: a background
+    thread runs the queued requests one after the other, in their order of arrival, which
+    keeps concurrent requests from competing for the GPU.
+
+    Every request has a deadline. The thread skips a request whose deadline is over, or
+    whose caller stopped waiting, right before running it, and the caller stops waiting
+    for it at the deadline.
+    """
+
+    def __init__(self, detect, timeout=120.0):
+        """
+        Initialize the HallucinationQueue.
+
+        Args:
+            detect (callable): Function taking a query, a context and a response and
+                returning the detection result.
+            timeout (float): Default time limit of a request, in seconds.
+        """
+        self.detect = detect
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "timeouts": 0, "errors": 0, "wait_ms": 0.0}
+
+    def submit(self, query, context, response, timeout=None):
+        """
+        Queue a hallucination detection.
+
+        Args:
+            query (str): The query.
+            context (str): The context supporting the response.
+            response (str): The response to check.
+            timeout (float): Time limit of the request, in seconds. Defaults to `timeout`.
+
+        Returns:
+            tuple: The Future of the detection result and the deadline of the request
+                (`time.monotonic()` clock).
+        """
+        self._start()
+        now = time.monotonic()
+        deadline = now + (timeout if timeout is not None else self.timeout)
+        future = Future()
+        self._queue.put(((query, context, response), future, deadline, now))
+        return future, deadline
+
+    def detect_many(self, items, timeout=None):
+        """
+        Detect hallucinations in several responses, waiting for all of them.
+
+        Args:
+            items (list): The (query, context, response) tuples.
+            timeout (float): Time limit of each request, in seconds. Defaults to `timeout`.
+
+        Returns:
+            list: The detection result of each item, or the exception raised for it
+                (TimeoutError if its time limit was reached).
+        """
+        submitted = [self.submit(*item, timeout=timeout) for item in items]
+
+        results = []
+        for future, deadline in submitted:
+            try:
+                results.append(future.result(timeout=max(deadline - time.monotonic(), 0)))
+            except TimeoutError:
+                # Not run if still queued; a running detection completes unused
+                future.cancel()
+                self._count("timeouts")
+                results.append(TimeoutError("Hallucination detection timed out"))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def detect_one(self, query, context, response, timeout=None):
+        """
+        Detect hallucinations in a response.
+
+        Args:
+            query (str): The query.
+            context (str): The context supporting the response.
+            response (str): The response to check.
+            timeout (float): Time limit of the request, in seconds. Defaults to `timeout`.
+
+        Returns:
+            dict: The detection result.
+
+        Raises:
+            TimeoutError: If the time limit was reached.
+            Exception: The error raised by the detection.
+        """
+        result = self.detect_many([(query, context, response)], timeout=timeout)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def stop(self):
+        """Stop the detection thread once the queued requests are processed."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def stats(self):
+        """
+        Report the queue settings and counters.
+
+        Returns:
+            dict: Settings, queue depth, and request, timeout and error counters.
+        """
+        counters = dict(self._counters)
+        return {
+            "timeout": self.timeout,
+            "queue_depth": self._queue.qsize(),
+            "requests": counters["requests"],
+            "timeouts": counters["timeouts"],
+            "errors": counters["errors"],
+            "mean_wait_ms": counters["wait_ms"] / counters["requests"] if counters["requests"] else 0.0,
+        }
+
+    def _count(self, counter, value=1):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[counter] += value
+
+    def _start(self):
+        """Start the detection thread on first use, after the worker process is forked."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="hallucination-queue", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Run the queued detections until stopped."""
+        while True:
+            request = self._queue.get()
+            if request is _STOP:
+                return
+            self._detect(*request)
+
+    def _detect(self, item, future, deadline, submitted_at):
+        """Run the detection of a request, unless it expired or its caller stopped waiting."""
+        if not future.set_running_or_notify_cancel():
+            return
+        now = time.monotonic()
+        if deadline <= now:
+            self._count("timeouts")
+            future.set_exception(TimeoutError("Hallucination detection timed out in the queue"))
+            return
+
+        self._count("requests")
+        self._count("wait_ms", (now - submitted_at) * 1000)
+        try:
+            result = self.detect(*item)
+        except Exception as e:
+            logger.exception(f"Error in hallucination detection: {str(e)}")
+            self._count("errors")
+            future.set_exception(e)
+            return
+        future.set_result(result)
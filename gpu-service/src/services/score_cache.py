@@ -0,0 +1,116 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from src.utils.logger import get_logger
+
+
+logger = get_logger("score_cache")
+
+
+class ScoreCache:
+    """LRU cache of cross-encoder scores keyed by (model id, query, text).
+
+    Popular queries rerank the same passages, and the summarization of a question
+    scores the same sentences again, so only the pairs never seen are sent to the model.
+    """
+
+    def __init__(self, model_id, max_entries=100000):
+        """
+        Initialize the ScoreCache.
+
+        Args:
+            model_id (str): Identifier of the model and backend producing the scores, part
+                of every key so that scores of different models are never mixed.
+            max_entries (int): Maximum number of scores kept (0 disables the cache).
+        """
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"pairs_saved": 0, "pairs_scored": 0}
+
+    def make_key(self, query, text):
+        """
+        Build the cache key of a pair.
+
+        Args:
+            query (str): The query.
+            text (str): The passage or sentence.
+
+        Returns:
+            bytes: The SHA-256 digest of the model id, query and text.
+        """
+        digest = hashlib.sha256()
+        for part in (self.model_id, query, text):
+            data = part.encode("utf-8")
+            digest.update(len(data).to_bytes(8, "little"))
+            digest.update(data)
+        return digest.digest()
+
+    def get_or_score(self, pairs, score):
+        """
+        Return the scores of pairs, scoring only the pairs missing from the cache.
+
+        Args:
+            pairs (list): The (query, text) pairs.
+            score (callable): Function scoring a list of pairs, called at most once with
+                the distinct missing pairs.
+
+        Returns:
+            np.ndarray: The score of each pair, in order.
+        """
+        if self.max_entries <= 0:
+            return score(pairs)
+
+        keys = [self.make_key(query, text) for query, text in pairs]
+        scores = np.empty(len(pairs), dtype=np.float32)
+
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._scores.get(key)
+                if cached is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._scores.move_to_end(key)
+                    scores[i] = cached
+            # Pairs repeated within the request are scored once
+            self._counters["pairs_saved"] += len(pairs) - len(missing)
+            self._counters["pairs_scored"] += len(missing)
+
+        if missing:
+            missing_scores = score([pairs[indexes[0]] for indexes in missing.values()])
+            with self._lock:
+                for (key, indexes), value in zip(missing.items(), missing_scores):
+                    scores[indexes] = value
+                    self._scores[key] = float(value)
+                    self._scores.move_to_end(key)
+                while len(self._scores) > self.max_entries:
+                    self._scores.popitem(last=False)
+
+        logger.debug(f"Scored {len(missing)} of {len(pairs)} pairs, the others were cached")
+        return scores
+
+    def clear(self):
+        """Empty the cache and reset the counters."""
+        with self._lock:
+            self._scores.clear()
+            self._counters = {"pairs_saved": 0, "pairs_scored": 0}
+
+    def stats(self):
+        """
+        Report the cache counters.
+
+        Returns:
+            dict: Pairs answered without the model, pairs scored, hit ratio and size.
+        """
+        saved, scored = self._counters["pairs_saved"], self._counters["pairs_scored"]
+        return {
+            "model_id": self.model_id,
+            "pairs_saved": saved,
+            "pairs_scored": scored,
+            "hit_ratio": saved / (saved + scored) if saved + scored else 0.0,
+            "entries": len(self._scores),
+            "max_entries": self.max_entries,
+        }
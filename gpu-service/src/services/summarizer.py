@@ -0,0 +1,121 @@
+import functools
+import os
+import numpy as np
+from sentence_splitter import split_text_into_sentences
+from src.services.crossencoder import score_pairs
+from src.utils.logger import get_logger
+
+
+logger = get_logger("summarizer")
+
+# Number of documents whose sentences are kept, for the documents sent without them
+SENTENCE_CACHE_SIZE = int(os.environ.get("SENTENCE_CACHE_SIZE", 4096))
+
+
+@functools.lru_cache(maxsize=SENTENCE_CACHE_SIZE)
+def _split_sentences(document):
+    """Split a document, caching the sentences of the most recent documents."""
+    sentences = split_text_into_sentences(
+        text=document,
+        language='en',
+    )
+    return tuple(s for s in sentences if len(s) > 0)
+
+
+def split_sentences(document):
+    """
+    Split a document into its non-empty sentences.
+
+    Article texts never change, so the sentences of recently summarized documents are
+    cached.
+
+    Args:
+        document (str): The document to split.
+
+    Returns:
+        list: The sentences of the document.
+    """
+    return list(_split_sentences(document))
+
+
+def sentence_cache_stats():
+    """
+    Report the sentence cache counters.
+
+    Returns:
+        dict: Hits, misses, size and maximum size of the cache.
+    """
+    info = _split_sentences.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+    }
+
+
+def select_sentences(sentences, scores, length):
+    """
+    Build an extractive summary from the best scoring sentences.
+
+    Sentences are taken by decreasing score, stopping before the first one that would
+    make the summary longer than the target length, then put back in document order.
+    The best sentence is always kept, even if it is longer than the target length.
+
+    Args:
+        sentences (list): The sentences of the document.
+        scores (np.ndarray): The relevance score of each sentence.
+        length (int): The maximum length of the summary, in characters.
+
+    Returns:
+        str: The sentences kept, one per line.
+    """
+    if not sentences:
+        return ""
+
+    index = np.argsort(scores).tolist()[::-1]
+
+    # The first sentence has no line break before it
+    total_length = len(sentences[index[0]])
+    kept = 1
+    while kept < len(index):
+        total_length += len(sentences[index[kept]]) + 1
+        if total_length > length:
+            break
+        kept += 1
+
+    index = np.sort(index[:kept])
+    return "\n".join(sentences[j] for j in index)
+
+
+def summarize_documents(items):
+    """
+    Summarize several documents, scoring all their sentences together.
+
+    Args:
+        items (list): (query, document, length, sentences) tuples. Documents whose
+            sentences are None are split.
+
+    Returns:
+        list: The summary of each document, in the order of the items.
+    """
+    documents_sentences = [
+        sentences if sentences is not None else split_sentences(document)
+        for _, document, _, sentences in items
+    ]
+
+    pairs = [
+        (query, sentence)
+        for (query, _, _, _), sentences in zip(items, documents_sentences)
+        for sentence in sentences
+    ]
+    logger.debug(f"Scoring {len(pairs)} sentences of {len(items)} documents")
+    scores = score_pairs(pairs)
+
+    summaries = []
+    offset = 0
+    for (_, _, length, _), sentences in zip(items, documents_sentences):
+        summaries.append(select_sentences(sentences, scores[offset:offset + len(sentences)], length))
+        offset += len(sentences)
+
+    return summaries
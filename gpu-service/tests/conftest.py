@@ -1,9 +1,11 @@
 import pytest
-from src.app import app
 
 
 @pytest.fixture
 def client():
+    # Imported here so that the tests not needing the models run without a GPU
+    from src.app import app
+
     app.config['TESTING'] = True
 
     client = app.test_client()
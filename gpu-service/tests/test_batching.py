@@ -0,0 +1,136 @@
+import threading
+import time
+import numpy as np
+import pytest
+from src.services.batching import MicroBatcher
+
+
+class RecordingPredict:
+    """Fake cross-encoder scoring a pair by the length of its text, recording each call."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, pairs):
+        self.calls.append(list(pairs))
+        time.sleep(self.delay)
+        return np.array([len(text) for _, text in pairs], dtype=np.float32)
+
+
+@pytest.fixture
+def predict():
+    return RecordingPredict()
+
+
+def submit_concurrently(batcher, requests):
+    """Submit each request from its own thread and return the scores by request."""
+    results = [None] * len(requests)
+    barrier = threading.Barrier(len(requests))
+
+    def run(i):
+        barrier.wait()
+        results[i] = batcher.submit(requests[i])
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(requests))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_request(predict):
+    """
+    Test that the scores of a request are returned in the order of its pairs.
+    """
+    batcher = MicroBatcher(predict, max_batch=16, max_wait_ms=1)
+
+    scores = batcher.submit([("q", "ccc"), ("q", "a"), ("q", "bb")])
+
+    assert scores.tolist() == [3, 1, 2]
+    assert predict.calls == [[("q", "a"), ("q", "bb"), ("q", "ccc")]]
+    batcher.stop()
+
+
+def test_concurrent_requests_share_a_batch(predict):
+    """
+    Test that requests submitted within the wait window are scored in one call,
+    each caller getting back its own scores.
+    """
+    batcher = MicroBatcher(predict, max_batch=100, max_wait_ms=200)
+    requests = [[("q", "x" * (i + j)) for j in range(3)] for i in range(4)]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert len(predict.calls) == 1
+    for request, scores in zip(requests, results):
+        assert scores.tolist() == [len(text) for _, text in request]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["requests"] == 4
+    assert stats["pairs"] == 12
+    assert stats["queue_depth"] == 0
+    batcher.stop()
+
+
+def test_max_batch_bounds_batches(predict):
+    """
+    Test that a batch does not grow beyond max_batch pairs, except for a request
+    larger than max_batch, which is scored alone.
+    """
+    batcher = MicroBatcher(predict, max_batch=4, max_wait_ms=100)
+    requests = [[("q", "a")] * 3 for _ in range(3)] + [[("q", "b")] * 6]
+
+    results = submit_concurrently(batcher, requests)
+
+    assert [len(call) for call in sorted(predict.calls, key=len)] == [3, 3, 3, 6]
+    assert [len(scores) for scores in results] == [3, 3, 3, 6]
+    batcher.stop()
+
+
+def test_predict_error_is_raised_to_callers():
+    """
+    Test that an error of the model is raised to every request of the batch, and that
+    the scheduler keeps serving requests afterwards.
+    """
+    calls = []
+
+    def predict(pairs):
+        calls.append(pairs)
+        if len(calls) == 1:
+            raise RuntimeError("CUDA out of memory")
+        return np.zeros(len(pairs))
+
+    batcher = MicroBatcher(predict, max_batch=16, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="CUDA out of memory"):
+        batcher.submit([("q", "a")])
+    assert batcher.submit([("q", "a")]).tolist() == [0]
+    assert batcher.stats()["errors"] == 1
+    batcher.stop()
+
+
+def test_empty_request(predict):
+    """
+    Test that an empty request is answered without calling the model.
+    """
+    batcher = MicroBatcher(predict)
+
+    assert batcher.submit([]).tolist() == []
+    assert predict.calls == []
+
+
+def test_stats_settings(predict):
+    """
+    Test that the settings are reported with the counters.
+    """
+    batcher = MicroBatcher(predict, max_batch=32, max_wait_ms=2.5)
+
+    stats = batcher.stats()
+
+    assert stats["max_batch"] == 32
+    assert stats["max_wait_ms"] == 2.5
+    assert stats["batches"] == 0
+    assert stats["mean_batch_pairs"] == 0.0
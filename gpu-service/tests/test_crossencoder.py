@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from src.services.crossencoder import load_crossencoder, resolve_backend
+
+
+PAIRS = [
+    ("What is the capital of France?", "Paris is the capital of France."),
+    ("What is the capital of France?", "Berlin is the capital of Germany."),
+    ("What is the capital of France?", "Madrid is the capital of Spain."),
+    ("Who painted the Sistine Chapel ceiling?", "Michelangelo painted the ceiling of the Sistine Chapel."),
+    ("Who painted the Sistine Chapel ceiling?", "The Sistine Chapel is in Vatican City."),
+    ("Who painted the Sistine Chapel ceiling?", "Flask is a lightweight WSGI web application framework."),
+]
+
+
+@pytest.fixture(scope="module")
+def reference_scores():
+    model, _ = load_crossencoder("torch", device="cpu")
+    return model.predict(PAIRS)
+
+
+def test_resolve_backend():
+    """
+    Test that explicit backends are kept and unknown ones rejected.
+    """
+    assert resolve_backend("int8") == "int8"
+    assert resolve_backend("auto") in ("torch", "onnx", "int8")
+    with pytest.raises(ValueError):
+        resolve_backend("tensorrt")
+
+
+def test_onnx_parity(reference_scores):
+    """
+    Test that the ONNX Runtime backend returns the PyTorch scores.
+    """
+    pytest.importorskip("onnxruntime")
+    model, backend = load_crossencoder("onnx", threads=2)
+
+    assert backend == "onnx"
+    np.testing.assert_allclose(model.predict(PAIRS), reference_scores, atol=1e-3)
+
+
+def test_int8_parity(reference_scores):
+    """
+    Test that the int8 backend stays close to the PyTorch scores and ranks the
+    passages of each query the same way.
+    """
+    model, backend = load_crossencoder("int8", threads=2)
+    scores = model.predict(PAIRS)
+
+    assert backend == "int8"
+    assert np.abs(scores - reference_scores).max() < 0.5
+    for start in range(0, len(PAIRS), 3):
+        assert np.argsort(scores[start:start + 3]).tolist() == np.argsort(reference_scores[start:start + 3]).tolist()
@@ -31,3 +31,42 @@ def test_detect_hallucination_false(client):
     response = client.post('/detect_hallucination', json=params)
     assert response.status_code == 200
     assert response.json['hallucination_detected'] is False
+
+
+def test_detect_hallucination_batch(client):
+    """
+    Test the '/detect_hallucination_batch' endpoint.
+
+    Checks that each item gets its own result, in the order of the items.
+    """
+    context = "Paris is the capital of France. It is known for its art, culture, and history."
+    params = {
+        "items": [
+            {
+                "query": "What is the capital of France?",
+                "context": context,
+                "response": "The capital of France is Paris. The capital of France is Berlin."
+            },
+            {
+                "query": "What is the capital of France?",
+                "context": context,
+                "response": "The capital of France is Paris."
+            },
+        ]
+    }
+    response = client.post('/detect_hallucination_batch', json=params)
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [r['hallucination_detected'] for r in results] == [True, False]
+
+
+def test_detect_hallucination_batch_invalid(client):
+    """
+    Test that the '/detect_hallucination_batch' endpoint rejects invalid items.
+    """
+    response = client.post('/detect_hallucination_batch', json={"items": [{"query": "q", "context": "c"}]})
+    assert response.status_code == 400
+
+    response = client.post('/detect_hallucination_batch', json={"items": [{"query": "q", "context": "c", "response": 1}]})
+    assert response.status_code == 400
+    assert response.json['error'] == "item 0: response should be a string"
@@ -0,0 +1,154 @@
+import threading
+import time
+import pytest
+from src.services.hallucination_queue import HallucinationQueue
+
+
+class RecordingDetect:
+    """Fake hallucination detector flagging the responses containing "wrong", recording each call."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, query, context, response):
+        self.calls.append((query, context, response))
+        time.sleep(self.delay)
+        if response == "error":
+            raise ValueError("bad response")
+        return {"hallucination_detected": "wrong" in response}
+
+
+@pytest.fixture
+def detect():
+    return RecordingDetect()
+
+
+def test_detect_one(detect):
+    """
+    Test that a single detection returns its result.
+    """
+    queue = HallucinationQueue(detect)
+
+    assert queue.detect_one("q", "context", "wrong answer") == {"hallucination_detected": True}
+    assert detect.calls == [("q", "context", "wrong answer")]
+    queue.stop()
+
+
+def test_items_run_in_order(detect):
+    """
+    Test that the items of a batch are checked one at a time, in their order,
+    and their results returned in the order of the items.
+    """
+    queue = HallucinationQueue(detect)
+    items = [("q", "a" * 40, "answer"), ("q", "b" * 4000, "wrong"), ("q", "c", "wrong"), ("q", "d", "answer")]
+
+    results = queue.detect_many(items)
+
+    assert [r["hallucination_detected"] for r in results] == [False, True, True, False]
+    assert detect.calls == items
+    assert queue.stats()["requests"] == 4
+    queue.stop()
+
+
+def test_item_error_does_not_fail_the_others(detect):
+    """
+    Test that the error of an item is returned for that item only.
+    """
+    queue = HallucinationQueue(detect)
+
+    results = queue.detect_many([("q", "context", "error"), ("q", "context", "answer")])
+
+    assert isinstance(results[0], ValueError)
+    assert results[1] == {"hallucination_detected": False}
+    assert queue.stats()["errors"] == 1
+    with pytest.raises(ValueError):
+        queue.detect_one("q", "context", "error")
+    queue.stop()
+
+
+def test_timeout():
+    """
+    Test that items not done within their time limit are reported as timed out,
+    without blocking the items queued after them.
+    """
+    release = threading.Event()
+    calls = []
+
+    def slow_detect(query, context, response):
+        calls.append(response)
+        release.wait(5)
+        return {"hallucination_detected": False}
+
+    queue = HallucinationQueue(slow_detect)
+
+    start = time.perf_counter()
+    results = queue.detect_many([("q", "context", "first"), ("q", "context", "second")], timeout=0.1)
+
+    assert all(isinstance(result, TimeoutError) for result in results)
+    assert time.perf_counter() - start < 1
+
+    release.set()
+    assert queue.detect_one("q", "context", "answer", timeout=5) == {"hallucination_detected": False}
+    assert queue.stats()["timeouts"] == 2
+    queue.stop()
+
+
+def test_expired_items_are_skipped():
+    """
+    Test that the items whose deadline passed while an earlier item was running are
+    not run, while the items queued with a longer deadline still are.
+    """
+    calls = []
+
+    def slow_detect(query, context, response):
+        calls.append(response)
+        time.sleep(0.2)
+        return {"hallucination_detected": False}
+
+    queue = HallucinationQueue(slow_detect)
+    first, _ = queue.submit("q", "context", "first", timeout=5)
+    expired, _ = queue.submit("q", "context", "expired", timeout=0.05)
+    last, _ = queue.submit("q", "context", "last", timeout=5)
+
+    assert first.result(5) == {"hallucination_detected": False}
+    assert last.result(5) == {"hallucination_detected": False}
+    with pytest.raises(TimeoutError):
+        expired.result(5)
+    assert calls == ["first", "last"]
+    assert queue.stats()["timeouts"] == 1
+    queue.stop()
+
+
+def test_concurrent_requests_run_one_at_a_time(detect):
+    """
+    Test that requests submitted concurrently never run at the same time.
+    """
+    running = []
+    overlaps = []
+
+    def exclusive_detect(query, context, response):
+        running.append(response)
+        overlaps.append(len(running) > 1)
+        time.sleep(0.01)
+        running.remove(response)
+        return {"hallucination_detected": False}
+
+    queue = HallucinationQueue(exclusive_detect)
+    results = [None] * 4
+    barrier = threading.Barrier(4)
+
+    def run(i):
+        barrier.wait()
+        results[i] = queue.detect_one("q", "context", f"answer {i}")
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(result == {"hallucination_detected": False} for result in results)
+    assert overlaps == [False] * 4
+    assert queue.stats()["queue_depth"] == 0
+    queue.stop()
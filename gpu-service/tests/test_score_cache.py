@@ -0,0 +1,88 @@
+import numpy as np
+from src.services.score_cache import ScoreCache
+
+
+class CountingScore:
+    """Fake model scoring a pair by the length of its text, recording each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, pairs):
+        self.calls.append(list(pairs))
+        return np.array([len(text) for _, text in pairs], dtype=np.float32)
+
+
+def test_only_missing_pairs_are_scored():
+    """
+    Test that cached pairs are not sent to the model again.
+    """
+    cache = ScoreCache("model")
+    score = CountingScore()
+
+    first = cache.get_or_score([("q", "a"), ("q", "bb")], score)
+    second = cache.get_or_score([("q", "bb"), ("q", "ccc"), ("q", "a")], score)
+
+    assert first.tolist() == [1, 2]
+    assert second.tolist() == [2, 3, 1]
+    assert score.calls == [[("q", "a"), ("q", "bb")], [("q", "ccc")]]
+
+    stats = cache.stats()
+    assert stats["pairs_saved"] == 2
+    assert stats["pairs_scored"] == 3
+    assert stats["hit_ratio"] == 0.4
+
+
+def test_repeated_pairs_scored_once():
+    """
+    Test that a pair repeated within a request is scored once.
+    """
+    cache = ScoreCache("model")
+    score = CountingScore()
+
+    scores = cache.get_or_score([("q", "a"), ("q", "a"), ("q", "bb")], score)
+
+    assert scores.tolist() == [1, 1, 2]
+    assert score.calls == [[("q", "a"), ("q", "bb")]]
+
+
+def test_keys_depend_on_model_and_query():
+    """
+    Test that the same text gets different keys for another query or model.
+    """
+    cache = ScoreCache("model")
+
+    assert cache.make_key("q", "text") == cache.make_key("q", "text")
+    assert cache.make_key("q", "text") != cache.make_key("q2", "text")
+    assert cache.make_key("ab", "c") != cache.make_key("a", "bc")
+    assert cache.make_key("q", "text") != ScoreCache("other").make_key("q", "text")
+
+
+def test_least_recently_used_evicted():
+    """
+    Test that the cache is bounded, evicting the least recently used scores.
+    """
+    cache = ScoreCache("model", max_entries=2)
+    score = CountingScore()
+
+    cache.get_or_score([("q", "a"), ("q", "bb")], score)
+    cache.get_or_score([("q", "a")], score)
+    cache.get_or_score([("q", "ccc")], score)
+    cache.get_or_score([("q", "a"), ("q", "bb")], score)
+
+    assert cache.stats()["entries"] == 2
+    assert score.calls[-1] == [("q", "bb")]
+
+
+def test_disabled_cache():
+    """
+    Test that a cache of size 0 sends every pair to the model.
+    """
+    cache = ScoreCache("model", max_entries=0)
+    score = CountingScore()
+
+    cache.get_or_score([("q", "a")], score)
+    cache.get_or_score([("q", "a")], score)
+
+    assert len(score.calls) == 2
+    assert cache.stats()["entries"] == 0
@@ -14,3 +14,75 @@ def test_summarize(client):
     response = client.post('/summarize', json=params)
     assert response.status_code == 200
     assert response.json["summary"] == "It is designed with simplicity and flexibility in mind."
+
+
+def test_summarize_batch(client):
+    """
+    Test the '/summarize_batch' endpoint.
+
+    Ensures that each document gets the same summary as with the '/summarize' endpoint,
+    in the order of the items.
+    """
+    document = "Flask is a lightweight WSGI web application framework in Python. It is designed with simplicity and flexibility in mind. Flask is easy to learn and use, making it a popular choice for developers."
+    items = [
+        {"query": "What are the key points?", "document": document, "length": 10},
+        {"query": "Is Flask easy to learn?", "document": document, "length": 10},
+    ]
+    response = client.post('/summarize_batch', json={"items": items})
+    assert response.status_code == 200
+
+    summaries = response.json["summaries"]
+    assert len(summaries) == 2
+    for item, summary in zip(items, summaries):
+        assert summary == client.post('/summarize', json=item).json["summary"]
+
+
+def test_summarize_batch_invalid_item(client):
+    """
+    Test that the '/summarize_batch' endpoint rejects a batch with an invalid item.
+    """
+    items = [
+        {"query": "What are the key points?", "document": "Flask is a framework.", "length": 10},
+        {"query": "What are the key points?", "document": "", "length": 10},
+    ]
+    response = client.post('/summarize_batch', json={"items": items})
+    assert response.status_code == 400
+    assert response.json["error"] == "item 1: document should not be empty"
+
+
+def test_summarize_with_sentences(client):
+    """
+    Test the '/summarize' endpoint with a document already split into sentences.
+
+    Ensures that the summary is the same as when the service splits the document.
+    """
+    params = {
+        "query": "What are the key points?",
+        "sentences": [
+            "Flask is a lightweight WSGI web application framework in Python.",
+            "It is designed with simplicity and flexibility in mind.",
+            "Flask is easy to learn and use, making it a popular choice for developers.",
+        ],
+        "length": 10
+    }
+    response = client.post('/summarize', json=params)
+    assert response.status_code == 200
+    assert response.json["summary"] == "It is designed with simplicity and flexibility in mind."
+
+
+def test_select_sentences_stops_before_length():
+    """
+    Test that the sentence straddling the length is not kept, so that the summary
+    stays within the length, while the best sentence is always kept.
+    """
+    import numpy as np
+    from src.services.summarizer import select_sentences
+
+    sentences = ["a" * 10, "b" * 10, "c" * 10]
+    scores = np.array([2.0, 3.0, 1.0])
+
+    summary = select_sentences(sentences, scores, length=25)
+    assert summary == "a" * 10 + "\n" + "b" * 10
+    assert select_sentences(sentences, scores, length=21) == summary
+    assert select_sentences(sentences, scores, length=20) == "b" * 10
+    assert select_sentences(sentences, scores, length=5) == "b" * 10
@@ -0,0 +1,168 @@
+"""Recall vs latency benchmark of the dense vector quantization settings.
+
+The quantization profile is applied to the collection (Qdrant rebuilds the quantized
+vectors in the background), then every question of an IR testset is searched with
+each combination of query-side settings:
+
+- recall@k: share of the target articles retrieved, as in the retrieval experiments
+- overlap@k: share of the exact (brute force, float32) results retrieved
+- p50/p95: search latency in milliseconds
+
+Usage:
+    uv run python src/quantization_benchmark.py --quantization scalar
+    uv run python src/quantization_benchmark.py --quantization binary --oversampling 1 2 4
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+from qdrant_client import QdrantClient, models
+
+from embeddings import generate_embeddings
+
+
+client = QdrantClient("http://localhost:6333")
+
+
+def quantization_config(mode):
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        )
+    return models.Disabled.DISABLED
+
+
+def apply_quantization(collection_name, mode):
+    client.update_collection(
+        collection_name=collection_name,
+        quantization_config=quantization_config(mode),
+    )
+
+    # Wait for the optimizer to rebuild the segments
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        time.sleep(1)
+
+
+def load_testset(file_path):
+    df = pd.read_parquet(file_path)
+
+    if "target" in df.columns:
+        df["target"] = df.target.apply(lambda x: list(x))
+    else:
+        df["target"] = df.uuid.apply(lambda x: [x])
+
+    if "question_embedding" not in df.columns:
+        df["question_embedding"] = generate_embeddings(df.question.tolist())
+
+    return df
+
+
+def search(collection_name, embedding, k, params):
+    start = time.perf_counter()
+    docs = client.query_points(
+        collection_name=collection_name,
+        using="embedding",
+        query=list(embedding),
+        search_params=params,
+        limit=k,
+    )
+    latency = time.perf_counter() - start
+
+    return [doc.id for doc in docs.points], latency
+
+
+def run_setting(df, collection_name, k, params, exact):
+    recalls, overlaps, latencies = [], [], []
+
+    for row, reference in zip(df.itertuples(), exact):
+        retrieved, latency = search(collection_name, row.question_embedding, k, params)
+
+        recalls.append(len(set(retrieved) & set(row.target)) / len(row.target))
+        overlaps.append(len(set(retrieved) & set(reference)) / max(len(reference), 1))
+        latencies.append(latency * 1000)
+
+    return {
+        "recall": np.mean(recalls),
+        "overlap": np.mean(overlaps),
+        "p50_ms": np.percentile(latencies, 50),
+        "p95_ms": np.percentile(latencies, 95),
+    }
+
+
+def run_benchmark(df, collection_name, mode, ks, hnsw_efs, oversamplings):
+    results = []
+
+    for k in ks:
+        exact_params = models.SearchParams(
+            exact=True,
+            quantization=models.QuantizationSearchParams(ignore=True),
+        )
+        exact = [
+            search(collection_name, embedding, k, exact_params)[0]
+            for embedding in df.question_embedding
+        ]
+
+        settings = [("float32", None, False)]
+        if mode != "none":
+            settings += [
+                ("quantized", oversampling, rescore)
+                for oversampling, rescore in itertools.product(oversamplings, [True, False])
+            ]
+
+        for (name, oversampling, rescore), hnsw_ef in itertools.product(settings, hnsw_efs):
+            params = models.SearchParams(
+                hnsw_ef=hnsw_ef,
+                quantization=models.QuantizationSearchParams(
+                    ignore=name == "float32",
+                    rescore=rescore,
+                    oversampling=oversampling,
+                ),
+            )
+
+            # Warm up the caches before measuring
+            run_setting(df.head(10), collection_name, k, params, exact[:10])
+
+            results.append({
+                "quantization": mode if name == "quantized" else "none",
+                "k": k,
+                "hnsw_ef": hnsw_ef,
+                "rescore": rescore,
+                "oversampling": oversampling,
+                **run_setting(df, collection_name, k, params, exact),
+            })
+
+    return pd.DataFrame(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default="data/retrieval_questions_multichunks.parquet")
+    parser.add_argument("--collection", default="dev_articles")
+    parser.add_argument("--quantization", choices=["none", "scalar", "binary"], default="scalar")
+    parser.add_argument("--k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--hnsw-ef", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--output", default="data/quantization_benchmark.csv")
+    args = parser.parse_args()
+
+    df = load_testset(args.dataset)
+    apply_quantization(args.collection, args.quantization)
+
+    results = run_benchmark(df, args.collection, args.quantization, args.k, args.hnsw_ef, args.oversampling)
+    results.to_csv(args.output, index=False)
+
+    print(results.to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
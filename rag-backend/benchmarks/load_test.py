@@ -0,0 +1,104 @@
+"""Load test of the /ask endpoint, to compare the WSGI and ASGI serving modes.
+
+Sends the questions with a fixed number of requests in flight, and reports the
+throughput, the latency percentiles and the errors of each server. Start both servers
+with the same number of workers and the same services behind them, e.g.:
+
+    uv run gunicorn -b 0.0.0.0:5000 -w 4 src.app:app
+    uv run uvicorn src.asgi:app --host 0.0.0.0 --port 5002 --workers 4
+
+Usage:
+    uv run python -m benchmarks.load_test --url wsgi=http://localhost:5000 --url asgi=http://localhost:5002
+    uv run python -m benchmarks.load_test --url asgi=http://localhost:5002 --concurrency 8 32 --requests 200
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+import numpy as np
+
+
+QUESTIONS = [
+    "Who created Mario?",
+    "What is the capital of France?",
+    "When was the first PlayStation released?",
+    "Who painted the ceiling of the Sistine Chapel?",
+    "What does the Supreme Court of Canada do?",
+    "Why is the sky blue?",
+]
+
+
+async def run_load(base_url, path, params, num_requests, concurrency, timeout):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(session, i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with session.get(
+                    f"{base_url}{path}",
+                    params={"question": QUESTIONS[i % len(QUESTIONS)], **params},
+                ) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)
+    ) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(send(session, i) for i in range(num_requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "req_per_s": len(latencies) / elapsed,
+        "p50_ms": np.percentile(latencies, 50) if len(latencies) else float("nan"),
+        "p95_ms": np.percentile(latencies, 95) if len(latencies) else float("nan"),
+        "errors": errors,
+    }
+
+
+def parse_url(value):
+    label, sep, url = value.partition("=")
+    return (label, url) if sep else (value, value)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", type=parse_url, required=True,
+                        help="Server to load, as label=base_url (repeat to compare servers).")
+    parser.add_argument("--path", default="/ask")
+    parser.add_argument("--method", default="hybrid", help="Search method of the questions.")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=100, help="Requests sent per run.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="Requests in flight of each run.")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    params = {"method": args.method, "k": str(args.k)}
+    print(f"{'server':<12} {'concurrency':>11} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    for label, base_url in args.url:
+        # Warm up the workers before measuring
+        await run_load(base_url, args.path, params, max(args.concurrency), max(args.concurrency), args.timeout)
+        for concurrency in args.concurrency:
+            stats = await run_load(base_url, args.path, params, args.requests, concurrency, args.timeout)
+            print(
+                f"{label:<12} {concurrency:>11} {stats['req_per_s']:>8.2f} "
+                f"{stats['p50_ms']:>9.0f} {stats['p95_ms']:>9.0f} {stats['errors']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
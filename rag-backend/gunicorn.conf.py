@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the RAG backend.
+
+Gunicorn loads this file automatically when started from the project root.
+"""
+import os
+
+
+def post_worker_init(worker):
+    """Pre-warm the embedding models and the entity index once the worker has loaded the application."""
+    if os.environ.get("EMBEDDINGS_PREWARM", "true").lower() == "true":
+        from src.services.embeddings import embedding_registry
+        embedding_registry.warmup()
+
+    from src.services.entity import entity_extractor
+    if entity_extractor.use_index:
+        entity_extractor.refresh_index()
@@ -4,6 +4,8 @@ from flasgger import Swagger
 
 from src.routes.ingest import ingest_bp
 from src.routes.ask import ask_bp
+from src.routes.hallucination import hallucination_bp
+from src.routes.metrics import metrics_bp
 
 
 app = Flask(__name__)
@@ -12,6 +14,8 @@ swagger = Swagger(app)
 
 app.register_blueprint(ingest_bp)
 app.register_blueprint(ask_bp)
+app.register_blueprint(hallucination_bp)
+app.register_blueprint(metrics_bp)
 
 
 if __name__ == '__main__':
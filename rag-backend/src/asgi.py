@@ -0,0 +1,45 @@
+"""
+ASGI entry point of the RAG backend.
+
+Serves the Flask application with one long-lived event loop per worker, e.g.:
+
+    uvicorn src.asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+The clients of the event loop are created, and the models pre-warmed, at startup.
+"""
+import asyncio
+import os
+
+from src.app import app as flask_app
+from src.services.http import close_http_session, get_http_session
+from src.services.qdrant import close_qdrant_client, get_qdrant_client
+from src.utils.asgi import FlaskASGI
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def startup():
+    """Create the GPU service session and the Qdrant client of the event loop, and pre-warm the models."""
+    await get_http_session()
+    await get_qdrant_client()
+
+    if os.environ.get("EMBEDDINGS_PREWARM", "true").lower() == "true":
+        from src.services.embeddings import embedding_registry
+        await asyncio.to_thread(embedding_registry.warmup)
+
+    from src.services.entity import entity_extractor
+    if entity_extractor.use_index:
+        await asyncio.to_thread(entity_extractor.refresh_index)
+
+    logger.info("ASGI worker started")
+
+
+async def shutdown():
+    """Close the clients of the event loop."""
+    await close_http_session()
+    await close_qdrant_client()
+    logger.info("ASGI worker stopped")
+
+
+app = FlaskASGI(flask_app, on_startup=[startup], on_shutdown=[shutdown])
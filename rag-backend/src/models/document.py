@@ -18,3 +18,7 @@ class Document(BaseModel):
         default_factory=dict,
         description="Dictionary of entity types to their values"
     )
+    sentence_offsets: Optional[List[int]] = Field(
+        None,
+        description="Flattened start and end character offsets of the sentences of the text"
+    )
@@ -17,6 +17,14 @@ class QuestionRequest(BaseModel):
     )
     filter_by_entity: bool = Field(default=False, description="Whether to filter results by entity")
     do_rerank: bool = Field(default=False, description="Whether to rerank the results")
+    parallel_stages: bool = Field(
+        default=False,
+        description="Whether to extract entities from the raw question concurrently with the query expansion"
+    )
+    async_hallucination: bool = Field(
+        default=False,
+        description="Whether to return the answer before the hallucination detection, with a job id to poll"
+    )
 
 
 class IngestRequest(BaseModel):
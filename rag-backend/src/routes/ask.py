@@ -1,8 +1,11 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 
-from src.services.qa_pipeline import qa_pipeline
+from src.services.qa_pipeline import qa_pipeline, qa_pipeline_stream
 from src.services.hallucination import detect_hallucination
+from src.services.hallucination_jobs import hallucination_jobs
+from src.services.streaming import format_event, iterate_in_thread
 from src.models.requests import QuestionRequest
+from src.utils.asgi import supports_async_body
 from src.utils.logger import get_logger
 
 
@@ -48,6 +51,18 @@ async def ask():
           type: boolean
         required: false
         description: Whether to rerank the articles (will search k*3 articles and use the top k).
+      - in: query
+        name: parallel_stages
+        schema:
+          type: boolean
+        required: false
+        description: Whether to extract entities from the raw question concurrently with the query expansion.
+      - in: query
+        name: async_hallucination
+        schema:
+          type: boolean
+        required: false
+        description: Whether to return the answer before the hallucination detection, with a job id to poll on `/hallucination/<id>`.
     responses:
       200:
         description: A successful response containing the question and its answer.
@@ -60,6 +75,12 @@ async def ask():
             answer:
               type: string
               description: The answer to the question.
+            hallucination:
+              type: object
+              description: The hallucination detection result (synchronous detection).
+            hallucination_job_id:
+              type: string
+              description: The id of the hallucination detection job (asynchronous detection).
       400:
         description: Bad request. Either the question is missing or an error occurred.
         schema:
@@ -79,7 +100,9 @@ async def ask():
         question_data = QuestionRequest(**request.args)
         logger.debug(f"Processing question: '{question_data.question}' with parameters: "
                      f"method={question_data.method}, k={question_data.k}, "
-                     f"filter_by_entity={question_data.filter_by_entity}, do_rerank={question_data.do_rerank}")
+                     f"filter_by_entity={question_data.filter_by_entity}, do_rerank={question_data.do_rerank}, "
+                     f"parallel_stages={question_data.parallel_stages}, "
+                     f"async_hallucination={question_data.async_hallucination}")
 
         result = await qa_pipeline(
             question_data.question,
@@ -87,19 +110,146 @@ async def ask():
             k=question_data.k,
             filter_by_entity=question_data.filter_by_entity,
             do_rerank=question_data.do_rerank,
+            parallel_stages=question_data.parallel_stages,
         )
         logger.debug("QA pipeline completed successfully")
 
+        context = "\n".join(doc["text"] for doc in result['docs'])
+        if question_data.async_hallucination:
+            job_id = hallucination_jobs.submit(question_data.question, context, result['answer'])
+            result.update(hallucination_job_id=job_id)
+        else:
+            hallucination = await detect_hallucination(question_data.question, context, result['answer'])
+            result.update(hallucination=hallucination)
+            logger.debug(f"Hallucination detection result: {hallucination}")
+
+        logger.info(f"Successfully processed question: '{question_data.question[:30]}...'")
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error processing question request: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 400
+
+
+@ask_bp.route('/ask/stream', methods=['GET'])
+def ask_stream():
+    """
+    Ask a question and stream the answer of the QA pipeline as Server-Sent Events.
+    ---
+    tags:
+      - Ask
+    produces:
+      - text/event-stream
+    parameters:
+      - in: query
+        name: question
+        schema:
+          type: string
+        required: true
+        description: The question to be answered.
+      - in: query
+        name: method
+        schema:
+          type: string
+        required: false
+        description: The method to use for the search (bm25/dense/hybrid).
+      - in: query
+        name: k
+        schema:
+          type: integer
+        required: false
+        description: The number of top results to consider.
+      - in: query
+        name: filter_by_entity
+        schema:
+          type: boolean
+        required: false
+        description: Whether to filter articles by entity when searching.
+      - in: query
+        name: do_rerank
+        schema:
+          type: boolean
+        required: false
+        description: Whether to rerank the articles (will search k*3 articles and use the top k).
+      - in: query
+        name: parallel_stages
+        schema:
+          type: boolean
+        required: false
+        description: Whether to extract entities from the raw question concurrently with the query expansion.
+    responses:
+      200:
+        description: |
+          A stream of events, in order:
+          - `docs`: the retrieved documents, as soon as the search is done.
+          - `token`: the next part of the answer (`{"text": ...}`), as generated.
+          - `answer`: the complete answer and the documents it is based on.
+          - `hallucination`: the hallucination detection result.
+          - `error`: the error message, if the pipeline failed.
+      400:
+        description: Bad request. The question is missing or a parameter is invalid.
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              description: The error message.
+    """
+    logger.info("Received streaming question request")
+    question = request.args.get('question')
+    if not question:
+        logger.warning("Request missing required 'question' parameter")
+        return jsonify({'error': 'Question is required'}), 400
+
+    try:
+        question_data = QuestionRequest(**request.args)
+    except Exception as e:
+        logger.warning(f"Invalid streaming question request: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+    async def pipeline_events():
+        result = None
+        async for event, data in qa_pipeline_stream(
+            question_data.question,
+            method=question_data.method,
+            k=question_data.k,
+            filter_by_entity=question_data.filter_by_entity,
+            do_rerank=question_data.do_rerank,
+            parallel_stages=question_data.parallel_stages,
+        ):
+            if event == "answer":
+                result = data
+            yield event, {"text": data} if event == "token" else data
+
         hallucination = await detect_hallucination(
             question_data.question,
             "\n".join(doc["text"] for doc in result['docs']),
             result['answer'],
         )
-        result.update(hallucination=hallucination)
         logger.debug(f"Hallucination detection result: {hallucination}")
+        yield "hallucination", hallucination
 
-        logger.info(f"Successfully processed question: '{question_data.question[:30]}...'")
-        return jsonify(result)
-    except Exception as e:
-        logger.error(f"Error processing question request: {str(e)}", exc_info=True)
-        return jsonify({'error': str(e)}), 400
+    def events():
+        try:
+            for event, data in iterate_in_thread(pipeline_events):
+                yield format_event(event, data)
+            logger.info(f"Successfully streamed question: '{question_data.question[:30]}...'")
+        except Exception as e:
+            logger.error(f"Error streaming question request: {str(e)}", exc_info=True)
+            yield format_event("error", {"error": str(e)})
+
+    async def async_events():
+        try:
+            async for event, data in pipeline_events():
+                yield format_event(event, data)
+            logger.info(f"Successfully streamed question: '{question_data.question[:30]}...'")
+        except Exception as e:
+            logger.error(f"Error streaming question request: {str(e)}", exc_info=True)
+            yield format_event("error", {"error": str(e)})
+
+    # Under the ASGI server, the pipeline runs on the event loop of the worker and shares its
+    # clients; under a WSGI server, it runs in a background event loop of its own
+    return Response(
+        async_events() if supports_async_body(request.environ) else events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
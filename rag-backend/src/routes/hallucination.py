@@ -0,0 +1,125 @@
+import os
+
+from flask import Blueprint, Response, request, jsonify
+
+from src.services.hallucination_jobs import PENDING, hallucination_jobs
+from src.services.streaming import format_event
+from src.utils.logger import get_logger
+
+
+hallucination_bp = Blueprint('hallucination', __name__)
+logger = get_logger(__name__)
+
+# Timeout of the gunicorn sync workers, which are killed if a request takes longer
+GUNICORN_WORKER_TIMEOUT = 30
+
+# Maximum time a request waits for a job, in seconds. A waiting request holds a worker,
+# so the wait stays below the worker timeout; clients poll again if the job is still pending.
+HALLUCINATION_WAIT_TIMEOUT = min(
+    float(os.environ.get("HALLUCINATION_WAIT_TIMEOUT", 20)), GUNICORN_WORKER_TIMEOUT - 5
+)
+
+
+@hallucination_bp.route('/hallucination/<job_id>', methods=['GET'])
+def get_hallucination(job_id):
+    """
+    Get the result of a hallucination detection job started by `/ask`.
+    ---
+    tags:
+      - Hallucination
+    parameters:
+      - in: path
+        name: job_id
+        schema:
+          type: string
+        required: true
+        description: The `hallucination_job_id` returned by `/ask`.
+      - in: query
+        name: wait
+        schema:
+          type: number
+        required: false
+        description: Seconds to wait for the job to finish before answering (default 0, at most HALLUCINATION_WAIT_TIMEOUT).
+    responses:
+      200:
+        description: The state of the job.
+        schema:
+          type: object
+          properties:
+            job_id:
+              type: string
+              description: The id of the job.
+            status:
+              type: string
+              description: The status of the job (pending/done/error).
+            result:
+              type: object
+              description: The hallucination detection result, once done.
+            error:
+              type: string
+              description: The error message, if the detection failed.
+      400:
+        description: Bad request. The wait parameter is invalid.
+      404:
+        description: The job is unknown or expired.
+    """
+    logger.debug(f"Received hallucination job request for {job_id}")
+    try:
+        wait = min(float(request.args.get('wait', 0)), HALLUCINATION_WAIT_TIMEOUT)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number'}), 400
+
+    job = hallucination_jobs.wait(job_id, wait) if wait > 0 else hallucination_jobs.get(job_id)
+    if job is None:
+        logger.warning(f"Unknown hallucination job {job_id}")
+        return jsonify({'error': f'Unknown hallucination job {job_id}'}), 404
+    return jsonify(job)
+
+
+@hallucination_bp.route('/hallucination/<job_id>/stream', methods=['GET'])
+def stream_hallucination(job_id):
+    """
+    Wait for a hallucination detection job and send its result as a Server-Sent Event.
+    ---
+    tags:
+      - Hallucination
+    produces:
+      - text/event-stream
+    parameters:
+      - in: path
+        name: job_id
+        schema:
+          type: string
+        required: true
+        description: The `hallucination_job_id` returned by `/ask`.
+    responses:
+      200:
+        description: |
+          A single event once the job is finished, or after HALLUCINATION_WAIT_TIMEOUT seconds:
+          - `hallucination`: the hallucination detection result.
+          - `pending`: the job is still running; reconnect to keep waiting.
+          - `error`: the error message, if the detection failed.
+      404:
+        description: The job is unknown or expired.
+    """
+    logger.debug(f"Received hallucination job stream request for {job_id}")
+    if hallucination_jobs.get(job_id) is None:
+        logger.warning(f"Unknown hallucination job {job_id}")
+        return jsonify({'error': f'Unknown hallucination job {job_id}'}), 404
+
+    def events():
+        job = hallucination_jobs.wait(job_id, HALLUCINATION_WAIT_TIMEOUT)
+        if job is None:
+            yield format_event("error", {"error": f"Unknown hallucination job {job_id}"})
+        elif job["status"] == PENDING:
+            yield format_event("pending", job)
+        elif "error" in job:
+            yield format_event("error", {"error": job["error"]})
+        else:
+            yield format_event("hallucination", job["result"])
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,61 @@
+from flask import Blueprint, jsonify
+
+from src.services.embeddings import embedding_registry
+from src.services.embedding_cache import embedding_cache
+from src.services.hallucination_jobs import hallucination_jobs
+from src.services.http import http_pool
+from src.services.llm_cache import llm_cache
+from src.services.qdrant import qdrant_pool
+from src.services.search_strategies import hybrid_encoding_timings
+from src.utils.logger import get_logger
+
+
+metrics_bp = Blueprint('metrics', __name__)
+logger = get_logger(__name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Report runtime counters of the worker that served the request.
+    ---
+    tags:
+      - Metrics
+    responses:
+      200:
+        description: Counters grouped by service.
+        schema:
+          type: object
+          properties:
+            embeddings:
+              type: object
+              description: Embedding model creation and reuse counters.
+            embedding_cache:
+              type: object
+              description: Embedding cache hit and miss counters.
+            qdrant:
+              type: object
+              description: Qdrant client pool usage.
+            llm_cache:
+              type: object
+              description: Query expansion and entity extraction cache hit ratios.
+            http:
+              type: object
+              description: GPU service HTTP session pool usage.
+            hallucination_jobs:
+              type: object
+              description: Background hallucination detection job counters.
+            hybrid_encoding:
+              type: object
+              description: Mean and maximum durations of the sparse, dense and whole encoding of the hybrid search queries.
+    """
+    logger.debug("Received metrics request")
+    return jsonify({
+        "embeddings": embedding_registry.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "qdrant": qdrant_pool.stats(),
+        "llm_cache": llm_cache.stats(),
+        "http": http_pool.stats(),
+        "hallucination_jobs": hallucination_jobs.stats(),
+        "hybrid_encoding": hybrid_encoding_timings.stats(),
+    })
@@ -1,10 +1,85 @@
-import aiohttp
+import re
+from sentence_splitter import split_text_into_sentences
+from src.services.http import GPU_SERVICE_URL, get_http_session
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-async def summarize(query, document, length=200):
+def sentence_offsets(text):
+    """
+    Compute the sentence boundaries of a text, as the GPU service would split it.
+
+    The splitter collapses the whitespace of the sentences it returns, so each sentence
+    is located in the text allowing any whitespace between its words.
+
+    Args:
+        text (str): The text to split.
+
+    Returns:
+        list: The start and end character offsets of each sentence, flattened
+            ([start_1, end_1, start_2, end_2, ...]), or None if a sentence could not be
+            located in the text.
+    """
+    offsets = []
+    cursor = 0
+    for sentence in split_text_into_sentences(text=text, language='en'):
+        words = sentence.split()
+        if not words:
+            continue
+
+        match = re.compile(r"\s+".join(re.escape(word) for word in words)).search(text, cursor)
+        if match is None:
+            logger.warning("Could not locate a sentence in the text, skipping sentence offsets")
+            return None
+
+        offsets.extend(match.span())
+        cursor = match.end()
+
+    return offsets
+
+
+def split_sentences(text, offsets):
+    """
+    Split a text into sentences with precomputed offsets.
+
+    Args:
+        text (str): The text.
+        offsets (list): The flattened sentence offsets computed by `sentence_offsets`.
+
+    Returns:
+        list: The sentences, with their whitespace collapsed as by the GPU service splitter.
+    """
+    return [
+        " ".join(text[start:end].split())
+        for start, end in zip(offsets[::2], offsets[1::2])
+    ]
+
+
+def without_sentence_offsets(doc):
+    """
+    Copy a retrieved document without its sentence offsets.
+
+    The offsets are only used to summarize the document, so they are not sent to the
+    clients nor to the reranker.
+
+    Args:
+        doc (dict): The document, with an optional "sentence_offsets" key.
+
+    Returns:
+        dict: A copy of the document without the "sentence_offsets" key.
+    """
+    return {key: value for key, value in doc.items() if key != "sentence_offsets"}
+
+
+def _summarize_item(query, document, length, sentences=None):
+    """Build the GPU service summarization item of a document."""
+    if sentences:
+        return {"query": query, "sentences": sentences, "length": length}
+    return {"query": query, "document": document, "length": length}
+
+
+async def summarize(query, document, length=200, sentences=None):
     """
     Sends a query and document to the GPU service for summarization.
 
@@ -12,6 +87,8 @@ async def summarize(query, document, length=200):
         query (str): The query to guide the summarization process.
         document (str): The document to be summarized.
         length (int): The desired length of the summary. Default is 200.
+        sentences (list, optional): The sentences of the document. When given, they are
+            sent instead of the document, which the GPU service then does not split.
 
     Returns:
         str: The summary generated by the GPU service.
@@ -21,24 +98,65 @@ async def summarize(query, document, length=200):
     """
     logger.info(f"Summarizing document with length {len(document)} chars to target length {length}")
 
-    async with aiohttp.ClientSession() as session:
-        logger.debug("Sending request to GPU service for summarization")
-        async with session.post(
-            'http://gpu-service:5001/summarize',
-            json={
-                "query": query,
-                "document": document,
-                "length": length
-            }
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                logger.error(f"GPU service summarization failed: {error_text}")
-                raise Exception(f"GPU service summarization failed: {error_text}")
-
-            result = await response.json()
-            summary = result['summary']
-            logger.debug(f"Summarization complete, produced {len(summary)} chars")
-            logger.info("Document summarized successfully")
-
-            return summary
+    session = await get_http_session()
+    logger.debug("Sending request to GPU service for summarization")
+    async with session.post(
+        f"{GPU_SERVICE_URL}/summarize",
+        json=_summarize_item(query, document, length, sentences),
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"GPU service summarization failed: {error_text}")
+            raise Exception(f"GPU service summarization failed: {error_text}")
+
+        result = await response.json()
+        summary = result['summary']
+        logger.debug(f"Summarization complete, produced {len(summary)} chars")
+        logger.info("Document summarized successfully")
+
+        return summary
+
+
+async def summarize_batch(query, documents, length=200, sentences=None):
+    """
+    Sends a query and several documents to the GPU service, summarized in a single request.
+
+    The GPU service scores the sentences of all the documents together, which uses the GPU
+    better than one request per document.
+
+    Args:
+        query (str): The query to guide the summarization process.
+        documents (list): The documents to be summarized.
+        length (int): The desired length of each summary. Default is 200.
+        sentences (list, optional): The sentences of each document, or None for the
+            documents to be split by the GPU service.
+
+    Returns:
+        list: The summary of each document, in the same order.
+
+    Raises:
+        Exception: If the GPU service returns a non-200 status code or an error occurs.
+    """
+    logger.info(f"Summarizing {len(documents)} documents to target length {length}")
+
+    session = await get_http_session()
+    logger.debug("Sending batch request to GPU service for summarization")
+    async with session.post(
+        f"{GPU_SERVICE_URL}/summarize_batch",
+        json={
+            "items": [
+                _summarize_item(query, document, length, document_sentences)
+                for document, document_sentences in zip(documents, sentences or [None] * len(documents))
+            ]
+        }
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"GPU service batch summarization failed: {error_text}")
+            raise Exception(f"GPU service batch summarization failed: {error_text}")
+
+        result = await response.json()
+        summaries = result['summaries']
+        logger.info("Documents summarized successfully")
+
+        return summaries
@@ -0,0 +1,409 @@
+"""
+Provisioning of the Qdrant collections holding the articles.
+
+The collection schema (HNSW graph, on-disk storage, optimizer, quantization) is
+read from the environment, and every entity type gets a keyword payload index so that entity
+filters do not scan payloads. Existing collections can be migrated in place with::
+
+    python -m src.services.collections migrate [collection_name]
+
+Searches read through an alias, so the collection can be rebuilt without downtime:
+a new collection is built and filled offline, warmed, then the alias is swapped to it
+in a single atomic operation::
+
+    python -m src.services.collections create articles_v2
+    QDRANT_WRITE_COLLECTION=articles_v2 ...  # re-ingest the articles
+    python -m src.services.collections swap articles articles_v2
+"""
+import asyncio
+import os
+import sys
+import time
+from qdrant_client import models
+
+from src.services.entity import entity_extractor
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DENSE_VECTOR_SIZE = 768
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+
+
+def _env_bool(name, default="false"):
+    return os.environ.get(name, default).lower() == "true"
+
+
+def _env_int(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def _env_float(name):
+    value = os.environ.get(name)
+    return float(value) if value else None
+
+
+def quantization_mode():
+    """Get the quantization profile of the dense vectors.
+
+    Returns:
+        str: The value of `QDRANT_QUANTIZATION`, one of 'none', 'scalar' or 'binary'.
+
+    Raises:
+        ValueError: If the profile is unknown.
+    """
+    mode = os.environ.get("QDRANT_QUANTIZATION", "none").lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Invalid QDRANT_QUANTIZATION '{mode}'. Choose from {', '.join(QUANTIZATION_MODES)}.")
+    return mode
+
+
+def hnsw_config():
+    """Build the HNSW graph configuration.
+
+    Returns:
+        models.HnswConfigDiff: The HNSW settings from `QDRANT_HNSW_M`,
+        `QDRANT_HNSW_EF_CONSTRUCT` and `QDRANT_HNSW_ON_DISK`.
+    """
+    return models.HnswConfigDiff(
+        m=int(os.environ.get("QDRANT_HNSW_M", 16)),
+        ef_construct=int(os.environ.get("QDRANT_HNSW_EF_CONSTRUCT", 100)),
+        on_disk=_env_bool("QDRANT_HNSW_ON_DISK"),
+    )
+
+
+def optimizers_config():
+    """Build the optimizer configuration.
+
+    Returns:
+        models.OptimizersConfigDiff: The optimizer settings from `QDRANT_INDEXING_THRESHOLD`,
+        `QDRANT_MEMMAP_THRESHOLD` and `QDRANT_DEFAULT_SEGMENT_NUMBER`. Unset values keep
+        Qdrant's defaults.
+    """
+    return models.OptimizersConfigDiff(
+        indexing_threshold=_env_int("QDRANT_INDEXING_THRESHOLD"),
+        memmap_threshold=_env_int("QDRANT_MEMMAP_THRESHOLD"),
+        default_segment_number=_env_int("QDRANT_DEFAULT_SEGMENT_NUMBER"),
+    )
+
+
+def quantization_config():
+    """Build the quantization configuration of the dense vectors.
+
+    Scalar quantization stores each dimension as an int8 (4x smaller), binary
+    quantization as a single bit (32x smaller). The original float32 vectors are kept
+    for rescoring, and can be moved to disk with `QDRANT_VECTORS_ON_DISK`.
+
+    Returns:
+        The quantization settings, or None when `QDRANT_QUANTIZATION` is 'none'.
+    """
+    mode = quantization_mode()
+    always_ram = _env_bool("QDRANT_QUANTIZATION_ALWAYS_RAM", "true")
+
+    if mode == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=_env_float("QDRANT_QUANTIZATION_QUANTILE"),
+                always_ram=always_ram,
+            )
+        )
+    if mode == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=always_ram)
+        )
+    return None
+
+
+def dense_search_params():
+    """Build the search parameters of the dense vector queries.
+
+    Returns:
+        The search parameters from `QDRANT_SEARCH_HNSW_EF`, and when the collection is
+        quantized `QDRANT_SEARCH_RESCORE` and `QDRANT_SEARCH_OVERSAMPLING`, or None
+        when nothing is configured so that Qdrant's defaults apply.
+    """
+    hnsw_ef = _env_int("QDRANT_SEARCH_HNSW_EF")
+    quantization = None
+    if quantization_mode() != "none":
+        quantization = models.QuantizationSearchParams(
+            rescore=_env_bool("QDRANT_SEARCH_RESCORE", "true"),
+            oversampling=_env_float("QDRANT_SEARCH_OVERSAMPLING"),
+        )
+
+    if hnsw_ef is None and quantization is None:
+        return None
+    return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+
+def vectors_config():
+    """Build the dense vectors configuration.
+
+    Returns:
+        dict: The named dense vector parameters.
+    """
+    return {
+        "embedding": models.VectorParams(
+            size=DENSE_VECTOR_SIZE,
+            distance=models.Distance.COSINE,
+            on_disk=_env_bool("QDRANT_VECTORS_ON_DISK"),
+        ),
+    }
+
+
+def sparse_vectors_config():
+    """Build the sparse vectors configuration.
+
+    Returns:
+        dict: The named sparse vector parameters.
+    """
+    return {
+        "text": models.SparseVectorParams(
+            index=models.SparseIndexParams(on_disk=False),
+            modifier=models.Modifier.IDF,
+        )
+    }
+
+
+async def create_collection(qdrant_client, collection_name):
+    """Create a collection with the configured schema and its payload indexes.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection to create.
+    """
+    logger.info(f"Creating {collection_name} collection")
+    await qdrant_client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vectors_config(),
+        sparse_vectors_config=sparse_vectors_config(),
+        hnsw_config=hnsw_config(),
+        optimizers_config=optimizers_config(),
+        quantization_config=quantization_config(),
+    )
+    await create_payload_indexes(qdrant_client, collection_name)
+    logger.info(f"{collection_name} collection created successfully")
+
+
+async def create_payload_indexes(qdrant_client, collection_name, existing_fields=()):
+    """Create a keyword payload index for every entity type.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+        existing_fields: Payload fields already indexed, which are skipped.
+    """
+    for entity_type in entity_extractor.entity_types:
+        if entity_type in existing_fields:
+            continue
+
+        logger.info(f"Creating keyword payload index on {collection_name}.{entity_type}")
+        await qdrant_client.create_payload_index(
+            collection_name=collection_name,
+            field_name=entity_type,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+            wait=True,
+        )
+
+
+async def ensure_payload_indexes(qdrant_client, collection_name):
+    """Create the entity payload indexes missing from an existing collection.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+    """
+    info = await qdrant_client.get_collection(collection_name=collection_name)
+    await create_payload_indexes(qdrant_client, collection_name, existing_fields=set(info.payload_schema or {}))
+
+
+async def migrate_collection(qdrant_client, collection_name):
+    """Apply the configured schema to an existing collection, in place.
+
+    Qdrant rebuilds the affected indexes in the background, and the collection keeps
+    serving searches meanwhile. With `QDRANT_QUANTIZATION` set to 'none', an existing
+    quantization is removed.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+    """
+    logger.info(f"Migrating {collection_name} collection")
+    await qdrant_client.update_collection(
+        collection_name=collection_name,
+        vectors_config={
+            "embedding": models.VectorParamsDiff(
+                on_disk=_env_bool("QDRANT_VECTORS_ON_DISK"),
+            ),
+        },
+        hnsw_config=hnsw_config(),
+        optimizers_config=optimizers_config(),
+        quantization_config=quantization_config() or models.Disabled.DISABLED,
+    )
+    await ensure_payload_indexes(qdrant_client, collection_name)
+    logger.info(f"{collection_name} collection migrated successfully")
+
+
+async def ensure_collection(qdrant_client, collection_name):
+    """Create the collection if it doesn't exist, or add its missing payload indexes.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+    """
+    if await qdrant_client.collection_exists(collection_name=collection_name):
+        logger.debug(f"{collection_name} collection already exists")
+        await ensure_payload_indexes(qdrant_client, collection_name)
+        return
+
+    await create_collection(qdrant_client, collection_name)
+
+
+async def get_alias_target(qdrant_client, alias_name):
+    """Get the collection an alias points to.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        alias_name: The name of the alias.
+
+    Returns:
+        str: The name of the target collection, or None if no such alias exists.
+    """
+    aliases = await qdrant_client.get_aliases()
+    for alias in aliases.aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+async def wait_until_ready(qdrant_client, collection_name, timeout=600, poll_interval=1.0):
+    """Wait until the optimizer has finished indexing a collection.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+        timeout: Maximum time to wait, in seconds.
+        poll_interval: Time between two status checks, in seconds.
+
+    Raises:
+        TimeoutError: If the collection is still being optimized after `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        info = await qdrant_client.get_collection(collection_name=collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{collection_name} collection is still {info.status} after {timeout}s")
+        await asyncio.sleep(poll_interval)
+
+
+async def warm_collection(qdrant_client, collection_name, num_queries=None):
+    """Warm a collection before it starts serving searches.
+
+    Waits for indexing to finish, then runs dense queries built from stored vectors so
+    that the HNSW graph and the vectors are loaded in memory.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        collection_name: The name of the collection.
+        num_queries: Number of warm-up queries. Defaults to `QDRANT_WARMUP_QUERIES` (32).
+    """
+    if num_queries is None:
+        num_queries = int(os.environ.get("QDRANT_WARMUP_QUERIES", 32))
+
+    await wait_until_ready(qdrant_client, collection_name)
+
+    points, _ = await qdrant_client.scroll(
+        collection_name=collection_name,
+        limit=num_queries,
+        with_payload=False,
+        with_vectors=["embedding"],
+    )
+    if not points:
+        logger.warning(f"{collection_name} collection is empty, nothing to warm")
+        return
+
+    await qdrant_client.query_batch_points(
+        collection_name=collection_name,
+        requests=[
+            models.QueryRequest(
+                query=point.vector["embedding"],
+                using="embedding",
+                params=dense_search_params(),
+                limit=10,
+            )
+            for point in points
+        ],
+    )
+    logger.info(f"{collection_name} collection warmed with {len(points)} queries")
+
+
+async def swap_alias(qdrant_client, alias_name, collection_name):
+    """Point an alias to a collection, in a single atomic operation.
+
+    Searches reading through the alias switch from the previous collection to the new
+    one without any downtime. The previous collection is kept, to allow a rollback.
+
+    Args:
+        qdrant_client: The Qdrant client.
+        alias_name: The name of the alias read by the searches.
+        collection_name: The name of the collection the alias must point to.
+
+    Returns:
+        str: The collection the alias pointed to before, or None.
+
+    Raises:
+        ValueError: If a collection already uses the alias name.
+    """
+    previous = await get_alias_target(qdrant_client, alias_name)
+    if previous is None and await qdrant_client.collection_exists(collection_name=alias_name):
+        raise ValueError(f"{alias_name} is a collection, it cannot be used as an alias")
+
+    operations = []
+    if previous is not None:
+        operations.append(
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name))
+        )
+    operations.append(
+        models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+        )
+    )
+
+    await qdrant_client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info(f"Alias {alias_name} swapped from {previous} to {collection_name}")
+    return previous
+
+
+async def _main(argv):
+    from src.services.qdrant import collection_router, get_qdrant_client, close_qdrant_client
+
+    commands = ("create", "migrate", "warm", "swap")
+    if not argv or argv[0] not in commands or (argv[0] == "swap" and len(argv) != 3):
+        print(
+            "Usage: python -m src.services.collections {create|migrate|warm} [collection_name]\n"
+            "       python -m src.services.collections swap alias_name collection_name"
+        )
+        return 1
+
+    collection_name = argv[1] if len(argv) > 1 else collection_router.write
+    qdrant_client = await get_qdrant_client()
+    try:
+        if argv[0] == "create":
+            await ensure_collection(qdrant_client, collection_name)
+        elif argv[0] == "migrate":
+            await migrate_collection(qdrant_client, collection_name)
+        elif argv[0] == "warm":
+            await warm_collection(qdrant_client, collection_name)
+        else:
+            await warm_collection(qdrant_client, argv[2])
+            await swap_alias(qdrant_client, argv[1], argv[2])
+    finally:
+        await close_qdrant_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
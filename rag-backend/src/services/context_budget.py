@@ -0,0 +1,92 @@
+import asyncio
+import os
+
+from sentence_splitter import split_text_into_sentences
+
+from src.services.chunking import summarize
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Maximum size of the context sent to the hallucination detection, in estimated tokens (0 disables the budget)
+HALLUCINATION_CONTEXT_TOKENS = int(os.environ.get("HALLUCINATION_CONTEXT_TOKENS", 1024))
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens of a text, at about four characters per token.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+def unique_sentences(context):
+    """
+    Split a context into sentences, dropping the sentences already seen.
+
+    Retrieved passages often overlap (the same article ingested twice, or summaries of
+    related articles quoting the same sentences), so their shared sentences are kept once.
+
+    Args:
+        context (str): The passages, one or more per line.
+
+    Returns:
+        list: The distinct sentences, in the order of their first occurrence.
+    """
+    sentences = []
+    seen = set()
+    for line in context.splitlines():
+        for sentence in split_text_into_sentences(text=line, language='en'):
+            key = " ".join(sentence.lower().split())
+            if key and key not in seen:
+                seen.add(key)
+                sentences.append(" ".join(sentence.split()))
+    return sentences
+
+
+async def budget_context(answer, context, max_tokens=None):
+    """
+    Reduce a context to the sentences most relevant to an answer, within a token budget.
+
+    Duplicate sentences are dropped. If the context still exceeds the budget, the GPU
+    service scores its sentences against the answer with the cross-encoder, as for the
+    summarization, and keeps the best ones in their original order. The time taken by the
+    hallucination detection then no longer grows with the number of retrieved documents.
+    The GPU service always keeps the best sentence, so a sentence longer than the whole
+    budget is cut at the budget.
+
+    Args:
+        answer (str): The answer to check against the context.
+        context (str): The passages supporting the answer.
+        max_tokens (int, optional): The budget, in estimated tokens. Defaults to
+            HALLUCINATION_CONTEXT_TOKENS. 0 returns the context unchanged.
+
+    Returns:
+        str: The sentences kept, one per line. The deduplicated context if the GPU service
+            could not score the sentences.
+    """
+    if max_tokens is None:
+        max_tokens = HALLUCINATION_CONTEXT_TOKENS
+    if max_tokens <= 0:
+        return context
+
+    # Splitting the whole context takes a while, so it runs off the event loop
+    sentences = await asyncio.to_thread(unique_sentences, context)
+    deduplicated = "\n".join(sentences)
+    if estimate_tokens(deduplicated) <= max_tokens:
+        logger.debug(f"Context of {len(sentences)} sentences fits the budget of {max_tokens} tokens")
+        return deduplicated
+
+    logger.debug(f"Pruning context of {len(sentences)} sentences to a budget of {max_tokens} tokens")
+    length = max_tokens * 4
+    try:
+        pruned = await summarize(answer, deduplicated, length=length, sentences=sentences)
+    except Exception as e:
+        logger.warning(f"Context pruning failed, using the whole context: {str(e)}")
+        return deduplicated
+    return pruned[:length]
@@ -0,0 +1,293 @@
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import duckdb
+import numpy as np
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# A cached embedding: (indices, values). Indices are None for dense vectors.
+CachedEmbedding = Tuple[Optional[np.ndarray], np.ndarray]
+
+
+class EmbeddingCache:
+    """Two-tier cache of embeddings keyed by (model name, normalised text hash).
+
+    The first tier is an in-memory LRU. The second is a DuckDB table shared by all
+    workers on the host, so that embeddings survive restarts. The DuckDB file is
+    opened per operation; if it is locked by another process the lookup is simply
+    treated as a miss.
+
+    Lookups open the file read-only with a plain SELECT, so the workers can read it at
+    the same time, and only writes take the exclusive lock. The access times used to
+    evict the least recently used rows are updated lazily: the hashes read are kept in
+    memory and written with the next embeddings stored, or once `touch_batch` of them
+    are pending.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 100_000,
+        touch_batch: int = 256,
+    ):
+        """
+        Initialize the EmbeddingCache.
+
+        Args:
+            db_path: Path to the DuckDB file backing the cache, or None to keep it in memory only.
+            max_memory_entries: Maximum number of embeddings kept in memory (0 disables the tier).
+            max_disk_entries: Maximum number of embeddings kept on disk.
+            touch_batch: Number of pending access time updates written without waiting
+                for the next write.
+        """
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.touch_batch = touch_batch
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # DuckDB refuses read-only and read-write connections to the same file in a process
+        self._disk_lock = threading.Lock()
+        # Hashes read from disk whose access time is not written yet, per model
+        self._touched = {}
+        self._table_ready = False
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "disk_errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Whether at least one tier is active."""
+        return self.max_memory_entries > 0 or bool(self.db_path)
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> Tuple[str, str]:
+        """
+        Build the cache key of a text.
+
+        Texts differing only by Unicode form or whitespace share the same key.
+
+        Args:
+            model_name: The name of the embedding model.
+            text: The embedded text.
+
+        Returns:
+            A (model name, SHA-256 of the normalised text) tuple.
+        """
+        normalised = " ".join(unicodedata.normalize("NFKC", text).split())
+        return model_name, hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+    def get_many(self, model_name: str, texts: Sequence[str]) -> List[Optional[CachedEmbedding]]:
+        """
+        Look up the embeddings of several texts.
+
+        Args:
+            model_name: The name of the embedding model.
+            texts: The texts to look up.
+
+        Returns:
+            One entry per text: the cached (indices, values) tuple, or None on a miss.
+        """
+        keys = [self.make_key(model_name, text) for text in texts]
+        results = [None] * len(keys)
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self._counters["memory_hits"] += 1
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing and self.db_path:
+            found = self._read_disk(model_name, [keys[i][1] for i in missing])
+            for i in missing:
+                if keys[i][1] in found:
+                    results[i] = found[keys[i][1]]
+                    self._remember(keys[i], results[i])
+                    self._counters["disk_hits"] += 1
+            self._touch(model_name, found)
+
+        self._counters["misses"] += sum(result is None for result in results)
+        return results
+
+    def put_many(self, model_name: str, texts: Sequence[str], embeddings: Sequence[CachedEmbedding]):
+        """
+        Store the embeddings of several texts in both tiers.
+
+        Args:
+            model_name: The name of the embedding model.
+            texts: The embedded texts.
+            embeddings: One (indices, values) tuple per text.
+        """
+        rows = {}
+        for text, (indices, values) in zip(texts, embeddings):
+            key = self.make_key(model_name, text)
+            entry = (
+                None if indices is None else np.asarray(indices, dtype=np.int32),
+                np.asarray(values, dtype=np.float32),
+            )
+            self._remember(key, entry)
+            rows[key[1]] = entry
+
+        if rows and self.db_path:
+            self._write_disk(model_name, rows)
+
+    def clear(self):
+        """Empty the in-memory tier and reset the counters. The disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+            for counter in self._counters:
+                self._counters[counter] = 0
+
+    def stats(self) -> dict:
+        """
+        Report the cache counters of this process.
+
+        Returns:
+            A dictionary with hit/miss counters, the hit ratio and the memory tier size.
+        """
+        hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_enabled": bool(self.db_path),
+        }
+
+    def _remember(self, key, entry):
+        """Insert an entry in the in-memory LRU, evicting the least recently used ones."""
+        if self.max_memory_entries <= 0:
+            return
+
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _connect(self, read_only: bool = False):
+        """Open the DuckDB file, creating the cache table on first use."""
+        if not self._table_ready:
+            db_parent_path = os.path.dirname(self.db_path)
+            if db_parent_path:
+                os.makedirs(db_parent_path, exist_ok=True)
+
+            with duckdb.connect(self.db_path) as conn:
+                conn.sql("""
+                    CREATE TABLE IF NOT EXISTS embedding_cache (
+                        model VARCHAR,
+                        text_hash VARCHAR,
+                        indices INTEGER[],
+                        vector FLOAT[],
+                        last_access TIMESTAMP DEFAULT current_timestamp,
+                        PRIMARY KEY (model, text_hash)
+                    )
+                """)
+            self._table_ready = True
+        return duckdb.connect(self.db_path, read_only=read_only)
+
+    def _read_disk(self, model_name: str, hashes: List[str]) -> dict:
+        """Fetch the embeddings stored on disk for the given hashes."""
+        try:
+            with self._disk_lock, self._connect(read_only=True) as conn:
+                rows = conn.execute(
+                    """
+                    SELECT text_hash, indices, vector FROM embedding_cache
+                    WHERE model = ? AND list_contains(?, text_hash)
+                    """,
+                    [model_name, hashes],
+                ).fetchall()
+        except Exception as e:
+            self._counters["disk_errors"] += 1
+            logger.warning(f"Embedding cache read failed, treating as miss: {str(e)}")
+            return {}
+
+        return {
+            text_hash: (
+                None if indices is None else np.asarray(indices, dtype=np.int32),
+                np.asarray(vector, dtype=np.float32),
+            )
+            for text_hash, indices, vector in rows
+        }
+
+    def _touch(self, model_name: str, hashes):
+        """Record disk hits, writing their access times once enough of them are pending."""
+        if not hashes:
+            return
+        with self._lock:
+            self._touched.setdefault(model_name, set()).update(hashes)
+            pending = sum(len(touched) for touched in self._touched.values())
+        if pending >= self.touch_batch:
+            self._write_disk(model_name, {})
+
+    def _take_touched(self) -> dict:
+        """Take the pending access time updates, which are dropped if they cannot be written."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        return touched
+
+    def _write_disk(self, model_name: str, rows: dict):
+        """Upsert embeddings and pending access times on disk, and evict the least recently used rows beyond the bound."""
+        touched = self._take_touched()
+        try:
+            with self._disk_lock, self._connect() as conn:
+                for touched_model, hashes in touched.items():
+                    conn.execute(
+                        """
+                        UPDATE embedding_cache SET last_access = current_timestamp
+                        WHERE model = ? AND list_contains(?, text_hash)
+                        """,
+                        [touched_model, list(hashes)],
+                    )
+                if not rows:
+                    return
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO embedding_cache (model, text_hash, indices, vector, last_access)
+                    VALUES (?, ?, ?, ?, current_timestamp)
+                    """,
+                    [
+                        [
+                            model_name,
+                            text_hash,
+                            None if indices is None else indices.tolist(),
+                            values.tolist(),
+                        ]
+                        for text_hash, (indices, values) in rows.items()
+                    ],
+                )
+                count = conn.sql("SELECT count(*) FROM embedding_cache").fetchone()[0]
+                if count > self.max_disk_entries:
+                    conn.execute(
+                        """
+                        DELETE FROM embedding_cache WHERE rowid IN (
+                            SELECT rowid FROM embedding_cache
+                            ORDER BY last_access DESC
+                            OFFSET ?
+                        )
+                        """,
+                        [self.max_disk_entries],
+                    )
+        except Exception as e:
+            self._counters["disk_errors"] += 1
+            logger.warning(f"Embedding cache write failed: {str(e)}")
+
+
+embedding_cache = EmbeddingCache(
+    db_path=os.environ.get("EMBEDDING_CACHE_PATH") or None,
+    max_memory_entries=int(os.environ.get("EMBEDDING_CACHE_SIZE", 2048)),
+    max_disk_entries=int(os.environ.get("EMBEDDING_CACHE_DISK_SIZE", 100_000)),
+)
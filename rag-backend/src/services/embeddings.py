@@ -1,15 +1,195 @@
+import asyncio
 import os
+import threading
 from google import genai
-from fastembed import SparseTextEmbedding
+from fastembed import SparseEmbedding, SparseTextEmbedding
+from src.services.embedding_cache import embedding_cache
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+SPARSE_MODEL_NAME = "Qdrant/bm25"
+DENSE_MODEL_NAME = "text-embedding-004"
 
-def get_dense_embeddings(documents):
+EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", 100))
+EMBEDDING_MAX_CONCURRENCY = int(os.environ.get("EMBEDDING_MAX_CONCURRENCY", 4))
+EMBEDDING_MAX_RETRIES = int(os.environ.get("EMBEDDING_MAX_RETRIES", 3))
+EMBEDDING_RETRY_BACKOFF = float(os.environ.get("EMBEDDING_RETRY_BACKOFF", 0.5))
+
+
+class EmbeddingModelRegistry:
+    """Process-wide owner of the embedding models.
+
+    The BM25 model and the Gemini client are built lazily on first use and reused
+    for the life of the process. The registry is emptied in forked children, so each
+    gunicorn worker builds its own instances instead of inheriting the master's.
+    """
+
+    def __init__(self):
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        """Drop every instance and counter. Also runs in the child after a fork."""
+        # A fresh lock: the parent's may have been held by another thread at fork time
+        self._lock = threading.Lock()
+        self._instances = {}
+        self._counters = {
+            "sparse": {"created": 0, "reused": 0},
+            "dense": {"created": 0, "reused": 0},
+        }
+
+    def _get(self, kind, factory):
+        """Return the instance registered under `kind`, building it on first use.
+
+        Args:
+            kind: The registry key ('sparse' or 'dense').
+            factory: A callable building the instance.
+
+        Returns:
+            The shared instance.
+        """
+        instance = self._instances.get(kind)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(kind)
+                if instance is None:
+                    logger.info(f"Initializing {kind} embedding model")
+                    instance = factory()
+                    self._instances[kind] = instance
+                    self._counters[kind]["created"] += 1
+                    return instance
+
+        self._counters[kind]["reused"] += 1
+        return instance
+
+    def get_sparse_model(self):
+        """Get the shared BM25 sparse embedding model.
+
+        Returns:
+            SparseTextEmbedding: The BM25 model.
+        """
+        return self._get(
+            "sparse",
+            lambda: SparseTextEmbedding(model_name=SPARSE_MODEL_NAME),
+        )
+
+    def get_dense_client(self):
+        """Get the shared Google GenAI client used for dense embeddings.
+
+        Returns:
+            genai.Client: The GenAI client.
+        """
+        return self._get(
+            "dense",
+            lambda: genai.Client(api_key=os.getenv('GOOGLE_API_KEY')),
+        )
+
+    def warmup(self):
+        """Build both models ahead of the first request.
+
+        Failures are logged rather than raised so that a worker still boots, and the
+        model is retried lazily on first use.
+        """
+        for kind, getter in (("sparse", self.get_sparse_model), ("dense", self.get_dense_client)):
+            try:
+                getter()
+            except Exception as e:
+                logger.error(f"Failed to pre-warm {kind} embedding model: {str(e)}", exc_info=True)
+
+    def reset(self):
+        """Drop every instance and counter, forcing the models to be rebuilt on next use."""
+        with self._lock:
+            self._reset()
+
+    def stats(self):
+        """Report how often each model was built and reused in this process.
+
+        Returns:
+            dict: The process id, and per model whether it is loaded with its counters.
+        """
+        return {
+            "pid": os.getpid(),
+            **{
+                kind: {"loaded": kind in self._instances, **counters}
+                for kind, counters in self._counters.items()
+            },
+        }
+
+
+embedding_registry = EmbeddingModelRegistry()
+
+
+async def _embed_dense_batch(client, batch, batch_number, semaphore):
+    """
+    Embed one batch of documents, retrying with exponential backoff on failure.
+
+    The blocking SDK call runs in a worker thread so the event loop stays free while
+    the request is in flight.
+
+    Args:
+        client (genai.Client): The GenAI client.
+        batch (list of str): The documents of this batch.
+        batch_number (int): The position of the batch, for logging.
+        semaphore (asyncio.Semaphore): Bounds the number of batches in flight.
+
+    Returns:
+        list of lists: The embeddings of the batch, in input order.
+
+    Raises:
+        Exception: The last error once all retries are exhausted.
+    """
+    async with semaphore:
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                logger.debug(f"Processing batch {batch_number} with {len(batch)} documents")
+                result = await asyncio.to_thread(
+                    client.models.embed_content,
+                    model=DENSE_MODEL_NAME,
+                    contents=batch,
+                )
+                return [e.values for e in result.embeddings]
+            except Exception as e:
+                if attempt == EMBEDDING_MAX_RETRIES:
+                    logger.error(f"Batch {batch_number} failed after {attempt + 1} attempts: {str(e)}")
+                    raise
+
+                delay = EMBEDDING_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Batch {batch_number} failed ({str(e)}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+async def _embed_dense(documents):
+    """
+    Embed documents with the remote model, in concurrent batches of `EMBEDDING_BATCH_SIZE`.
+
+    Args:
+        documents (list of str): The documents to embed.
+
+    Returns:
+        list of lists: The embeddings, in input order.
+    """
+    client = embedding_registry.get_dense_client()
+    batch_size = EMBEDDING_BATCH_SIZE
+    semaphore = asyncio.Semaphore(EMBEDDING_MAX_CONCURRENCY)
+
+    logger.debug(f"Processing {len(documents)} documents in batches of {batch_size}")
+    batches = await asyncio.gather(*[
+        _embed_dense_batch(client, documents[i:i+batch_size], i//batch_size + 1, semaphore)
+        for i in range(0, len(documents), batch_size)
+    ])
+
+    return [embedding for batch in batches for embedding in batch]
+
+
+async def get_dense_embeddings(documents):
     """
     Generate dense embeddings for the given documents using Google's embedding model.
 
+    Embeddings found in the embedding cache are reused. The others are sent in batches
+    of `EMBEDDING_BATCH_SIZE`, with at most `EMBEDDING_MAX_CONCURRENCY` batches in
+    flight at once, and then added to the cache.
+
     Args:
         documents (str or list of str): A single document or a list of documents to embed.
 
@@ -18,25 +198,29 @@ def get_dense_embeddings(documents):
         returns a single embedding. Otherwise, returns a list of embeddings.
     """
     logger.info("Generating dense embeddings")
-    client = genai.Client(api_key=os.getenv('GOOGLE_API_KEY'))
 
     if isinstance(documents, str):
         documents = [documents]
 
-    embeddings = []
-    batch_size = 100
+    if not embedding_cache.enabled:
+        embeddings = await _embed_dense(documents)
+    else:
+        cached = await asyncio.to_thread(embedding_cache.get_many, DENSE_MODEL_NAME, documents)
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        logger.debug(f"Found {len(documents) - len(missing)} of {len(documents)} dense embeddings in cache")
 
-    logger.debug(f"Processing {len(documents)} documents in batches of {batch_size}")
-    for i in range(0, len(documents), batch_size):
-        batch = documents[i:i+batch_size]
-        logger.debug(f"Processing batch {i//batch_size + 1} with {len(batch)} documents")
-
-        result = client.models.embed_content(
-            model="text-embedding-004",
-            contents=batch,
-        )
-
-        embeddings += [e.values for e in result.embeddings]
+        embeddings = [None if entry is None else entry[1].tolist() for entry in cached]
+        if missing:
+            missing_documents = [documents[i] for i in missing]
+            computed = await _embed_dense(missing_documents)
+            await asyncio.to_thread(
+                embedding_cache.put_many,
+                DENSE_MODEL_NAME,
+                missing_documents,
+                [(None, embedding) for embedding in computed],
+            )
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
 
     logger.debug(f"Returning {len(embeddings)} embeddings")
     logger.info("Dense embeddings generation complete")
@@ -48,6 +232,9 @@ def get_sparse_embeddings(documents):
     """
     Generate sparse embeddings for the given documents using a BM25 model.
 
+    Embeddings found in the embedding cache are reused, the others are computed and
+    added to the cache.
+
     Args:
         documents (str or list of str): A single document or a list of documents to embed.
 
@@ -56,13 +243,32 @@ def get_sparse_embeddings(documents):
         returns a single embedding. Otherwise, returns a list of embeddings.
     """
     logger.info("Generating sparse embeddings with BM25")
-    bm25_model = SparseTextEmbedding(model_name="Qdrant/bm25")
 
     if isinstance(documents, str):
         documents = [documents]
 
-    logger.debug(f"Processing {len(documents)} documents")
-    embeddings = list(bm25_model.embed(documents))
+    if not embedding_cache.enabled:
+        embeddings = list(embedding_registry.get_sparse_model().embed(documents))
+    else:
+        cached = embedding_cache.get_many(SPARSE_MODEL_NAME, documents)
+        missing = [i for i, entry in enumerate(cached) if entry is None]
+        logger.debug(f"Found {len(documents) - len(missing)} of {len(documents)} sparse embeddings in cache")
+
+        embeddings = [
+            None if entry is None else SparseEmbedding(indices=entry[0], values=entry[1])
+            for entry in cached
+        ]
+        if missing:
+            missing_documents = [documents[i] for i in missing]
+            logger.debug(f"Processing {len(missing_documents)} documents")
+            computed = list(embedding_registry.get_sparse_model().embed(missing_documents))
+            embedding_cache.put_many(
+                SPARSE_MODEL_NAME,
+                missing_documents,
+                [(embedding.indices, embedding.values) for embedding in computed],
+            )
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
 
     logger.debug(f"Returning {len(embeddings)} sparse embeddings")
     logger.info("Sparse embeddings generation complete")
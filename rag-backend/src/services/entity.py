@@ -1,25 +1,101 @@
+import asyncio
 import os
+import threading
+import time
 import duckdb
 from src.utils.logger import get_logger
 from src.baml_client.async_client import b
-from typing import Dict, List, Optional, Any
+from src.baml_client.types import Entity
+from src.services.llm_cache import llm_cache
+from src.services.entity_index import FuzzyEntityIndex
+from typing import Dict, Iterable, List, Optional, Any
 
 logger = get_logger(__name__)
 
 class EntityExtractor:
     """A class to handle entity extraction and matching operations."""
 
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, use_index: Optional[bool] = None):
         """
         Initialize the EntityExtractor.
 
         Args:
             db_path: Path to the DuckDB database file
+            use_index: Whether to match entities with the in-memory fuzzy index rather than
+                a SQL query per term. Defaults to the `ENTITY_FUZZY_INDEX` environment variable.
         """
         self.db_path = db_path or os.environ.get("DUCKDB_PATH", 'entities.db')
         self.entity_types = ['Game', 'Console', 'Publisher']
         self.similarity_threshold = 0.1
 
+        if use_index is None:
+            use_index = os.environ.get("ENTITY_FUZZY_INDEX", "true").lower() == "true"
+        self.use_index = use_index
+        self.index_refresh_interval = float(os.environ.get("ENTITY_INDEX_REFRESH_INTERVAL", 60))
+        self._index_lock = threading.Lock()
+        self._indexes = {entity_type: FuzzyEntityIndex() for entity_type in self.entity_types}
+        self._index_rowids = {entity_type: -1 for entity_type in self.entity_types}
+        self._index_refreshed_at = None
+
+    def refresh_index(self):
+        """
+        Load the entity names added to DuckDB since the last refresh into the fuzzy index.
+
+        The first call loads every name. Later calls only read the rows past the last
+        loaded rowid, which picks up the names inserted by other processes. The file is
+        opened read-only, so that the workers refreshing at the same time do not compete
+        for its lock. If the refresh fails, it is retried on the next lookup rather than
+        after `index_refresh_interval`, so the index does not stay empty or stale.
+        """
+        with self._index_lock:
+            if not os.path.exists(self.db_path):
+                # Nothing ingested yet
+                self._index_refreshed_at = time.monotonic()
+                return
+
+            try:
+                with duckdb.connect(self.db_path, read_only=True) as conn:
+                    for entity_type in self.entity_types:
+                        table_name = f"{entity_type.lower()}s"
+                        exists = conn.execute(
+                            "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?", [table_name]
+                        ).fetchone()[0]
+                        if not exists:
+                            continue
+
+                        rows = conn.execute(
+                            f"SELECT rowid, name FROM {table_name} WHERE rowid > ? ORDER BY rowid",
+                            [self._index_rowids[entity_type]],
+                        ).fetchall()
+                        if rows:
+                            added = self._indexes[entity_type].add(name for _, name in rows)
+                            self._index_rowids[entity_type] = rows[-1][0]
+                            logger.info(f"Loaded {added} {entity_type} entities in the fuzzy index")
+            except Exception as e:
+                logger.error(f"Error refreshing the entity index: {str(e)}", exc_info=True)
+                return
+            self._index_refreshed_at = time.monotonic()
+
+    def index_entities(self, entity_type: str, names: Iterable[str]):
+        """
+        Add newly inserted entity names to the fuzzy index of this process.
+
+        Args:
+            entity_type: The type of the entities.
+            names: The names inserted in DuckDB.
+        """
+        if entity_type in self._indexes:
+            with self._index_lock:
+                self._indexes[entity_type].add(names)
+
+    def _refresh_index_if_stale(self):
+        """Refresh the fuzzy index on first use, then every `index_refresh_interval` seconds."""
+        if (
+            self._index_refreshed_at is None
+            or time.monotonic() - self._index_refreshed_at > self.index_refresh_interval
+        ):
+            self.refresh_index()
+
     async def extract_entities(self, question: str) -> Optional[Dict[str, List[str]]]:
         """
         Extract entities from a given question.
@@ -37,7 +113,9 @@ class EntityExtractor:
         logger.info(f"Extracting entities from question: {question}")
 
         try:
-            raw_entities = await b.ExtractEntities(question)
+            raw_entities = await llm_cache.get_or_call(
+                "ExtractEntities", question, lambda: b.ExtractEntities(question), List[Entity]
+            )
 
             if not raw_entities:
                 logger.warning("No entities found in the question")
@@ -81,12 +159,18 @@ class EntityExtractor:
         """
         Match a list of entity terms against the database to find the closest matching entities.
 
+        With the fuzzy index, each term is looked up in memory. Otherwise all the terms are
+        resolved together by a single DuckDB query.
+
         Args:
             entities: A dictionary mapping entity types to lists of entity terms.
 
         Returns:
             A dictionary of matched entity terms grouped by entity type, or None if no matches are found.
         """
+        if not self.use_index:
+            return self._match_entities_sql(entities)
+
         matches = {}
         for entity_type, entity_list in entities.items():
             matched_entities = []
@@ -101,6 +185,94 @@ class EntityExtractor:
 
         return matches if matches else None
 
+    async def amatch_entities(self, entities: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Match entity terms in a worker thread, keeping the event loop free.
+
+        Args:
+            entities: A dictionary mapping entity types to lists of entity terms.
+
+        Returns:
+            A dictionary of matched entity terms grouped by entity type, or None if no matches are found.
+        """
+        return await asyncio.to_thread(self.match_entities, entities)
+
+    def _match_entities_sql(self, entities: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Resolve every term with a single DuckDB query.
+
+        The terms are joined with the names of the table of their type, and a window
+        function keeps the closest name of each term.
+
+        Args:
+            entities: A dictionary mapping entity types to lists of entity terms.
+
+        Returns:
+            A dictionary of matched entity terms grouped by entity type, or None if no matches are found.
+        """
+        terms = [
+            (entity_type, position, term)
+            for entity_type, entity_list in entities.items() if entity_type in self.entity_types
+            for position, term in enumerate(entity_list) if term
+        ]
+        if not terms:
+            return None
+
+        logger.info(f"Matching {len(terms)} entity terms")
+
+        try:
+            with duckdb.connect(self.db_path) as conn:
+                existing_tables = {
+                    row[0] for row in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()
+                }
+                # Table names come from entity_types, never from the input
+                names = " UNION ALL ".join(
+                    f"SELECT '{entity_type}' AS entity_type, name FROM {entity_type.lower()}s"
+                    for entity_type in {entity_type for entity_type, _, _ in terms}
+                    if f"{entity_type.lower()}s" in existing_tables
+                )
+                if not names:
+                    logger.warning("No entity table found")
+                    return None
+
+                values = ", ".join(["(?, ?, ?)"] * len(terms))
+                query = f"""
+                    WITH terms(entity_type, position, term) AS (VALUES {values}),
+                    names AS ({names}),
+                    distances AS (
+                        SELECT
+                            terms.entity_type,
+                            terms.position,
+                            names.name,
+                            levenshtein(LOWER(names.name), LOWER(terms.term))
+                                / GREATEST(LENGTH(names.name), LENGTH(terms.term)) AS distance
+                        FROM terms
+                        JOIN names ON names.entity_type = terms.entity_type
+                    )
+                    SELECT entity_type, position, name
+                    FROM distances
+                    WHERE distance < ?
+                    QUALIFY ROW_NUMBER() OVER (PARTITION BY entity_type, position ORDER BY distance, name) = 1
+                    ORDER BY entity_type, position
+                """
+                parameters = [value for term in terms for value in term] + [self.similarity_threshold]
+                rows = conn.execute(query, parameters).fetchall()
+
+        except Exception as e:
+            logger.error(f"Error matching entities: {str(e)}", exc_info=True)
+            return None
+
+        matches = {}
+        for entity_type, _, name in rows:
+            matches.setdefault(entity_type, []).append(name)
+
+        for entity_type, matched_entities in matches.items():
+            logger.info(f"Matched {len(matched_entities)} entities of type '{entity_type}'")
+
+        # Keep the order of the request
+        matches = {entity_type: matches[entity_type] for entity_type in entities if entity_type in matches}
+        return matches if matches else None
+
     def match_entity(self, term: str, entity_type: str) -> Optional[str]:
         """
         Match a given term to an entity in the database based on its type.
@@ -117,6 +289,27 @@ class EntityExtractor:
 
         logger.info(f"Matching entity: term='{term}', type='{entity_type}'")
 
+        if self.use_index:
+            return self._match_entity_index(term, entity_type)
+        return self._match_entity_sql(term, entity_type)
+
+    def _match_entity_index(self, term: str, entity_type: str) -> Optional[str]:
+        """Match a term with the in-memory fuzzy index."""
+        if entity_type not in self._indexes:
+            logger.warning(f"Unknown entity type '{entity_type}'")
+            return None
+
+        self._refresh_index_if_stale()
+        match = self._indexes[entity_type].match(term, self.similarity_threshold)
+
+        if match:
+            logger.info(f"Matched entity: {match[0]}")
+            return match[0]
+        logger.warning(f"No match found for term '{term}' in {entity_type}")
+        return None
+
+    def _match_entity_sql(self, term: str, entity_type: str) -> Optional[str]:
+        """Match a term with a Levenshtein scan of the entity table."""
         try:
             with duckdb.connect(self.db_path) as conn:
                 # Prepare statement to avoid SQL injection
@@ -0,0 +1,163 @@
+import math
+from collections import Counter, defaultdict
+from typing import Iterable, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Length of the n-grams indexed
+GRAM_SIZE = 3
+
+
+def levenshtein(a: bytes, b: bytes) -> int:
+    """
+    Compute the Levenshtein distance between two byte strings.
+
+    DuckDB's `levenshtein()` compares the UTF-8 bytes of its arguments, so the index
+    does the same to return the same distances as the SQL matching.
+
+    Args:
+        a: The first string, UTF-8 encoded.
+        b: The second string, UTF-8 encoded.
+
+    Returns:
+        The number of single byte insertions, deletions and substitutions turning a into b.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _grams(data: bytes) -> Counter:
+    """Count the n-grams of a byte string."""
+    return Counter(data[i:i + GRAM_SIZE] for i in range(len(data) - GRAM_SIZE + 1))
+
+
+class FuzzyEntityIndex:
+    """In-memory fuzzy index of the entity names of one type.
+
+    Names are indexed by their byte trigrams. A lookup only verifies, with a Levenshtein
+    computation, the names whose length and number of shared trigrams make a match
+    possible, instead of scanning the whole table.
+
+    Matching follows the SQL matching of `EntityExtractor`: a name matches when
+    `levenshtein(name, term) / max(length(name), length(term))` is below the threshold,
+    and the closest name wins.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Initialize the FuzzyEntityIndex.
+
+        Args:
+            names: The names to index.
+        """
+        self._names = []
+        self._known = set()
+        self._postings = defaultdict(list)
+        self._by_length = defaultdict(list)
+        self.add(names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, names: Iterable[str]) -> int:
+        """
+        Add names to the index. Names already indexed are skipped.
+
+        Args:
+            names: The names to add.
+
+        Returns:
+            The number of names added.
+        """
+        added = 0
+        for name in names:
+            if not name or name in self._known:
+                continue
+
+            data = name.lower().encode("utf-8")
+            name_id = len(self._names)
+            self._names.append((name, data, len(name)))
+            self._known.add(name)
+            self._by_length[len(data)].append(name_id)
+            for gram, count in _grams(data).items():
+                self._postings[gram].append((name_id, count))
+            added += 1
+
+        return added
+
+    def match(self, term: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the closest name to a term.
+
+        Args:
+            term: The term to match.
+            threshold: Names at a normalised distance greater or equal are not matches.
+
+        Returns:
+            A (name, distance) tuple for the closest name, or None if none matches. Ties
+            are broken by name.
+        """
+        if not term or not self._names:
+            return None
+
+        data = term.lower().encode("utf-8")
+        best = None
+        for name_id in self._candidates(data, threshold):
+            name, name_data, name_length = self._names[name_id]
+            distance = levenshtein(data, name_data) / max(name_length, len(term))
+            if distance < threshold and (best is None or (distance, name) < (best[1], best[0])):
+                best = (name, distance)
+
+        return best
+
+    def _candidates(self, data: bytes, threshold: float):
+        """
+        List the names which may be within the threshold of a term.
+
+        A match has at most `max_edits` edits: with `m` and `n` the byte lengths of the
+        term and the name, the distance is at least `|m - n|` and below
+        `threshold * max(m, n)`, which bounds it by `threshold * m / (1 - threshold)`.
+        Two strings within `k` edits share at least `max(m, n) - GRAM_SIZE + 1 - k * GRAM_SIZE`
+        trigrams, which discards most names without computing their distance.
+        """
+        if threshold >= 1:
+            return range(len(self._names))
+
+        max_edits = math.floor(threshold * len(data) / (1 - threshold))
+        lengths = range(max(len(data) - max_edits, 0), len(data) + max_edits + 1)
+
+        def min_shared(length):
+            return max(len(data), length) - GRAM_SIZE + 1 - max_edits * GRAM_SIZE
+
+        # Names too short to share enough trigrams are all verified
+        candidates = {
+            name_id
+            for length in lengths if min_shared(length) <= 0
+            for name_id in self._by_length.get(length, ())
+        }
+
+        shared = defaultdict(int)
+        for gram, count in _grams(data).items():
+            for name_id, name_count in self._postings.get(gram, ()):
+                shared[name_id] += min(count, name_count)
+
+        for name_id, count in shared.items():
+            length = len(self._names[name_id][1])
+            if length in lengths and count >= min_shared(length):
+                candidates.add(name_id)
+
+        return candidates
@@ -1,4 +1,7 @@
-import aiohttp
+import asyncio
+
+from src.services.context_budget import budget_context
+from src.services.http import GPU_SERVICE_URL, get_http_session
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -11,6 +14,9 @@ async def detect_hallucination(query, context, response):
     This function communicates with a specialized GPU service that analyzes whether
     the response contains information not supported by the context or query.
 
+    The context is first reduced to the sentences most relevant to the response, within
+    HALLUCINATION_CONTEXT_TOKENS (see `budget_context`).
+
     Args:
         query (str): The original user query that prompted the response
         context (str): The reference information that should support the response
@@ -25,25 +31,71 @@ async def detect_hallucination(query, context, response):
         Exception: If the GPU service returns a non-200 status code
     """
     logger.info("Starting hallucination detection")
+    context = await budget_context(response, context)
     logger.debug(f"Query length: {len(query)}, context length: {len(context)}, response length: {len(response)}")
 
-    async with aiohttp.ClientSession() as session:
-        logger.debug("Sending request to GPU service for hallucination detection")
-        async with session.post(
-            'http://gpu-service:5001/detect_hallucination',
-            json={
-                "query": query,
-                "context": context,
-                "response": response,
-            }
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                logger.error(f"GPU service hallucination detection failed: {error_text}")
-                raise Exception(f"GPU service hallucination detection failed: {error_text}")
-
-            result = await response.json()
-            logger.debug(f"Hallucination detection complete: score={result.get('hallucination_score', 'N/A')}")
-            logger.info("Hallucination detection completed successfully")
-
-            return result
+    session = await get_http_session()
+    logger.debug("Sending request to GPU service for hallucination detection")
+    async with session.post(
+        f"{GPU_SERVICE_URL}/detect_hallucination",
+        json={
+            "query": query,
+            "context": context,
+            "response": response,
+        }
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"GPU service hallucination detection failed: {error_text}")
+            raise Exception(f"GPU service hallucination detection failed: {error_text}")
+
+        result = await response.json()
+        logger.debug(f"Hallucination detection complete: score={result.get('hallucination_score', 'N/A')}")
+        logger.info("Hallucination detection completed successfully")
+
+        return result
+
+
+async def detect_hallucination_batch(items, timeout=None):
+    """
+    Detect hallucinations in several LLM responses with a single request to the GPU service.
+
+    The GPU service queues the items with the concurrent requests and checks them one at a
+    time, in order; each item that is not done within its time limit fails on its own.
+    Each context is first reduced as by `detect_hallucination`.
+
+    Args:
+        items (list): (query, context, response) tuples.
+        timeout (float, optional): Time limit of each item on the GPU service, in seconds.
+
+    Returns:
+        list: The detection result of each item, in order. The result of an item that
+            failed or timed out is a dictionary with an `error` message.
+
+    Raises:
+        Exception: If the GPU service returns a non-200 status code
+    """
+    logger.info(f"Starting hallucination detection of {len(items)} responses")
+
+    contexts = await asyncio.gather(*(budget_context(response, context) for _, context, response in items))
+    payload = {
+        "items": [
+            {"query": query, "context": context, "response": response}
+            for (query, _, response), context in zip(items, contexts)
+        ]
+    }
+    if timeout is not None:
+        payload["timeout"] = timeout
+
+    session = await get_http_session()
+    logger.debug("Sending batch request to GPU service for hallucination detection")
+    async with session.post(f"{GPU_SERVICE_URL}/detect_hallucination_batch", json=payload) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"GPU service batch hallucination detection failed: {error_text}")
+            raise Exception(f"GPU service batch hallucination detection failed: {error_text}")
+
+        result = await response.json()
+        logger.info("Batch hallucination detection completed successfully")
+
+        return result["results"]
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Optional
+from uuid import uuid4
+
+from src.services.hallucination import detect_hallucination
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+ERROR = "error"
+
+
+class HallucinationJobs:
+    """Background hallucination detection jobs and their bounded result store.
+
+    Jobs run on a thread pool, each in its own event loop, so the answer can be returned
+    before the detection is done. Job states are kept in an in-memory LRU and optionally
+    in a SQLite file shared by the gunicorn workers, so that a worker can answer a poll
+    for a job started by another. Unlike DuckDB, which lets a single process open the
+    file, SQLite in WAL mode lets every worker read and write it, writers waiting for
+    each other up to `busy_timeout`. Jobs older than the TTL are forgotten.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 1024,
+        ttl: float = 3600,
+        max_workers: int = 2,
+        busy_timeout: float = 5.0,
+    ):
+        """
+        Initialize the HallucinationJobs.
+
+        Args:
+            db_path: Path to the SQLite file backing the store, or None to keep it in memory only.
+            max_entries: Maximum number of jobs kept in memory and on disk.
+            ttl: Lifetime of a job, in seconds.
+            max_workers: Number of detections running at once in this process.
+            busy_timeout: Time to wait for a write of another worker to finish, in seconds.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self.busy_timeout = busy_timeout
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._table_ready = False
+        self._counters = {"submitted": 0, "done": 0, "errors": 0}
+
+    def submit(self, query: str, context: str, response: str) -> str:
+        """
+        Start the hallucination detection of a response in the background.
+
+        Args:
+            query: The original user query.
+            context: The reference information that should support the response.
+            response: The LLM-generated response to check.
+
+        Returns:
+            The id of the job, to poll with `get`.
+        """
+        job_id = str(uuid4())
+        self._store(job_id, {"job_id": job_id, "status": PENDING})
+        self._count("submitted")
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hallucination"
+                )
+            executor = self._executor
+
+        executor.submit(self._run, job_id, query, context, response)
+        logger.info(f"Submitted hallucination detection job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Get the state of a job.
+
+        Args:
+            job_id: The id returned by `submit`.
+
+        Returns:
+            A dictionary with the job id and its status (`pending`, `done` or `error`), plus
+            the detection `result` or the `error` message once finished. None if the job is
+            unknown or expired.
+        """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is not None:
+                stored_at, job = entry
+                if time.time() - stored_at <= self.ttl:
+                    self._jobs.move_to_end(job_id)
+                    return job
+                del self._jobs[job_id]
+
+        # The job may have been submitted by another worker
+        if self.db_path:
+            return self._read_disk(job_id)
+        return None
+
+    def wait(self, job_id: str, timeout: float, poll_interval: float = 0.2) -> Optional[dict]:
+        """
+        Wait until a job is finished.
+
+        Args:
+            job_id: The id returned by `submit`.
+            timeout: Maximum time to wait, in seconds.
+            poll_interval: Time between two lookups, in seconds.
+
+        Returns:
+            The state of the job, still pending if the timeout expired, or None if unknown.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] != PENDING or time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def stats(self) -> dict:
+        """
+        Report the job counters of this process.
+
+        Returns:
+            A dictionary with the submitted, finished and failed job counters, and the
+            number of jobs in memory.
+        """
+        return {
+            **self._counters,
+            "memory_entries": len(self._jobs),
+            "max_workers": self.max_workers,
+            "disk_enabled": bool(self.db_path),
+        }
+
+    def _run(self, job_id, query, context, response):
+        """Run a detection in a new event loop and store its outcome."""
+        try:
+            result = asyncio.run(detect_hallucination(query, context, response))
+        except Exception as e:
+            logger.error(f"Hallucination detection job {job_id} failed: {str(e)}")
+            self._store(job_id, {"job_id": job_id, "status": ERROR, "error": str(e)})
+            self._count("errors")
+            return
+
+        self._store(job_id, {"job_id": job_id, "status": DONE, "result": result})
+        self._count("done")
+        logger.info(f"Hallucination detection job {job_id} done")
+
+    def _count(self, counter):
+        """Increment a counter."""
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _store(self, job_id, job):
+        """Store the state of a job on disk and in memory, evicting the oldest jobs."""
+        # On disk first, so that other workers see the result once it is visible here
+        if self.db_path:
+            self._write_disk(job_id, job)
+
+        with self._lock:
+            self._jobs[job_id] = (time.time(), job)
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_entries:
+                self._jobs.popitem(last=False)
+
+    def _connect(self):
+        """Open the SQLite file, creating the jobs table in WAL mode on first use."""
+        db_parent_path = os.path.dirname(self.db_path)
+        if db_parent_path:
+            os.makedirs(db_parent_path, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        if not self._table_ready:
+            # The journal mode is stored in the file, for every worker opening it
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hallucination_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    job TEXT,
+                    updated_at REAL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS hallucination_jobs_updated_at ON hallucination_jobs (updated_at)"
+            )
+            conn.commit()
+            self._table_ready = True
+        return conn
+
+    def _read_disk(self, job_id):
+        """Fetch an unexpired job stored on disk."""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT job FROM hallucination_jobs WHERE job_id = ? AND updated_at >= ?",
+                    (job_id, time.time() - self.ttl),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Hallucination job read failed: {str(e)}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    def _write_disk(self, job_id, job):
+        """Store a job on disk, dropping expired and oldest rows beyond the bound."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO hallucination_jobs VALUES (?, ?, ?)",
+                    (job_id, json.dumps(job), time.time()),
+                )
+                conn.execute("DELETE FROM hallucination_jobs WHERE updated_at < ?", (time.time() - self.ttl,))
+                conn.execute(
+                    """
+                    DELETE FROM hallucination_jobs WHERE job_id IN (
+                        SELECT job_id FROM hallucination_jobs
+                        ORDER BY updated_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Hallucination job write failed: {str(e)}")
+
+
+hallucination_jobs = HallucinationJobs(
+    db_path=os.environ.get("HALLUCINATION_JOBS_PATH") or None,
+    max_entries=int(os.environ.get("HALLUCINATION_JOBS_SIZE", 1024)),
+    ttl=float(os.environ.get("HALLUCINATION_JOBS_TTL", 3600)),
+    max_workers=int(os.environ.get("HALLUCINATION_WORKERS", 2)),
+)
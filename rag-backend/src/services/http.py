@@ -0,0 +1,115 @@
+import asyncio
+import os
+import threading
+import weakref
+import aiohttp
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+GPU_SERVICE_URL = os.environ.get("GPU_SERVICE_URL", "http://gpu-service:5001")
+
+
+class HttpSessionPool:
+    """Pool holding one aiohttp ClientSession per event loop.
+
+    Calls to the GPU service running on the same event loop share the session and its
+    keep-alive connections instead of opening a session per call. A session cannot be
+    shared across event loops, hence one session per loop. Each session is closed by a
+    companion task when its loop shuts down (`asyncio.run` cancels pending tasks before
+    closing the loop), or explicitly with `close`.
+    """
+
+    def __init__(self):
+        self._sessions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "reused": 0, "closed": 0}
+
+    def _create_session(self):
+        """Build a session configured from the environment."""
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=int(os.environ.get("GPU_SERVICE_MAX_CONNECTIONS", 100)),
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=float(os.environ.get("GPU_SERVICE_TIMEOUT", 300)),
+            ),
+        )
+
+    def get(self):
+        """Get the session of the running event loop, creating it on first use.
+
+        Returns:
+            aiohttp.ClientSession: The session bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._sessions.get(loop)
+            if entry is not None:
+                self._counters["reused"] += 1
+                return entry[0]
+
+            for stale_loop in [l for l in self._sessions if l.is_closed()]:
+                del self._sessions[stale_loop]
+
+            session = self._create_session()
+            closer = loop.create_task(self._close_on_shutdown(session))
+            self._sessions[loop] = (session, closer)
+            self._counters["created"] += 1
+            logger.debug("Created HTTP session")
+            return session
+
+    async def _close_on_shutdown(self, session):
+        """Wait until cancelled, then close the session."""
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            await self._close_session(session)
+            raise
+
+    async def _close_session(self, session):
+        """Close a session once."""
+        if not session.closed:
+            await session.close()
+            self._counters["closed"] += 1
+            logger.debug("Closed HTTP session")
+
+    async def close(self):
+        """Close the session of the running event loop, if any."""
+        with self._lock:
+            entry = self._sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            session, closer = entry
+            closer.cancel()
+            await self._close_session(session)
+
+    def stats(self):
+        """Report the pool usage of this process.
+
+        Returns:
+            dict: Session creation, reuse and close counters, and the number of open sessions.
+        """
+        return {
+            **self._counters,
+            "active": len(self._sessions),
+        }
+
+
+http_pool = HttpSessionPool()
+
+
+async def get_http_session():
+    """Get the pooled aiohttp ClientSession of the current event loop.
+
+    Returns:
+        aiohttp.ClientSession: The shared session.
+    """
+    return http_pool.get()
+
+
+async def close_http_session():
+    """Close the pooled aiohttp ClientSession of the current event loop.
+
+    Meant to be called on shutdown, before the event loop is closed.
+    """
+    await http_pool.close()
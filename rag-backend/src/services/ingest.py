@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List, Dict, Any
 from uuid import uuid4
@@ -9,11 +10,13 @@ from src.models.document import Document, SparseVector
 from src.services.entity import entity_extractor
 from src.services.embeddings import get_dense_embeddings, get_sparse_embeddings
 from src.services.qdrant import upsert_articles
+from src.services.chunking import sentence_offsets
 
 
 logger = get_logger(__name__)
 
-COLLECTION_NAME = "articles"
+# Whether to store the sentence boundaries of the articles, so that summarization skips segmentation
+INGEST_SENTENCE_OFFSETS = os.environ.get("INGEST_SENTENCE_OFFSETS", "false").lower() == "true"
 
 
 async def ingest_documents(documentsRequest: List[IngestRequest]) -> Dict[str, Any]:
@@ -32,11 +35,12 @@ async def ingest_documents(documentsRequest: List[IngestRequest]) -> Dict[str, A
         str(uuid4()) for _ in range(len(documentsRequest))
     ]
 
-    dense_embeddings = get_dense_embeddings(
-        [doc.text for doc in documentsRequest]
-    )
-    sparse_embeddings = get_sparse_embeddings(
-        [doc.text for doc in documentsRequest]
+    # BM25 runs in a worker thread, so that it does not block the event loop
+    # while the dense embedding request is in flight
+    texts = [doc.text for doc in documentsRequest]
+    dense_embeddings, sparse_embeddings = await asyncio.gather(
+        get_dense_embeddings(texts),
+        asyncio.to_thread(get_sparse_embeddings, texts),
     )
     logger.debug(f"Generated dense and sparse embeddings for batch")
 
@@ -46,6 +50,13 @@ async def ingest_documents(documentsRequest: List[IngestRequest]) -> Dict[str, A
     ]
     logger.debug(f"Extracted entities for batch")
 
+    offsets = [None] * len(documentsRequest)
+    if INGEST_SENTENCE_OFFSETS:
+        offsets = await asyncio.to_thread(
+            lambda: [sentence_offsets(doc.text) for doc in documentsRequest]
+        )
+        logger.debug(f"Computed sentence offsets for batch")
+
     documents = [
         Document(
             doc_id=doc_ids[i],
@@ -55,12 +66,13 @@ async def ingest_documents(documentsRequest: List[IngestRequest]) -> Dict[str, A
                 indices = sparse_embeddings[i].indices,
                 values = sparse_embeddings[i].values
             ),
-            entities=entities[i]
+            entities=entities[i],
+            sentence_offsets=offsets[i],
         )
         for i in range(len(documentsRequest))
     ]
 
-    insert_entities(entities)
+    await asyncio.to_thread(insert_entities, entities)
     logger.debug(f"Inserted entities into DuckDB")
     await upsert_articles(documents)
     logger.debug(f"Upserted documents to Qdrant")
@@ -138,3 +150,5 @@ def insert_entities(entities: List[dict]):
 
             con.commit()
             logger.info(f"Committed {entity_type} entities")
+
+            entity_extractor.index_entities(entity_type, entities_batch[entity_type])
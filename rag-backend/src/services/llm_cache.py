@@ -0,0 +1,258 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LLMCache:
+    """TTL + LRU cache of LLM function results keyed by (function name, normalised text).
+
+    Results are stored as JSON, in an in-memory LRU and optionally in a SQLite file so
+    that a restarted worker keeps its hit rate. As for the hallucination jobs, the file
+    is in WAL mode: every gunicorn worker reads it without blocking the others, and
+    writers wait for each other up to `busy_timeout`. Entries older than the TTL are
+    ignored. As with the embedding cache, a disk error is logged and treated as a miss.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: int = 1024,
+        ttl: float = 86400,
+        busy_timeout: float = 5.0,
+    ):
+        """
+        Initialize the LLMCache.
+
+        Args:
+            db_path: Path to the SQLite file backing the cache, or None to keep it in memory only.
+            max_entries: Maximum number of results kept in memory and on disk (0 disables the cache).
+            ttl: Lifetime of a result, in seconds.
+            busy_timeout: Time to wait for a write of another worker to finish, in seconds.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.busy_timeout = busy_timeout
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._counters = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are cached."""
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(function_name: str, text: str) -> Tuple[str, str]:
+        """
+        Build the cache key of a text.
+
+        Texts differing only by case, Unicode form or whitespace share the same key.
+
+        Args:
+            function_name: The name of the LLM function.
+            text: The function input.
+
+        Returns:
+            A (function name, SHA-256 of the normalised text) tuple.
+        """
+        normalised = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+        return function_name, hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+    async def get_or_call(
+        self,
+        function_name: str,
+        text: str,
+        call: Callable[[], Awaitable[Any]],
+        result_type: Any,
+    ) -> Any:
+        """
+        Return the cached result of an LLM function, calling it on a miss.
+
+        Args:
+            function_name: The name of the LLM function.
+            text: The function input, used as the cache key.
+            call: A callable returning the awaitable function call.
+            result_type: The type of the result, used to serialise it.
+
+        Returns:
+            The function result, from the cache or from the call.
+        """
+        if not self.enabled:
+            return await call()
+
+        adapter = TypeAdapter(result_type)
+        key = self.make_key(function_name, text)
+
+        data = self._get_memory(key)
+        if data is None and self.db_path:
+            stored = await asyncio.to_thread(self._read_disk, key)
+            if stored is not None:
+                data, stored_at = stored
+                self._remember(key, data, stored_at)
+                self._count(function_name, "disk_hits")
+        elif data is not None:
+            self._count(function_name, "memory_hits")
+
+        if data is not None:
+            logger.debug(f"LLM cache hit for {function_name}")
+            return adapter.validate_python(data)
+
+        self._count(function_name, "misses")
+        result = await call()
+
+        try:
+            data = adapter.dump_python(result, mode="json")
+        except Exception as e:
+            logger.warning(f"Could not cache {function_name} result: {str(e)}")
+            return result
+
+        self._remember(key, data)
+        if self.db_path:
+            await asyncio.to_thread(self._write_disk, key, data)
+        return result
+
+    def clear(self):
+        """Empty the in-memory tier and reset the counters. The disk tier is kept."""
+        with self._lock:
+            self._memory.clear()
+            self._counters = {}
+
+    def stats(self) -> dict:
+        """
+        Report the cache counters of this process.
+
+        Returns:
+            A dictionary with hit/miss counters and the hit ratio per function, and the
+            memory tier size.
+        """
+        functions = {}
+        for function_name, counters in self._counters.items():
+            hits = counters["memory_hits"] + counters["disk_hits"]
+            lookups = hits + counters["misses"]
+            functions[function_name] = {
+                **counters,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+            }
+
+        return {
+            "functions": functions,
+            "memory_entries": len(self._memory),
+            "disk_enabled": bool(self.db_path),
+        }
+
+    def _count(self, function_name, counter):
+        """Increment a counter of a function."""
+        with self._lock:
+            counters = self._counters.setdefault(
+                function_name, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_errors": 0}
+            )
+            counters[counter] += 1
+
+    def _get_memory(self, key):
+        """Look up an unexpired entry in the in-memory LRU."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+
+            stored_at, data = entry
+            if time.time() - stored_at > self.ttl:
+                del self._memory[key]
+                return None
+
+            self._memory.move_to_end(key)
+            return data
+
+    def _remember(self, key, data, stored_at=None):
+        """Insert an entry in the in-memory LRU, evicting the least recently used ones."""
+        with self._lock:
+            self._memory[key] = (stored_at or time.time(), data)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _connect(self):
+        """Open the SQLite file, creating the cache table in WAL mode on first use."""
+        db_parent_path = os.path.dirname(self.db_path)
+        if db_parent_path:
+            os.makedirs(db_parent_path, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+        if not self._table_ready:
+            # The journal mode is stored in the file, for every worker opening it
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    function_name TEXT,
+                    text_hash TEXT,
+                    result TEXT,
+                    created_at REAL,
+                    PRIMARY KEY (function_name, text_hash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_created_at ON llm_cache (created_at)")
+            conn.commit()
+            self._table_ready = True
+        return conn
+
+    def _read_disk(self, key):
+        """Fetch an unexpired result stored on disk, with its creation time."""
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT result, created_at FROM llm_cache WHERE function_name = ? AND text_hash = ? AND created_at >= ?",
+                    (key[0], key[1], time.time() - self.ttl),
+                ).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            self._count(key[0], "disk_errors")
+            logger.warning(f"LLM cache read failed, treating as miss: {str(e)}")
+            return None
+
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _write_disk(self, key, data):
+        """Store a result on disk, dropping expired and least recent rows beyond the bound."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], json.dumps(data), time.time()),
+                )
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+                conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE rowid IN (
+                        SELECT rowid FROM llm_cache
+                        ORDER BY created_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_entries,),
+                )
+        except (OSError, sqlite3.Error) as e:
+            self._count(key[0], "disk_errors")
+            logger.warning(f"LLM cache write failed: {str(e)}")
+
+
+llm_cache = LLMCache(
+    db_path=os.environ.get("LLM_CACHE_PATH") or None,
+    max_entries=int(os.environ.get("LLM_CACHE_SIZE", 1024)),
+    ttl=float(os.environ.get("LLM_CACHE_TTL", 86400)),
+)
+
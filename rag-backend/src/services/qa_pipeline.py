@@ -1,10 +1,162 @@
+import asyncio
+import os
+
 from src.baml_client.async_client import b
+from src.baml_client.types import Question
+from src.services.llm_cache import llm_cache
 from src.utils.logger import get_logger
-from src.services.search import search
-from src.services.chunking import summarize
+from src.services.search import resolve_entities, search
+from src.services.stages import StageGraph
+from src.services.chunking import split_sentences, summarize, summarize_batch, without_sentence_offsets
 
 logger = get_logger(__name__)
 
+# Maximum number of summarization requests in flight per question
+SUMMARIZE_CONCURRENCY = int(os.environ.get("SUMMARIZE_CONCURRENCY", 4))
+# Whether to summarize all the documents of a question in a single GPU service request
+GPU_SUMMARIZE_BATCH = os.environ.get("GPU_SUMMARIZE_BATCH", "false").lower() == "true"
+
+
+async def expand_query(question):
+    """
+    Expands a question with the LLM, through the LLM result cache.
+
+    Args:
+        question (str): The input question.
+
+    Returns:
+        Question: The expanded question and its language.
+    """
+    return await llm_cache.get_or_call(
+        "QueryExpansion", question, lambda: b.QueryExpansion(question), Question
+    )
+
+
+async def summarize_documents(question, docs, chunk_size, concurrency=None, batch=None):
+    """
+    Summarizes, in place, the documents longer than the chunk size.
+
+    The documents are sent in a single batch request, or in concurrent requests, at
+    most `concurrency` at a time. Documents ingested with their sentence offsets are sent
+    already split; the GPU service splits the others. The offsets are removed from all
+    the documents, which are then returned to the client.
+
+    Args:
+        question (str): The question guiding the summarization.
+        docs (list): The documents, as dictionaries with a "text" key and an optional
+            "sentence_offsets" key.
+        chunk_size (int): Documents longer than this number of characters are summarized.
+        concurrency (int, optional): Maximum number of requests in flight. Defaults to
+            SUMMARIZE_CONCURRENCY.
+        batch (bool, optional): Whether to send a single batch request. Defaults to
+            GPU_SUMMARIZE_BATCH.
+    """
+    # The offsets no longer apply once the text is replaced by its summary
+    offsets = [doc.pop("sentence_offsets", None) for doc in docs]
+    long_docs = [doc for doc in docs if len(doc["text"]) > chunk_size]
+    if not long_docs:
+        return
+
+    if batch is None:
+        batch = GPU_SUMMARIZE_BATCH
+
+    sentences = [
+        split_sentences(doc["text"], doc_offsets) if doc_offsets else None
+        for doc, doc_offsets in zip(docs, offsets)
+        if len(doc["text"]) > chunk_size
+    ]
+
+    logger.debug(f"Summarizing {len(long_docs)} documents exceeding chunk size {chunk_size}")
+    if batch:
+        summaries = await summarize_batch(question, [doc["text"] for doc in long_docs], sentences=sentences)
+        for doc, summary in zip(long_docs, summaries):
+            doc["text"] = summary
+        return
+
+    semaphore = asyncio.Semaphore(concurrency or SUMMARIZE_CONCURRENCY)
+
+    async def summarize_doc(doc, doc_sentences):
+        async with semaphore:
+            doc["text"] = await summarize(question, doc["text"], sentences=doc_sentences)
+            logger.debug(f"Document summarized to {len(doc['text'])} characters")
+
+    await asyncio.gather(*(summarize_doc(doc, doc_sentences) for doc, doc_sentences in zip(long_docs, sentences)))
+
+
+async def retrieve_parallel(question, method, k, filter_by_entity, do_rerank):
+    """
+    Expands the question and retrieves documents, running independent stages concurrently.
+
+    Entity extraction runs on the raw question while the question is expanded, instead of
+    on the expanded question afterwards.
+
+    Args:
+        question (str): The input question.
+        method (str): The search method.
+        k (int): The number of documents to retrieve.
+        filter_by_entity (bool): Whether to filter results by entity.
+        do_rerank (bool): Whether to rerank the search results.
+
+    Returns:
+        tuple: The expanded question and the retrieved documents.
+    """
+    async def search_stage(expansion, entities=None):
+        return await search(
+            expansion.question,
+            method=method,
+            k=k,
+            do_rerank=do_rerank,
+            entities=entities,
+        )
+
+    graph = StageGraph()
+    graph.add("expansion", lambda: expand_query(question))
+    search_dependencies = ["expansion"]
+    if filter_by_entity:
+        graph.add("entities", lambda: resolve_entities(question))
+        search_dependencies.append("entities")
+    graph.add("search", search_stage, depends_on=search_dependencies)
+
+    results = await graph.run()
+    logger.info(f"Retrieval stage timings: {graph.timings}")
+    return results["expansion"], results["search"]
+
+
+async def retrieve(question, method, k, filter_by_entity, do_rerank, parallel_stages):
+    """
+    Expands the question and retrieves the documents answering it.
+
+    Args:
+        question (str): The input question.
+        method (str): The search method.
+        k (int): The number of documents to retrieve.
+        filter_by_entity (bool): Whether to filter results by entity.
+        do_rerank (bool): Whether to rerank the search results.
+        parallel_stages (bool): Whether to run the independent stages concurrently
+            (see `retrieve_parallel`).
+
+    Returns:
+        tuple: The expanded question and the retrieved documents.
+    """
+    if parallel_stages:
+        logger.info(f"Expanding and searching concurrently with method={method}, k={k}")
+        query, docs = await retrieve_parallel(question, method, k, filter_by_entity, do_rerank)
+        logger.debug(f"Expanded query: {query}")
+    else:
+        query = await expand_query(question)
+        logger.debug(f"Expanded query: {query}")
+
+        logger.info(f"Searching with method={method}, k={k}")
+        docs = await search(
+            query.question,
+            method=method,
+            k=k,
+            filter_by_entity=filter_by_entity,
+            do_rerank=do_rerank,
+        )
+    logger.debug(f"Search returned {len(docs)} documents")
+    return query, docs
+
 
 async def qa_pipeline(
     question,
@@ -12,7 +164,8 @@ async def qa_pipeline(
     k=5,
     filter_by_entity=False,
     do_rerank=False,
-    chunk_size=1000
+    chunk_size=1000,
+    parallel_stages=False,
 ):
     """
     Executes a question-answering pipeline using a combination of search, summarization, and question-answering.
@@ -24,6 +177,8 @@ async def qa_pipeline(
         filter_by_entity (bool, optional): Whether to filter results by entity. Defaults to False.
         do_rerank (bool, optional): Whether to rerank the search results. Defaults to False.
         chunk_size (int, optional): The maximum size of text chunks for summarization. Defaults to 1000.
+        parallel_stages (bool, optional): Whether to extract entities from the raw question
+            concurrently with the query expansion (see `retrieve_parallel`). Defaults to False.
 
     Returns:
         str: The final answer to the input question.
@@ -33,24 +188,9 @@ async def qa_pipeline(
     """
     logger.info(f"Starting QA pipeline with question: '{question}', method={method}")
 
-    query = await b.QueryExpansion(question)
-    logger.debug(f"Expanded query: {query}")
+    query, docs = await retrieve(question, method, k, filter_by_entity, do_rerank, parallel_stages)
 
-    logger.info(f"Searching with method={method}, k={k}")
-    docs = await search(
-        query.question,
-        method=method,
-        k=k,
-        filter_by_entity=filter_by_entity,
-        do_rerank=do_rerank,
-    )
-    logger.debug(f"Search returned {len(docs)} documents")
-
-    for doc in docs:
-        if len(doc["text"]) > chunk_size:
-            logger.debug(f"Document exceeds chunk size ({len(doc['text'])} > {chunk_size}), summarizing")
-            doc["text"] = await summarize(query.question, doc["text"])
-            logger.debug(f"Document summarized to {len(doc['text'])} characters")
+    await summarize_documents(query.question, docs, chunk_size)
 
     docs_str = [doc['text'] for doc in docs]
 
@@ -64,3 +204,55 @@ async def qa_pipeline(
         "answer": answer,
         "docs": docs,
     }
+
+
+async def qa_pipeline_stream(
+    question,
+    method="hybrid",
+    k=5,
+    filter_by_entity=False,
+    do_rerank=False,
+    chunk_size=1000,
+    parallel_stages=False,
+):
+    """
+    Executes the question-answering pipeline, yielding its results as soon as they are available.
+
+    Takes the same arguments as `qa_pipeline`. Yields (event, data) tuples:
+
+    - ("docs", documents): the retrieved documents, before summarization.
+    - ("token", text): the next part of the answer, as generated by the LLM.
+    - ("answer", {"answer": ..., "docs": ...}): the complete answer and the documents it
+      is based on, as returned by `qa_pipeline`.
+
+    Raises:
+        Exception: If any error occurs during the pipeline execution.
+    """
+    logger.info(f"Starting streaming QA pipeline with question: '{question}', method={method}")
+
+    query, docs = await retrieve(question, method, k, filter_by_entity, do_rerank, parallel_stages)
+    yield "docs", [without_sentence_offsets(doc) for doc in docs]
+
+    await summarize_documents(query.question, docs, chunk_size)
+
+    docs_str = [doc['text'] for doc in docs]
+
+    logger.info("Streaming answer from LLM")
+    stream = b.stream.AskQuestion(question, docs_str, query.language)
+    streamed = ""
+    async for partial in stream:
+        # Partial answers hold the whole text generated so far
+        if partial.answer and partial.answer.startswith(streamed) and len(partial.answer) > len(streamed):
+            yield "token", partial.answer[len(streamed):]
+            streamed = partial.answer
+
+    answer = (await stream.get_final_response()).answer
+    if answer.startswith(streamed) and len(answer) > len(streamed):
+        yield "token", answer[len(streamed):]
+    logger.debug("LLM returned answer")
+
+    logger.info("Streaming QA pipeline completed successfully")
+    yield "answer", {
+        "answer": answer,
+        "docs": docs,
+    }
@@ -1,60 +1,247 @@
+import asyncio
 import os
+import threading
+import weakref
+import httpx
 from qdrant_client import AsyncQdrantClient, models
+from src.services.collections import ensure_collection, get_alias_target
 from src.utils.logger import get_logger
 from src.models.document import Document
-from typing import List, Union
+from typing import List, Optional, Union
 
 logger = get_logger(__name__)
 
 COLLECTION_NAME = os.environ.get("QDRANT_COLLECTION", "articles")
 
 
+class CollectionRouter:
+    """Routes searches and writes to their Qdrant collection.
+
+    Searches read from `read`, a collection or an alias. Writes go to `write`, which
+    defaults to the same name; pointing it to another collection lets a new collection
+    be filled offline while searches keep reading the current one, until the alias is
+    swapped (see `src.services.collections`).
+    """
+
+    def __init__(self, read, write=None):
+        """
+        Args:
+            read: The collection or alias searched.
+            write: The collection or alias written to. Defaults to `read`.
+        """
+        self.read = read
+        self.write = write or read
+
+    async def resolve(self, qdrant_client, name):
+        """Resolve a name to the collection it designates.
+
+        Args:
+            qdrant_client: The Qdrant client.
+            name: A collection or alias name.
+
+        Returns:
+            str: The target collection if `name` is an alias, `name` otherwise.
+        """
+        return await get_alias_target(qdrant_client, name) or name
+
+
+collection_router = CollectionRouter(
+    read=COLLECTION_NAME,
+    write=os.environ.get("QDRANT_WRITE_COLLECTION"),
+)
+
+
+class QdrantClientPool:
+    """Pool holding one AsyncQdrantClient per event loop.
+
+    Clients keep their HTTP connections alive, so every search and upsert running on
+    the same event loop reuses them instead of opening new ones. A client cannot be
+    shared across event loops, hence one client per loop. As for the HTTP sessions of
+    the GPU service, each client is closed by a companion task when its loop shuts down
+    (`asyncio.run` cancels pending tasks before closing the loop), or explicitly with
+    `close`, so that the event loop of each Flask request does not leak a connection pool.
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "reused": 0, "closed": 0}
+
+    def _create_client(self):
+        """Build a client configured from the environment."""
+        host = os.environ.get("QDRANT_HOST", "http://localhost:6333")
+        prefer_grpc = os.environ.get("QDRANT_PREFER_GRPC", "false").lower() == "true"
+        logger.debug(f"Creating Qdrant client with host: {host}, prefer_grpc={prefer_grpc}")
+        return AsyncQdrantClient(
+            host,
+            prefer_grpc=prefer_grpc,
+            grpc_port=int(os.environ.get("QDRANT_GRPC_PORT", 6334)),
+            limits=httpx.Limits(
+                max_connections=int(os.environ.get("QDRANT_MAX_CONNECTIONS", 100)),
+                max_keepalive_connections=int(os.environ.get("QDRANT_MAX_KEEPALIVE_CONNECTIONS", 20)),
+                keepalive_expiry=float(os.environ.get("QDRANT_KEEPALIVE_EXPIRY", 30)),
+            ),
+        )
+
+    def get(self):
+        """Get the client of the running event loop, creating it on first use.
+
+        Returns:
+            AsyncQdrantClient: The client bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._clients.get(loop)
+            if entry is not None:
+                self._counters["reused"] += 1
+                return entry[0]
+
+            for stale_loop in [l for l in self._clients if l.is_closed()]:
+                del self._clients[stale_loop]
+
+            client = self._create_client()
+            closer = loop.create_task(self._close_on_shutdown(client))
+            self._clients[loop] = (client, closer)
+            self._counters["created"] += 1
+            return client
+
+    async def _close_on_shutdown(self, client):
+        """Wait until cancelled, then close the client unless `close` already did."""
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                entry = self._clients.get(loop)
+                pooled = entry is not None and entry[0] is client
+                if pooled:
+                    del self._clients[loop]
+            if pooled:
+                await self._close_client(client)
+            raise
+
+    async def _close_client(self, client):
+        """Close a client."""
+        await client.close()
+        self._counters["closed"] += 1
+        logger.debug("Closed Qdrant client")
+
+    async def close(self):
+        """Close the client of the running event loop, if any."""
+        with self._lock:
+            entry = self._clients.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            client, closer = entry
+            closer.cancel()
+            await self._close_client(client)
+
+    def stats(self):
+        """Report the pool usage of this process.
+
+        Returns:
+            dict: Client creation, reuse and close counters, and the number of open clients.
+        """
+        return {
+            **self._counters,
+            "active": len(self._clients),
+        }
+
+
+qdrant_pool = QdrantClientPool()
+
+
 async def get_qdrant_client():
-    """Get or create an AsyncQdrantClient with the current event loop.
+    """Get the pooled AsyncQdrantClient of the current event loop.
 
     Returns:
         AsyncQdrantClient: An instance of the Qdrant client.
     """
-    host = os.environ.get("QDRANT_HOST", "http://localhost:6333")
-    logger.debug(f"Creating Qdrant client with host: {host}")
-    return AsyncQdrantClient(host)
+    return qdrant_pool.get()
+
+
+async def close_qdrant_client():
+    """Close the pooled AsyncQdrantClient of the current event loop.
+
+    Meant to be called on shutdown, before the event loop is closed.
+    """
+    await qdrant_pool.close()
+
+
+# Write collections known to exist in this process, so that the check is done once
+_ensured_collections = set()
+
+
+def forget_ensured_collections():
+    """Forget which collections were checked, forcing the next write to check again."""
+    _ensured_collections.clear()
 
 
 async def create_articles_collection():
     """Create articles collection if it doesn't exist.
 
-    Creates a collection in Qdrant for storing articles with both dense and sparse vectors.
+    Creates the write collection in Qdrant for storing articles with both dense and sparse
+    vectors, with a keyword payload index per entity type. The payload indexes missing
+    from an existing collection are added. When the write name is an alias, its target
+    collection is checked.
+
+    The check runs once per process and write collection; later calls return immediately.
     """
+    if collection_router.write in _ensured_collections:
+        return
+
     qdrant_client = await get_qdrant_client()
+    collection_name = await collection_router.resolve(qdrant_client, collection_router.write)
+    await ensure_collection(qdrant_client, collection_name)
+    _ensured_collections.add(collection_router.write)
 
-    if await qdrant_client.collection_exists(collection_name=COLLECTION_NAME):
-        logger.debug(f"{COLLECTION_NAME} collection already exists")
-        return
 
-    logger.info(f"Creating {COLLECTION_NAME} collection")
-    await qdrant_client.create_collection(
-        collection_name=COLLECTION_NAME,
-        vectors_config={
-            "embedding": models.VectorParams(
-                size=768,
-                distance=models.Distance.COSINE
-            ),
-        },
-        sparse_vectors_config={
-            "text": models.SparseVectorParams(
-                index=models.SparseIndexParams(on_disk=False),
-                modifier=models.Modifier.IDF,
-            )
-        },
-    )
-    logger.info(f"{COLLECTION_NAME} collection created successfully")
+def _build_points(documents):
+    """Build the Qdrant points of a chunk of documents.
 
+    Args:
+        documents: The Document objects of the chunk.
 
-async def upsert_articles(documents: Union[Document, List[Document]]):
+    Returns:
+        list: One PointStruct per document.
+    """
+    return [
+        models.PointStruct(
+            id=doc.doc_id,
+            payload={
+                "text": doc.text,
+                **({"sentence_offsets": doc.sentence_offsets} if doc.sentence_offsets is not None else {}),
+                **{f"{entity_type}": entity_names for entity_type, entity_names in doc.entities.items()}
+            },
+            vector={
+                "embedding": doc.dense_vec,
+                "text": models.SparseVector(
+                    indices=doc.sparse_vec.indices,
+                    values=doc.sparse_vec.values,
+                )
+            }
+        )
+        for doc in documents
+    ]
+
+
+async def upsert_articles(
+    documents: Union[Document, List[Document]],
+    wait: bool = True,
+    batch_size: Optional[int] = None,
+    parallelism: Optional[int] = None,
+):
     """Insert or update one or multiple articles in the Qdrant database.
 
+    The documents are sent in chunks of `batch_size` points, with up to `parallelism`
+    chunks in flight at once. Points are only built when their chunk is sent. Chunks are
+    sent without waiting for Qdrant to apply them, except the last one which, when `wait`
+    is set, is sent once all the others are acknowledged and acts as a barrier.
+
     Args:
         documents: A single Document or a list of Document objects to upsert.
+        wait: Whether to return only once all the points are applied and searchable.
+        batch_size: Number of points per request. Defaults to `QDRANT_UPSERT_BATCH_SIZE` (256).
+        parallelism: Maximum number of requests in flight. Defaults to `QDRANT_UPSERT_PARALLELISM` (4).
     """
     await create_articles_collection()
 
@@ -65,31 +252,22 @@ async def upsert_articles(documents: Union[Document, List[Document]]):
         logger.warning("No documents provided for upserting")
         return
 
-    logger.info(f"Upserting {len(documents)} articles")
+    batch_size = batch_size or int(os.environ.get("QDRANT_UPSERT_BATCH_SIZE", 256))
+    parallelism = parallelism or int(os.environ.get("QDRANT_UPSERT_PARALLELISM", 4))
+    chunks = [documents[i:i+batch_size] for i in range(0, len(documents), batch_size)]
+
+    logger.info(f"Upserting {len(documents)} articles in {len(chunks)} chunks of up to {batch_size}")
     qdrant_client = await get_qdrant_client()
+    semaphore = asyncio.Semaphore(parallelism)
 
-    points = []
-    for doc in documents:
-        points.append(
-            models.PointStruct(
-                id=doc.doc_id,
-                payload={
-                    "text": doc.text,
-                    **{f"{entity_type}": entity_names for entity_type, entity_names in doc.entities.items()}
-                },
-                vector={
-                    "embedding": doc.dense_vec,
-                    "text": models.SparseVector(
-                        indices=doc.sparse_vec.indices,
-                        values=doc.sparse_vec.values,
-                    )
-                }
+    async def upsert_chunk(chunk, chunk_wait):
+        async with semaphore:
+            await qdrant_client.upsert(
+                collection_name=collection_router.write,
+                points=_build_points(chunk),
+                wait=chunk_wait,
             )
-        )
 
-    await qdrant_client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points,
-        wait=True,
-    )
-    logger.info(f"Successfully upserted {len(documents)} articles")
\ No newline at end of file
+    await asyncio.gather(*[upsert_chunk(chunk, False) for chunk in chunks[:-1]])
+    await upsert_chunk(chunks[-1], wait)
+    logger.info(f"Successfully upserted {len(documents)} articles")
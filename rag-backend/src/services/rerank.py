@@ -1,4 +1,5 @@
-import aiohttp
+from src.services.chunking import without_sentence_offsets
+from src.services.http import GPU_SERVICE_URL, get_http_session
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -21,21 +22,27 @@ async def rerank(query, docs):
     """
     logger.info(f"Reranking {len(docs)} documents using GPU service")
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(
-            'http://gpu-service:5001/rerank',
-            json={
-                'query': query,
-                'documents': docs
-            }
-        ) as response:
-            if response.status != 200:
-                error_text = await response.text()
-                logger.error(f"GPU service reranking failed: {error_text}")
-                raise Exception(f"GPU service reranking failed: {error_text}")
-
-            result = await response.json()
-            reranked_docs = result['ranked_documents']
-            logger.debug(f"Reranking complete, returned {len(reranked_docs)} documents")
-
-            return reranked_docs
+    # The sentence offsets stay here, and are put back on the reranked documents
+    offsets = {doc["id"]: doc["sentence_offsets"] for doc in docs if "sentence_offsets" in doc}
+
+    session = await get_http_session()
+    async with session.post(
+        f"{GPU_SERVICE_URL}/rerank",
+        json={
+            'query': query,
+            'documents': [without_sentence_offsets(doc) for doc in docs]
+        }
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            logger.error(f"GPU service reranking failed: {error_text}")
+            raise Exception(f"GPU service reranking failed: {error_text}")
+
+        result = await response.json()
+        reranked_docs = result['ranked_documents']
+        for doc in reranked_docs:
+            if doc.get("id") in offsets:
+                doc["sentence_offsets"] = offsets[doc["id"]]
+        logger.debug(f"Reranking complete, returned {len(reranked_docs)} documents")
+
+        return reranked_docs
@@ -44,7 +44,11 @@ async def process_search_results(docs, query, k, do_rerank):
         list: A list of formatted documents.
     """
     formatted_docs = [
-        {"id": doc.id, "text": doc.payload["text"]}
+        {
+            "id": doc.id,
+            "text": doc.payload["text"],
+            **({"sentence_offsets": doc.payload["sentence_offsets"]} if "sentence_offsets" in doc.payload else {}),
+        }
         for doc in docs
     ]
 
@@ -56,7 +60,26 @@ async def process_search_results(docs, query, k, do_rerank):
     return formatted_docs
 
 
-async def search(query, method, k=5, filter_by_entity=False, do_rerank=False):
+async def resolve_entities(query):
+    """Extracts the entities of a query and matches them with the known entities.
+
+    Args:
+        query: The search query text.
+
+    Returns:
+        dict: The matched entity names grouped by entity type, or None if there are none.
+    """
+    entities = await entity_extractor.extract_entities(query)
+    if not entities:
+        return None
+
+    logger.info(f"Extracted entities for filtering: {entities}")
+    entities = await entity_extractor.amatch_entities(entities)
+    logger.info(f"Matched entities: {entities}")
+    return entities
+
+
+async def search(query, method, k=5, filter_by_entity=False, do_rerank=False, entities=None):
     """Executes a search using the specified method and optional filters.
 
     Args:
@@ -65,6 +88,8 @@ async def search(query, method, k=5, filter_by_entity=False, do_rerank=False):
         k: The number of top results to return.
         filter_by_entity: Whether to filter results by extracted entities.
         do_rerank: Whether to rerank the results.
+        entities: Optional entities already matched, used as filter instead of
+            extracting them from the query.
 
     Returns:
         list: A list of documents matching the query.
@@ -75,14 +100,9 @@ async def search(query, method, k=5, filter_by_entity=False, do_rerank=False):
     logger.info(f"Starting search with method={method}, k={k}, filter_by_entity={filter_by_entity}, do_rerank={do_rerank}")
 
     # Prepare filter if needed
-    filter = None
-    if filter_by_entity:
-        entities = await entity_extractor.extract_entities(query)
-        if entities:
-            logger.info(f"Extracted entities for filtering: {entities}")
-            entities = entity_extractor.match_entities(entities)
-            logger.info(f"Matched entities: {entities}")
-            filter = create_entity_filter(entities)
+    if entities is None and filter_by_entity:
+        entities = await resolve_entities(query)
+    filter = create_entity_filter(entities) if entities else None
 
     # Calculate effective k for reranking
     k_eff = k*3 if do_rerank else k
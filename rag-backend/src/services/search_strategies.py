@@ -1,164 +1,350 @@
+import asyncio
+import threading
+import time
 from abc import ABC, abstractmethod
 from qdrant_client import models
 
+from src.services.collections import dense_search_params
 from src.services.embeddings import get_dense_embeddings, get_sparse_embeddings
-from src.services.qdrant import get_qdrant_client
+from src.services.qdrant import collection_router, get_qdrant_client
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+
+class EncodingTimings:
+    """Durations of the encoding branches of the hybrid searches run by this process.
+
+    The strategies are created for each search, so their timings are aggregated here
+    and reported by `/metrics`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, timings):
+        """
+        Add the timings of a query encoding.
+
+        Args:
+            timings: The duration in seconds of each branch.
+        """
+        with self._lock:
+            for branch, duration in timings.items():
+                counters = self._counters.setdefault(branch, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+                counters["count"] += 1
+                counters["total_ms"] += duration * 1000
+                counters["max_ms"] = max(counters["max_ms"], duration * 1000)
+
+    def stats(self):
+        """
+        Report the timings of each branch.
+
+        Returns:
+            A dictionary with the number of encodings, and the mean and maximum duration in
+            milliseconds, per branch.
+        """
+        with self._lock:
+            return {
+                branch: {
+                    "count": counters["count"],
+                    "mean_ms": counters["total_ms"] / counters["count"],
+                    "max_ms": counters["max_ms"],
+                }
+                for branch, counters in self._counters.items()
+            }
+
+
 class SearchStrategy(ABC):
     """Base strategy class for different search methods.
 
-    This abstract class defines the interface for all search strategies.
+    A search is split in two steps: the query text is encoded into vectors by
+    `encode_query`, then the index is queried with those vectors by
+    `search_with_vectors`. The vectors can therefore be computed once and reused.
     """
 
+    name = "base"
+
+    @abstractmethod
+    async def encode_query(self, query):
+        """Encode the query text into the vectors used by the strategy.
+
+        Args:
+            query: The search query text.
+
+        Returns:
+            The query vectors, in the format expected by `build_query`.
+        """
+        pass
+
     @abstractmethod
+    def build_query(self, vectors, k=5, filter=None):
+        """Build the Qdrant query for already encoded query vectors.
+
+        Args:
+            vectors: The query vectors returned by `encode_query`.
+            k: The number of results to retrieve.
+            filter: Optional filter to apply to the search.
+
+        Returns:
+            models.QueryRequest: The query to send to Qdrant.
+        """
+        pass
+
     async def execute_search(self, query, k=5, filter=None):
         """Execute search using the specific strategy.
 
         Args:
-            query: The search query text or embedding.
+            query: The search query text.
             k: The number of results to retrieve.
             filter: Optional filter to apply to the search.
 
         Returns:
             A list of matching document points.
         """
-        pass
+        logger.info(f"Performing {self.name} search with query: {query}, k={k}, filter={filter}")
+        vectors = await self.encode_query(query)
+        return await self.search_with_vectors(vectors, k=k, filter=filter)
+
+    async def search_with_vectors(self, vectors, k=5, filter=None):
+        """Query the index with already encoded query vectors.
+
+        When a filter is given, the filtered query and its unfiltered fallback are sent
+        together in a single batch request, and the fallback results are only used to
+        complete the filtered ones up to k.
+
+        Args:
+            vectors: The query vectors returned by `encode_query`.
+            k: The number of results to retrieve.
+            filter: Optional filter to apply to the search.
+
+        Returns:
+            A list of matching document points.
+        """
+        qdrant_client = await get_qdrant_client()
+
+        if filter is None:
+            request = self.build_query(vectors, k=k)
+            docs = await qdrant_client.query_points(
+                collection_name=collection_router.read,
+                query=request.query,
+                using=request.using,
+                prefetch=request.prefetch,
+                query_filter=request.filter,
+                search_params=request.params,
+                limit=request.limit,
+            )
+            docs = list(docs.points)
+            logger.info(f"{self.name} search returned {len(docs)} documents")
+            return docs
+
+        filtered, unfiltered = await qdrant_client.query_batch_points(
+            collection_name=collection_router.read,
+            requests=[
+                self.build_query(vectors, k=k, filter=filter),
+                self.build_query(vectors, k=k),
+            ],
+        )
+        docs = self.merge_fallback_results(list(filtered.points), list(unfiltered.points), k)
+        logger.info(f"{self.name} search returned {len(docs)} documents")
+        return docs
 
-    async def handle_insufficient_results(self, query, k, current_results, filter):
-        """Handle case where filter returns insufficient results.
+    @staticmethod
+    def merge_fallback_results(filtered_results, fallback_results, k):
+        """Complete filtered results with unfiltered ones when the filter is too restrictive.
 
         Args:
-            query: The search query text or embedding.
+            filtered_results: The results obtained with the filter.
+            fallback_results: The results obtained without the filter.
             k: The desired number of results.
-            current_results: The results obtained with filter.
-            filter: The filter that was applied.
 
         Returns:
-            A potentially extended list of document points.
+            Up to k document points, filtered results first, without duplicates.
         """
-        if filter is not None and len(current_results) < k:
-            logger.info("Insufficient results with filter, retrying without filter")
-            additional_results = await self.execute_search(query, k, filter=None)
-            current_results.extend(additional_results)
-            return current_results[:k]
-        return current_results
+        if len(filtered_results) >= k:
+            return filtered_results[:k]
+
+        logger.info("Insufficient results with filter, completing with unfiltered results")
+        seen = {doc.id for doc in filtered_results}
+        merged = list(filtered_results)
+        for doc in fallback_results:
+            if len(merged) >= k:
+                break
+            if doc.id not in seen:
+                seen.add(doc.id)
+                merged.append(doc)
+        return merged
 
 
 class BM25SearchStrategy(SearchStrategy):
     """Strategy for BM25 (sparse vector) search."""
 
-    async def execute_search(self, query, k=5, filter=None):
-        """Execute a BM25 search using sparse vectors.
+    name = "BM25"
+
+    async def encode_query(self, query):
+        """Encode the query into a BM25 sparse vector.
 
         Args:
             query: The search query text.
+
+        Returns:
+            The sparse embedding of the query.
+        """
+        # Encoded in a worker thread, as the embedding cache lookups read the disk
+        return (await asyncio.to_thread(get_sparse_embeddings, query))[0]
+
+    def build_query(self, vectors, k=5, filter=None):
+        """Build a sparse vector query.
+
+        Args:
+            vectors: The sparse embedding of the query.
             k: The number of results to retrieve.
             filter: Optional filter to apply to the search.
 
         Returns:
-            A list of matching document points.
+            models.QueryRequest: The query to send to Qdrant.
         """
-        logger.info(f"Performing BM25 search with query: {query}, k={k}, filter={filter}")
-        vec = get_sparse_embeddings(query)
-
-        qdrant_client = await get_qdrant_client()
-        docs = await qdrant_client.query_points(
-            collection_name="dev_articles",
+        return models.QueryRequest(
             using="text",
             query=models.SparseVector(
-                indices=vec.indices,
-                values=vec.values,
+                indices=vectors.indices,
+                values=vectors.values,
             ),
-            query_filter=filter,
+            filter=filter,
             limit=k,
+            with_payload=True,
         )
 
-        docs = list(docs.points)
-        logger.info(f"BM25 search returned {len(docs)} documents")
-
-        return await self.handle_insufficient_results(query, k, docs, filter)
-
 
 class DenseSearchStrategy(SearchStrategy):
     """Strategy for dense vector search."""
 
-    async def execute_search(self, query, k=5, filter=None):
-        """Execute a dense vector search.
+    name = "Dense"
+
+    def __init__(self, search_params=None):
+        """
+        Args:
+            search_params: Optional Qdrant search parameters (HNSW ef, quantization
+                rescoring and oversampling). Defaults to the environment settings.
+        """
+        self.search_params = search_params or dense_search_params()
+
+    async def encode_query(self, query):
+        """Encode the query into a dense vector.
 
         Args:
             query: The search query text.
+
+        Returns:
+            The dense embedding of the query.
+        """
+        return (await get_dense_embeddings(query))[0]
+
+    def build_query(self, vectors, k=5, filter=None):
+        """Build a dense vector query.
+
+        Args:
+            vectors: The dense embedding of the query.
             k: The number of results to retrieve.
             filter: Optional filter to apply to the search.
 
         Returns:
-            A list of matching document points.
+            models.QueryRequest: The query to send to Qdrant.
         """
-        logger.info(f"Performing dense search with query: {query}, k={k}, filter={filter}")
-        embedding = get_dense_embeddings(query)
-
-        qdrant_client = await get_qdrant_client()
-        docs = await qdrant_client.query_points(
-            collection_name="dev_articles",
+        return models.QueryRequest(
             using="embedding",
-            query=embedding,
-            query_filter=filter,
+            query=vectors,
+            filter=filter,
+            params=self.search_params,
             limit=k,
+            with_payload=True,
         )
 
-        docs = list(docs.points)
-        logger.info(f"Dense search returned {len(docs)} documents")
-
-        return await self.handle_insufficient_results(query, k, docs, filter)
-
 
 class HybridSearchStrategy(SearchStrategy):
     """Strategy for hybrid search combining sparse and dense vectors."""
 
-    async def execute_search(self, query, k=5, filter=None):
-        """Execute a hybrid search combining BM25 and dense vector approaches.
+    name = "Hybrid"
+
+    def __init__(self, search_params=None):
+        """
+        Args:
+            search_params: Optional Qdrant search parameters of the dense prefetch.
+                Defaults to the environment settings.
+        """
+        self.search_params = search_params or dense_search_params()
+        # Duration in seconds of each encoding branch of the last search
+        self.timings = {}
+
+    async def _timed(self, branch, coroutine):
+        """Await a coroutine and record its duration under the given branch name."""
+        start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            self.timings[branch] = time.perf_counter() - start
+
+    async def encode_query(self, query):
+        """Encode the query with both the BM25 and the dense models.
+
+        Both run concurrently: BM25 runs locally in a worker thread while the dense
+        embedding request is in flight.
 
         Args:
             query: The search query text.
-            k: The number of results to retrieve.
-            filter: Optional filter to apply to the search.
 
         Returns:
-            A list of matching document points.
+            A (sparse embedding, dense embedding) tuple.
         """
-        logger.info(f"Performing hybrid search with query: {query}, k={k}, filter={filter}")
-        sparse = get_sparse_embeddings(query)[0]
-        dense = get_dense_embeddings(query)[0]
+        self.timings = {}
+        start = time.perf_counter()
+        sparse, dense = await asyncio.gather(
+            self._timed("sparse", asyncio.to_thread(get_sparse_embeddings, query)),
+            self._timed("dense", get_dense_embeddings(query)),
+        )
+        self.timings["encoding"] = time.perf_counter() - start
+        hybrid_encoding_timings.record(self.timings)
+        logger.debug(f"Hybrid query encoding timings: {self.timings}")
+        return sparse[0], dense[0]
 
-        qdrant_client = await get_qdrant_client()
-        docs = await qdrant_client.query_points(
-            collection_name="dev_articles",
+    def build_query(self, vectors, k=5, filter=None):
+        """Build a query fusing sparse and dense results with reciprocal rank fusion.
+
+        Args:
+            vectors: The (sparse embedding, dense embedding) tuple of the query.
+            k: The number of results to retrieve.
+            filter: Optional filter to apply to both prefetches.
+
+        Returns:
+            models.QueryRequest: The query to send to Qdrant.
+        """
+        sparse, dense = vectors
+        return models.QueryRequest(
             query=models.FusionQuery(
                 fusion=models.Fusion.RRF
             ),
             prefetch=[
-                {
-                    "query": models.SparseVector(
+                models.Prefetch(
+                    query=models.SparseVector(
                         indices=sparse.indices,
                         values=sparse.values,
                     ),
-                    "using": "text",
-                    "limit": k,
-                    "filter": filter,
-                },
-                {
-                    "query": dense,
-                    "using": "embedding",
-                    "limit": k,
-                    "filter": filter,
-                }
+                    using="text",
+                    limit=k,
+                    filter=filter,
+                ),
+                models.Prefetch(
+                    query=dense,
+                    using="embedding",
+                    limit=k,
+                    filter=filter,
+                    params=self.search_params,
+                ),
             ],
             limit=k,
+            with_payload=True,
         )
 
-        docs = list(docs.points)
-        logger.info(f"Hybrid search returned {len(docs)} documents")
 
-        return await self.handle_insufficient_results(query, k, docs, filter)
+hybrid_encoding_timings = EncodingTimings()
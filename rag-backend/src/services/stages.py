@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class StageGraph:
+    """Executor of async stages forming a DAG.
+
+    Each stage is a coroutine function receiving the results of its dependencies as
+    keyword arguments. A stage starts as soon as all its dependencies are done, so
+    independent stages run concurrently.
+
+    Example:
+        graph = StageGraph()
+        graph.add("expansion", lambda: expand(question))
+        graph.add("entities", lambda: extract(question))
+        graph.add("search", lambda expansion, entities: search(expansion, entities),
+                  depends_on=["expansion", "entities"])
+        results = await graph.run()
+    """
+
+    def __init__(self):
+        self._stages = {}
+        # Start offset and duration in seconds of each stage of the last run
+        self.timings = {}
+
+    def add(self, name: str, func: Callable[..., Awaitable[Any]], depends_on: Iterable[str] = ()):
+        """
+        Add a stage to the graph.
+
+        Args:
+            name: The name of the stage, also the keyword under which its result is passed
+                to the stages depending on it.
+            func: A coroutine function called with the results of the dependencies.
+            depends_on: The names of the stages whose results are needed.
+
+        Raises:
+            ValueError: If a stage of the same name exists, or a dependency is unknown.
+                Dependencies must be added first, which rules out cycles.
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already defined")
+
+        depends_on = list(depends_on)
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+
+        self._stages[name] = (func, depends_on)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Run every stage, each as soon as its dependencies are done.
+
+        If a stage fails, the stages still running are cancelled and its error is raised.
+
+        Returns:
+            dict: The result of each stage, by name.
+        """
+        self.timings = {}
+        start = time.perf_counter()
+        tasks = {}
+
+        async def run_stage(name, func, depends_on):
+            dependencies = {dependency: await tasks[dependency] for dependency in depends_on}
+            stage_start = time.perf_counter()
+            try:
+                return await func(**dependencies)
+            finally:
+                self.timings[name] = {
+                    "start": stage_start - start,
+                    "duration": time.perf_counter() - stage_start,
+                }
+
+        for name, (func, depends_on) in self._stages.items():
+            tasks[name] = asyncio.ensure_future(run_stage(name, func, depends_on))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        logger.debug(f"Stage timings: {self.timings}")
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import queue
+import threading
+from typing import Any, AsyncIterable, Callable, Iterator
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Queued once the async iterable is exhausted
+_DONE = object()
+
+
+class _Error:
+    """Wrapper of an exception raised by the async iterable."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def format_event(event: str, data: Any) -> str:
+    """
+    Format a Server-Sent Event.
+
+    Args:
+        event: The event name.
+        data: The event payload, serialised to JSON.
+
+    Returns:
+        The event, ready to be written to a `text/event-stream` response.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def iterate_in_thread(make_iterable: Callable[[], AsyncIterable[Any]]) -> Iterator[Any]:
+    """
+    Iterate synchronously over an async iterable running in a background event loop.
+
+    Flask only streams responses from synchronous generators, while the pipeline is
+    asynchronous. The iterable runs with `asyncio.run` in a dedicated thread, and its
+    items are handed over through a queue as soon as they are produced. If the caller
+    stops iterating (e.g. the client disconnected), the iteration is cancelled.
+
+    Args:
+        make_iterable: A callable returning the async iterable, called in the background loop.
+
+    Yields:
+        The items of the async iterable.
+
+    Raises:
+        Exception: The error raised by the async iterable.
+    """
+    items = queue.Queue()
+    ready = threading.Event()
+    state = {}
+
+    async def consume():
+        try:
+            async for item in make_iterable():
+                items.put(item)
+        except asyncio.CancelledError:
+            logger.info("Streaming iteration cancelled")
+        except BaseException as e:
+            items.put(_Error(e))
+        finally:
+            items.put(_DONE)
+
+    async def main():
+        state["loop"] = asyncio.get_running_loop()
+        state["task"] = asyncio.current_task()
+        ready.set()
+        await consume()
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+    thread.start()
+    ready.wait()
+
+    finished = False
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                finished = True
+                break
+            if isinstance(item, _Error):
+                finished = True
+                raise item.error
+            yield item
+    finally:
+        if not finished:
+            try:
+                state["loop"].call_soon_threadsafe(state["task"].cancel)
+            except RuntimeError:
+                # The loop already ended
+                pass
+        thread.join()
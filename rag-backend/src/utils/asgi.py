@@ -0,0 +1,276 @@
+import asyncio
+import inspect
+import io
+import sys
+
+from flask import Flask
+from flask.globals import request_ctx
+from flask.signals import request_started
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Returned by the response iterator once exhausted
+_END = object()
+
+# Set in the environ of the requests served by FlaskASGI, whose responses may stream an async iterable
+ASYNC_BODY_KEY = "flask_asgi.async_body"
+
+
+def supports_async_body(environ):
+    """
+    Check whether a response may stream an async iterable on the event loop of the server.
+
+    Args:
+        environ (dict): The WSGI environ of the request.
+
+    Returns:
+        bool: True if the request is served by FlaskASGI.
+    """
+    return environ.get(ASYNC_BODY_KEY, False)
+
+
+def build_environ(scope, body):
+    """
+    Build the WSGI environ of an ASGI HTTP request.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        body (bytes): The request body.
+
+    Returns:
+        dict: The WSGI environ.
+    """
+    script_name = scope.get("root_path", "").encode("utf8").decode("latin1")
+    path_info = scope["path"].encode("utf8").decode("latin1")
+    if path_info.startswith(script_name):
+        path_info = path_info[len(script_name):]
+
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": script_name,
+        "PATH_INFO": path_info,
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if scope.get("client"):
+        environ["REMOTE_ADDR"] = scope["client"][0]
+
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+
+    return environ
+
+
+class FlaskASGI:
+    """ASGI application serving a Flask application on the server's event loop.
+
+    Under a WSGI server, Flask runs every async view in a new event loop, so the clients
+    bound to a loop (Qdrant, GPU service sessions) are recreated for each request, and a
+    worker serves one request at a time. Here the async views run as tasks of the single
+    event loop of the worker, concurrently, and share its clients. Synchronous views run
+    in a thread, as do the synchronous bodies of streamed responses, so that they do not
+    block the loop. A response whose body is an async iterable (see `supports_async_body`)
+    is streamed on the loop itself.
+
+    The request context, hooks, error handlers and responses are those of Flask, so the
+    blueprints are served unchanged. Startup and shutdown hooks run in the ASGI lifespan,
+    on the event loop of the worker.
+    """
+
+    def __init__(self, flask_app: Flask, on_startup=None, on_shutdown=None):
+        """
+        Initialize the FlaskASGI.
+
+        Args:
+            flask_app (Flask): The Flask application.
+            on_startup (list, optional): Coroutine functions run before the first request.
+            on_shutdown (list, optional): Coroutine functions run once the server stops.
+        """
+        self.flask_app = flask_app
+        self.on_startup = list(on_startup or [])
+        self.on_shutdown = list(on_shutdown or [])
+
+    async def __call__(self, scope, receive, send):
+        """Handle an ASGI connection."""
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self._read_body(receive)
+        environ = build_environ(scope, body)
+        environ[ASYNC_BODY_KEY] = True
+        response = await self._handle(environ)
+        await self._send_response(environ, response, receive, send)
+
+    async def _lifespan(self, receive, send):
+        """Run the startup and shutdown hooks."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for hook in self.on_startup:
+                        await hook()
+                except Exception as e:
+                    logger.error(f"ASGI startup failed: {str(e)}", exc_info=True)
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                for hook in self.on_shutdown:
+                    try:
+                        await hook()
+                    except Exception as e:
+                        logger.error(f"ASGI shutdown hook failed: {str(e)}", exc_info=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        """Read the whole request body."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _handle(self, environ):
+        """Dispatch a request within its Flask request context, as `Flask.wsgi_app` does."""
+        app = self.flask_app
+        ctx = app.request_context(environ)
+        error = None
+        try:
+            try:
+                ctx.push()
+                response = await self._full_dispatch_request()
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+            except:  # noqa: E722
+                error = sys.exc_info()[1]
+                raise
+            return response
+        finally:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            ctx.pop(error)
+
+    async def _full_dispatch_request(self):
+        """Run the request hooks and the view, as `Flask.full_dispatch_request` does."""
+        app = self.flask_app
+        try:
+            request_started.send(app, _async_wrapper=app.ensure_sync)
+            rv = app.preprocess_request()
+            if rv is None:
+                rv = await self._dispatch_request()
+        except Exception as e:
+            rv = app.handle_user_exception(e)
+        return app.finalize_request(rv)
+
+    async def _dispatch_request(self):
+        """Call the view of the request, awaiting async views on the running event loop."""
+        app = self.flask_app
+        req = request_ctx.request
+        if req.routing_exception is not None:
+            app.raise_routing_exception(req)
+        rule = req.url_rule
+        if getattr(rule, "provide_automatic_options", False) and req.method == "OPTIONS":
+            return app.make_default_options_response()
+
+        view = app.view_functions[rule.endpoint]
+        if inspect.iscoroutinefunction(view):
+            return await view(**req.view_args)
+        # The thread runs in a copy of the context, holding the request
+        return await asyncio.to_thread(view, **req.view_args)
+
+    async def _send_response(self, environ, response, receive, send):
+        """Send a Flask response, stopping a streamed body if the client disconnects."""
+        app_iter, status, headers = response.get_wsgi_response(environ)
+        await send({
+            "type": "http.response.start",
+            "status": int(status.split(" ", 1)[0]),
+            "headers": [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers],
+        })
+
+        if hasattr(response.response, "__aiter__"):
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+            await self._send_async_body(response.response, receive, send)
+            return
+
+        if not response.is_streamed:
+            # A single body message, as small writes would wait for delayed ACKs
+            try:
+                body = b"".join(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        disconnected = asyncio.create_task(self._wait_disconnect(receive))
+        iterator = iter(app_iter)
+        try:
+            while not disconnected.done():
+                chunk = await asyncio.to_thread(next, iterator, _END)
+                if chunk is _END:
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                logger.info("Client disconnected, stopping the streamed response")
+        finally:
+            disconnected.cancel()
+            if hasattr(app_iter, "close"):
+                # Closing the generator can wait for its background work to stop
+                await asyncio.to_thread(app_iter.close)
+
+    async def _send_async_body(self, body, receive, send):
+        """Stream an async iterable body on the event loop, cancelling it if the client disconnects."""
+        async def stream():
+            async for chunk in body:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        streaming = asyncio.create_task(stream())
+        disconnected = asyncio.create_task(self._wait_disconnect(receive))
+        try:
+            await asyncio.wait({streaming, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if streaming.done():
+                streaming.result()
+            else:
+                logger.info("Client disconnected, stopping the streamed response")
+        finally:
+            disconnected.cancel()
+            if not streaming.done():
+                streaming.cancel()
+                await asyncio.gather(streaming, return_exceptions=True)
+            if hasattr(body, "aclose"):
+                await body.aclose()
+
+    async def _wait_disconnect(self, receive):
+        """Wait until the client disconnects."""
+        while (await receive())["type"] != "http.disconnect":
+            pass
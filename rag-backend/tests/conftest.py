@@ -32,3 +32,10 @@ def client(flask_app):
     with flask_app.test_client() as client:
         yield client
 
+
+
+@pytest.fixture(autouse=True)
+def disable_llm_cache(monkeypatch):
+    """Disable the LLM result cache so that every test reaches its mocked BAML calls."""
+    from src.services.llm_cache import llm_cache
+    monkeypatch.setattr(llm_cache, "max_entries", 0)
@@ -1,7 +1,7 @@
 import pytest
 from aioresponses import aioresponses
 import json
-from src.services.chunking import summarize
+from src.services.chunking import sentence_offsets, split_sentences, summarize, summarize_batch
 
 @pytest.mark.asyncio
 async def test_summarize_success_with_aioresponses():
@@ -18,4 +18,57 @@ async def test_summarize_success_with_aioresponses():
 
         result = await summarize(query, document)
 
-        assert result == expected_summary
\ No newline at end of file
+        assert result == expected_summary
+
+@pytest.mark.asyncio
+async def test_summarize_batch_success_with_aioresponses():
+    """Test batch summarization sends one item per document."""
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize_batch',
+               payload={"summaries": ["Summary 1", "Summary 2"]},
+               status=200)
+
+        result = await summarize_batch("What is the main point?", ["Document 1", "Document 2"], length=50)
+
+        assert result == ["Summary 1", "Summary 2"]
+        request = list(m.requests.values())[0][0]
+        assert request.kwargs["json"]["items"] == [
+            {"query": "What is the main point?", "document": "Document 1", "length": 50},
+            {"query": "What is the main point?", "document": "Document 2", "length": 50},
+        ]
+
+
+@pytest.mark.asyncio
+async def test_summarize_batch_error_with_aioresponses():
+    """Test batch summarization raises on a GPU service error."""
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize_batch', body="boom", status=400)
+
+        with pytest.raises(Exception, match="GPU service batch summarization failed"):
+            await summarize_batch("What is the main point?", ["Document 1"])
+
+
+
+def test_sentence_offsets_round_trip():
+    """Test that the offsets give back the sentences of the splitter, whitespace collapsed."""
+    text = "Hello  world.  This is  Dr. Smith's text!\n\nNew para? Yes... ok"
+
+    offsets = sentence_offsets(text)
+
+    assert offsets == [0, 13, 15, 41, 43, 52, 53, 62]
+    assert split_sentences(text, offsets) == ["Hello world.", "This is Dr. Smith's text!", "New para?", "Yes... ok"]
+
+
+@pytest.mark.asyncio
+async def test_summarize_with_sentences():
+    """Test that pre-split sentences are sent instead of the document."""
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize', payload={"summary": "Summary"}, status=200)
+
+        await summarize("query", "First. Second.", length=50, sentences=["First.", "Second."])
+
+        request = list(m.requests.values())[0][0]
+        assert request.kwargs["json"] == {"query": "query", "sentences": ["First.", "Second."], "length": 50}
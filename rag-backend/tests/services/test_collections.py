@@ -0,0 +1,221 @@
+"""
+Tests for Qdrant collection provisioning.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from qdrant_client import models
+from qdrant_client.models import PayloadSchemaType, VectorParamsDiff
+
+from src.services.collections import (
+    create_collection, ensure_collection, migrate_collection, hnsw_config, optimizers_config, vectors_config,
+    quantization_config, dense_search_params, swap_alias, warm_collection, wait_until_ready,
+)
+
+
+class TestCollections:
+    """Tests for collection creation and migration."""
+
+    @pytest.fixture
+    def mock_qdrant_client(self):
+        """Mock the Qdrant client."""
+        client = AsyncMock()
+        client.get_collection = AsyncMock(return_value=MagicMock(payload_schema={}))
+        return client
+
+    def test_schema_from_environment(self, monkeypatch):
+        """Test that the schema settings are read from the environment."""
+        monkeypatch.setenv("QDRANT_HNSW_M", "32")
+        monkeypatch.setenv("QDRANT_HNSW_EF_CONSTRUCT", "256")
+        monkeypatch.setenv("QDRANT_HNSW_ON_DISK", "true")
+        monkeypatch.setenv("QDRANT_VECTORS_ON_DISK", "true")
+        monkeypatch.setenv("QDRANT_INDEXING_THRESHOLD", "5000")
+
+        assert hnsw_config().m == 32
+        assert hnsw_config().ef_construct == 256
+        assert hnsw_config().on_disk is True
+        assert vectors_config()["embedding"].on_disk is True
+        assert optimizers_config().indexing_threshold == 5000
+        assert optimizers_config().memmap_threshold is None
+
+    def test_schema_defaults(self, monkeypatch):
+        """Test the schema defaults."""
+        for name in ["QDRANT_HNSW_M", "QDRANT_HNSW_EF_CONSTRUCT", "QDRANT_VECTORS_ON_DISK"]:
+            monkeypatch.delenv(name, raising=False)
+
+        assert hnsw_config().m == 16
+        assert hnsw_config().ef_construct == 100
+        assert vectors_config()["embedding"].size == 768
+        assert vectors_config()["embedding"].on_disk is False
+
+    def test_quantization_disabled_by_default(self, monkeypatch):
+        """Test that vectors are stored as float32 and searched with Qdrant's defaults by default."""
+        for name in ["QDRANT_QUANTIZATION", "QDRANT_SEARCH_HNSW_EF"]:
+            monkeypatch.delenv(name, raising=False)
+
+        assert quantization_config() is None
+        assert dense_search_params() is None
+
+    def test_scalar_quantization(self, monkeypatch):
+        """Test the int8 scalar quantization profile and its search parameters."""
+        monkeypatch.setenv("QDRANT_QUANTIZATION", "scalar")
+        monkeypatch.setenv("QDRANT_QUANTIZATION_QUANTILE", "0.99")
+        monkeypatch.setenv("QDRANT_SEARCH_OVERSAMPLING", "2")
+        monkeypatch.setenv("QDRANT_SEARCH_HNSW_EF", "128")
+
+        config = quantization_config()
+        assert isinstance(config, models.ScalarQuantization)
+        assert config.scalar.type == models.ScalarType.INT8
+        assert config.scalar.quantile == 0.99
+        assert config.scalar.always_ram is True
+
+        params = dense_search_params()
+        assert params.hnsw_ef == 128
+        assert params.quantization.rescore is True
+        assert params.quantization.oversampling == 2.0
+
+    def test_binary_quantization(self, monkeypatch):
+        """Test the binary quantization profile."""
+        monkeypatch.setenv("QDRANT_QUANTIZATION", "binary")
+        monkeypatch.setenv("QDRANT_SEARCH_RESCORE", "false")
+
+        assert isinstance(quantization_config(), models.BinaryQuantization)
+        assert dense_search_params().quantization.rescore is False
+
+    def test_invalid_quantization(self, monkeypatch):
+        """Test that an unknown quantization profile is rejected."""
+        monkeypatch.setenv("QDRANT_QUANTIZATION", "product")
+
+        with pytest.raises(ValueError):
+            quantization_config()
+
+    @pytest.mark.asyncio
+    async def test_create_collection(self, mock_qdrant_client):
+        """Test that a new collection gets its schema and a payload index per entity type."""
+        await create_collection(mock_qdrant_client, "articles")
+
+        call_args = mock_qdrant_client.create_collection.call_args[1]
+        assert call_args["collection_name"] == "articles"
+        assert call_args["hnsw_config"] == hnsw_config()
+        assert call_args["optimizers_config"] == optimizers_config()
+        assert "text" in call_args["sparse_vectors_config"]
+
+        indexed = [c[1]["field_name"] for c in mock_qdrant_client.create_payload_index.call_args_list]
+        assert indexed == ["Game", "Console", "Publisher"]
+        for c in mock_qdrant_client.create_payload_index.call_args_list:
+            assert c[1]["field_schema"] == PayloadSchemaType.KEYWORD
+
+    @pytest.mark.asyncio
+    async def test_ensure_existing_collection_adds_missing_indexes(self, mock_qdrant_client):
+        """Test that only the missing payload indexes are created on an existing collection."""
+        mock_qdrant_client.collection_exists.return_value = True
+        mock_qdrant_client.get_collection.return_value = MagicMock(payload_schema={"Game": MagicMock()})
+
+        await ensure_collection(mock_qdrant_client, "articles")
+
+        mock_qdrant_client.create_collection.assert_not_called()
+        indexed = [c[1]["field_name"] for c in mock_qdrant_client.create_payload_index.call_args_list]
+        assert indexed == ["Console", "Publisher"]
+
+    @pytest.mark.asyncio
+    async def test_ensure_missing_collection(self, mock_qdrant_client):
+        """Test that a missing collection is created."""
+        mock_qdrant_client.collection_exists.return_value = False
+
+        await ensure_collection(mock_qdrant_client, "articles")
+
+        mock_qdrant_client.create_collection.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_migrate_collection(self, mock_qdrant_client, monkeypatch):
+        """Test that migrating applies the configured schema in place."""
+        monkeypatch.setenv("QDRANT_VECTORS_ON_DISK", "true")
+
+        await migrate_collection(mock_qdrant_client, "articles")
+
+        call_args = mock_qdrant_client.update_collection.call_args[1]
+        assert call_args["collection_name"] == "articles"
+        assert call_args["vectors_config"] == {"embedding": VectorParamsDiff(on_disk=True)}
+        assert call_args["hnsw_config"] == hnsw_config()
+        assert call_args["quantization_config"] == models.Disabled.DISABLED
+        assert mock_qdrant_client.create_payload_index.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_migrate_collection_to_quantized(self, mock_qdrant_client, monkeypatch):
+        """Test that migrating enables the configured quantization."""
+        monkeypatch.setenv("QDRANT_QUANTIZATION", "scalar")
+
+        await migrate_collection(mock_qdrant_client, "articles")
+
+        call_args = mock_qdrant_client.update_collection.call_args[1]
+        assert isinstance(call_args["quantization_config"], models.ScalarQuantization)
+
+
+class TestAliases:
+    """Tests for the blue/green collection workflow."""
+
+    @pytest.fixture
+    def mock_qdrant_client(self):
+        """Mock the Qdrant client."""
+        client = AsyncMock()
+        client.get_aliases = AsyncMock(return_value=MagicMock(aliases=[]))
+        client.collection_exists = AsyncMock(return_value=False)
+        client.get_collection = AsyncMock(return_value=MagicMock(status=models.CollectionStatus.GREEN))
+        return client
+
+    @pytest.mark.asyncio
+    async def test_swap_alias(self, mock_qdrant_client):
+        """Test that the alias is moved in a single request."""
+        mock_qdrant_client.get_aliases.return_value = MagicMock(aliases=[
+            MagicMock(alias_name="articles", collection_name="articles_v1"),
+        ])
+
+        previous = await swap_alias(mock_qdrant_client, "articles", "articles_v2")
+
+        assert previous == "articles_v1"
+        mock_qdrant_client.update_collection_aliases.assert_called_once()
+        delete, create = mock_qdrant_client.update_collection_aliases.call_args[1]["change_aliases_operations"]
+        assert delete.delete_alias.alias_name == "articles"
+        assert create.create_alias.alias_name == "articles"
+        assert create.create_alias.collection_name == "articles_v2"
+
+    @pytest.mark.asyncio
+    async def test_swap_new_alias(self, mock_qdrant_client):
+        """Test creating an alias that doesn't exist yet."""
+        previous = await swap_alias(mock_qdrant_client, "articles", "articles_v1")
+
+        assert previous is None
+        operations = mock_qdrant_client.update_collection_aliases.call_args[1]["change_aliases_operations"]
+        assert len(operations) == 1
+        assert operations[0].create_alias.collection_name == "articles_v1"
+
+    @pytest.mark.asyncio
+    async def test_swap_alias_over_collection(self, mock_qdrant_client):
+        """Test that an alias cannot take the name of a collection."""
+        mock_qdrant_client.collection_exists.return_value = True
+
+        with pytest.raises(ValueError):
+            await swap_alias(mock_qdrant_client, "articles", "articles_v2")
+
+        mock_qdrant_client.update_collection_aliases.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_warm_collection(self, mock_qdrant_client):
+        """Test that stored vectors are used as warm-up queries."""
+        points = [MagicMock(vector={"embedding": [0.1] * 768}) for _ in range(3)]
+        mock_qdrant_client.scroll = AsyncMock(return_value=(points, None))
+
+        await warm_collection(mock_qdrant_client, "articles_v2", num_queries=3)
+
+        assert mock_qdrant_client.scroll.call_args[1]["limit"] == 3
+        requests = mock_qdrant_client.query_batch_points.call_args[1]["requests"]
+        assert len(requests) == 3
+        assert all(r.using == "embedding" for r in requests)
+
+    @pytest.mark.asyncio
+    async def test_wait_until_ready_timeout(self, mock_qdrant_client):
+        """Test that waiting for an optimizing collection times out."""
+        mock_qdrant_client.get_collection.return_value = MagicMock(status=models.CollectionStatus.YELLOW)
+
+        with pytest.raises(TimeoutError):
+            await wait_until_ready(mock_qdrant_client, "articles_v2", timeout=0, poll_interval=0)
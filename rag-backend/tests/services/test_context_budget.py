@@ -0,0 +1,93 @@
+import pytest
+from aioresponses import aioresponses
+
+from src.services.context_budget import budget_context, estimate_tokens, unique_sentences
+
+
+def test_estimate_tokens():
+    """Test that the token estimate grows with the length of the text."""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 400) == 101
+
+
+def test_unique_sentences_drops_overlapping_passages():
+    """Test that sentences shared by several passages are kept once, in order."""
+    context = "\n".join([
+        "Mario was created by Shigeru Miyamoto. He first appeared in Donkey Kong.",
+        "Mario   was created by Shigeru Miyamoto. Nintendo released it in 1981.",
+        "he first appeared in donkey kong.",
+    ])
+
+    assert unique_sentences(context) == [
+        "Mario was created by Shigeru Miyamoto.",
+        "He first appeared in Donkey Kong.",
+        "Nintendo released it in 1981.",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_budget_context_within_budget():
+    """Test that a context within the budget is only deduplicated, without calling the GPU service."""
+    context = "Mario was created by Miyamoto.\nMario was created by Miyamoto."
+
+    with aioresponses():
+        result = await budget_context("Miyamoto created Mario.", context, max_tokens=100)
+
+    assert result == "Mario was created by Miyamoto."
+
+
+@pytest.mark.asyncio
+async def test_budget_context_disabled():
+    """Test that a budget of 0 returns the context unchanged."""
+    context = "Mario was created by Miyamoto.\nMario was created by Miyamoto."
+
+    assert await budget_context("Miyamoto created Mario.", context, max_tokens=0) == context
+
+
+@pytest.mark.asyncio
+async def test_budget_context_prunes_with_answer():
+    """Test that a context over the budget is scored against the answer by the GPU service."""
+    sentences = [f"Sentence number {i} about Mario." for i in range(50)]
+    context = "\n".join(sentences + sentences)
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize', payload={"summary": sentences[3]}, status=200)
+
+        result = await budget_context("Miyamoto created Mario.", context, max_tokens=50)
+
+        request = next(iter(m.requests.values()))[0]
+
+    assert result == sentences[3]
+    assert request.kwargs["json"] == {
+        "query": "Miyamoto created Mario.",
+        "sentences": sentences,
+        "length": 200,
+    }
+
+
+@pytest.mark.asyncio
+async def test_budget_context_falls_back_on_error():
+    """Test that the deduplicated context is used when the GPU service fails."""
+    sentences = [f"Sentence number {i} about Mario." for i in range(50)]
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize', status=500, body="Internal Server Error")
+
+        result = await budget_context("Miyamoto created Mario.", "\n".join(sentences * 2), max_tokens=50)
+
+    assert result == "\n".join(sentences)
+
+
+@pytest.mark.asyncio
+async def test_budget_context_stays_within_budget():
+    """Test that the pruned context is cut at the budget when a sentence straddles it."""
+    sentences = [f"Sentence number {i} about Mario." for i in range(50)]
+    summary = sentences[3] + "\n" + "Mario " * 40
+
+    with aioresponses() as m:
+        m.post('http://gpu-service:5001/summarize', payload={"summary": summary}, status=200)
+
+        result = await budget_context("Miyamoto created Mario.", "\n".join(sentences), max_tokens=50)
+
+    assert len(result) == 200
+    assert result == summary[:200]
@@ -0,0 +1,140 @@
+"""
+Tests for the two-tier embedding cache.
+"""
+
+import duckdb
+import pytest
+from unittest.mock import patch
+
+from src.services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Return the path of a fresh DuckDB file."""
+        return str(tmp_path / "cache" / "embeddings.db")
+
+    def test_make_key_normalises_text(self):
+        """Test that whitespace and Unicode form do not change the key."""
+        assert EmbeddingCache.make_key("m", "Super  Mario\nBros ") == EmbeddingCache.make_key("m", "Super Mario Bros")
+        assert EmbeddingCache.make_key("m", "Pokémon") == EmbeddingCache.make_key("m", "Pokémon")
+        assert EmbeddingCache.make_key("m", "Zelda") != EmbeddingCache.make_key("other", "Zelda")
+
+    def test_memory_hit_and_miss(self):
+        """Test lookups against the in-memory tier."""
+        cache = EmbeddingCache(max_memory_entries=10)
+        cache.put_many("m", ["a"], [(None, [0.5, 0.25])])
+
+        results = cache.get_many("m", ["a", "b"])
+
+        assert results[0][0] is None
+        assert results[0][1].tolist() == [0.5, 0.25]
+        assert results[1] is None
+
+        stats = cache.stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_memory_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = EmbeddingCache(max_memory_entries=2)
+        cache.put_many("m", ["a", "b"], [(None, [1.0]), (None, [2.0])])
+        cache.get_many("m", ["a"])
+        cache.put_many("m", ["c"], [(None, [3.0])])
+
+        results = cache.get_many("m", ["a", "b", "c"])
+
+        assert results[0] is not None
+        assert results[1] is None
+        assert results[2] is not None
+        assert cache.stats()["memory_entries"] == 2
+
+    def test_disk_tier_survives_restart(self, db_path):
+        """Test that a new cache instance reads embeddings written by a previous one."""
+        EmbeddingCache(db_path=db_path).put_many(
+            "bm25", ["a", "b"], [([3, 7], [0.5, 0.25]), (None, [1.0, 2.0])]
+        )
+
+        cache = EmbeddingCache(db_path=db_path)
+        results = cache.get_many("bm25", ["a", "b", "c"])
+
+        assert results[0][0].tolist() == [3, 7]
+        assert results[0][1].tolist() == [0.5, 0.25]
+        assert results[1][0] is None
+        assert results[1][1].tolist() == [1.0, 2.0]
+        assert results[2] is None
+        assert cache.stats()["disk_hits"] == 2
+
+        # Disk hits are promoted to memory
+        cache.get_many("bm25", ["a"])
+        assert cache.stats()["memory_hits"] == 1
+
+    def test_disk_tier_is_bounded(self, db_path):
+        """Test that the disk tier keeps at most max_disk_entries rows."""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0, max_disk_entries=2)
+        for text in ["a", "b", "c"]:
+            cache.put_many("m", [text], [(None, [1.0])])
+
+        results = cache.get_many("m", ["a", "b", "c"])
+
+        assert sum(result is not None for result in results) == 2
+        assert results[2] is not None
+
+    def test_disk_lookups_are_read_only(self, db_path):
+        """Test that lookups open the file read-only, so that workers can read it at the same time."""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0)
+        cache.put_many("m", ["a"], [(None, [1.0])])
+
+        with patch("src.services.embedding_cache.duckdb.connect", wraps=duckdb.connect) as mock_connect:
+            results = cache.get_many("m", ["a", "b"])
+
+        assert results[0][1].tolist() == [1.0]
+        assert [call.kwargs["read_only"] for call in mock_connect.call_args_list] == [True]
+
+    def test_disk_access_times_are_batched(self, db_path):
+        """Test that the access times of disk hits are written with the next write."""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0, max_disk_entries=2)
+        cache.put_many("m", ["a"], [(None, [1.0])])
+        cache.put_many("m", ["b"], [(None, [2.0])])
+
+        # Reading "a" makes it more recent than "b", once written with "c"
+        cache.get_many("m", ["a"])
+        cache.put_many("m", ["c"], [(None, [3.0])])
+
+        results = cache.get_many("m", ["a", "b", "c"])
+
+        assert results[0] is not None
+        assert results[1] is None
+        assert results[2] is not None
+
+    def test_disk_access_times_written_once_batch_is_full(self, db_path):
+        """Test that pending access times are written without waiting for a write once the batch is full."""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0, touch_batch=2)
+        cache.put_many("m", ["a", "b"], [(None, [1.0]), (None, [2.0])])
+
+        with patch("src.services.embedding_cache.duckdb.connect", wraps=duckdb.connect) as mock_connect:
+            cache.get_many("m", ["a"])
+            assert [call.kwargs["read_only"] for call in mock_connect.call_args_list] == [True]
+
+            cache.get_many("m", ["a", "b"])
+            assert [call.kwargs["read_only"] for call in mock_connect.call_args_list] == [True, True, False]
+
+    def test_disk_errors_are_misses(self, db_path):
+        """Test that a locked or broken database degrades to a cache miss."""
+        cache = EmbeddingCache(db_path=db_path, max_memory_entries=0)
+
+        with patch("src.services.embedding_cache.duckdb.connect", side_effect=IOError("Could not set lock")):
+            cache.put_many("m", ["a"], [(None, [1.0])])
+            results = cache.get_many("m", ["a"])
+
+        assert results == [None]
+        assert cache.stats()["disk_errors"] == 2
+
+    def test_disabled(self):
+        """Test that a cache without tiers reports itself as disabled."""
+        assert not EmbeddingCache(max_memory_entries=0).enabled
+        assert EmbeddingCache(max_memory_entries=1).enabled
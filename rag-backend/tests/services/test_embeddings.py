@@ -1,8 +1,15 @@
 import pytest
+import os
+import threading
+import time
+import numpy as np
 from src.services.embeddings import (
     get_sparse_embeddings,
     get_dense_embeddings,
+    embedding_registry,
+    EmbeddingModelRegistry,
 )
+from src.services.embedding_cache import EmbeddingCache
 from fastembed import SparseEmbedding
 
 
@@ -21,8 +28,10 @@ def mock_genai_client(mocker):
     mock_models = mocker.MagicMock()
     mock_embed = mocker.MagicMock(return_value=MockResponse([MockEmbedding([0.1, 0.2, 0.3])]))
 
-    # Patch the client
+    # Patch the client, and make sure the registry builds it again
     mocker.patch("src.services.embeddings.genai.Client", return_value=mock_client)
+    embedding_registry.reset()
+    mocker.patch("src.services.embeddings.embedding_cache", EmbeddingCache(max_memory_entries=0))
 
     # Set up the chain
     mock_client.models = mock_models
@@ -56,9 +65,10 @@ def test_sparse_embed_texts():
     assert isinstance(embeddings, list)
     assert isinstance(embeddings[0], SparseEmbedding)
 
-def test_dense_embed_text(mock_genai_client):
+@pytest.mark.asyncio
+async def test_dense_embed_text(mock_genai_client):
     document = "Document test"
-    embeddings = get_dense_embeddings(document)
+    embeddings = await get_dense_embeddings(document)
 
     mock_genai_client["embed"].assert_called_once()
     assert isinstance(embeddings, list)
@@ -66,14 +76,198 @@ def test_dense_embed_text(mock_genai_client):
     assert len(embeddings) == 1
 
 
-def test_dense_embed_texts(mock_genai_client):
+@pytest.mark.asyncio
+async def test_dense_embed_texts(mock_genai_client):
     documents = [
         "Document test",
         "Document test 2"
     ]*100
-    embeddings = get_dense_embeddings(documents)
+    embeddings = await get_dense_embeddings(documents)
 
     assert isinstance(embeddings, list)
     assert isinstance(embeddings[0], list)
     assert len(embeddings) == 2
-    assert mock_genai_client["embed"].call_count == 2
\ No newline at end of file
+    assert mock_genai_client["embed"].call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_dense_embed_preserves_order(mock_genai_client, mocker):
+    """Batches complete out of order but embeddings come back in input order."""
+    mocker.patch("src.services.embeddings.EMBEDDING_BATCH_SIZE", 2)
+
+    def embed(model, contents):
+        # Later batches answer first
+        time.sleep(0.01 * (10 - int(contents[0])))
+        return MockResponse([MockEmbedding([float(c)]) for c in contents])
+
+    mock_genai_client["embed"].side_effect = embed
+    documents = [str(i) for i in range(10)]
+
+    embeddings = await get_dense_embeddings(documents)
+
+    assert embeddings == [[float(i)] for i in range(10)]
+    assert mock_genai_client["embed"].call_count == 5
+
+
+@pytest.mark.asyncio
+async def test_dense_embed_bounded_concurrency(mock_genai_client, mocker):
+    """No more than EMBEDDING_MAX_CONCURRENCY batches are in flight at once."""
+    mocker.patch("src.services.embeddings.EMBEDDING_BATCH_SIZE", 1)
+    mocker.patch("src.services.embeddings.EMBEDDING_MAX_CONCURRENCY", 2)
+
+    lock = threading.Lock()
+    in_flight = {"current": 0, "max": 0}
+
+    def embed(model, contents):
+        with lock:
+            in_flight["current"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        time.sleep(0.02)
+        with lock:
+            in_flight["current"] -= 1
+        return MockResponse([MockEmbedding([0.1])])
+
+    mock_genai_client["embed"].side_effect = embed
+
+    await get_dense_embeddings(["a", "b", "c", "d", "e"])
+
+    assert in_flight["max"] == 2
+
+
+@pytest.mark.asyncio
+async def test_dense_embed_retries(mock_genai_client, mocker):
+    """A failing batch is retried before giving up."""
+    mocker.patch("src.services.embeddings.EMBEDDING_RETRY_BACKOFF", 0)
+    mock_genai_client["embed"].side_effect = [
+        RuntimeError("Rate limited"),
+        MockResponse([MockEmbedding([0.1, 0.2, 0.3])]),
+    ]
+
+    embeddings = await get_dense_embeddings("Document test")
+
+    assert embeddings == [[0.1, 0.2, 0.3]]
+    assert mock_genai_client["embed"].call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_dense_embed_retries_exhausted(mock_genai_client, mocker):
+    """The error is raised once every retry has failed."""
+    mocker.patch("src.services.embeddings.EMBEDDING_RETRY_BACKOFF", 0)
+    mocker.patch("src.services.embeddings.EMBEDDING_MAX_RETRIES", 2)
+    mock_genai_client["embed"].side_effect = RuntimeError("Unavailable")
+
+    with pytest.raises(RuntimeError, match="Unavailable"):
+        await get_dense_embeddings("Document test")
+
+    assert mock_genai_client["embed"].call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_dense_embed_uses_cache(mock_genai_client, mocker):
+    """Only documents missing from the cache are sent to the model."""
+    cache = EmbeddingCache(max_memory_entries=10)
+    mocker.patch("src.services.embeddings.embedding_cache", cache)
+    mock_genai_client["embed"].side_effect = lambda model, contents: MockResponse(
+        [MockEmbedding([float(len(c))]) for c in contents]
+    )
+
+    first = await get_dense_embeddings(["a", "bb"])
+    second = await get_dense_embeddings(["bb", "ccc", "a"])
+
+    assert first == [[1.0], [2.0]]
+    assert second == [[2.0], [3.0], [1.0]]
+    assert mock_genai_client["embed"].call_count == 2
+    assert mock_genai_client["embed"].call_args[1]["contents"] == ["ccc"]
+    assert cache.stats()["memory_hits"] == 2
+
+
+def test_sparse_embed_uses_cache(mocker):
+    """Cached sparse embeddings are rebuilt without running the BM25 model."""
+    cache = EmbeddingCache(max_memory_entries=10)
+    mocker.patch("src.services.embeddings.embedding_cache", cache)
+    mock_model = mocker.MagicMock()
+    mock_model.embed.side_effect = lambda documents: [
+        SparseEmbedding(indices=np.array([len(d)]), values=np.array([1.0])) for d in documents
+    ]
+    mocker.patch.object(embedding_registry, "get_sparse_model", return_value=mock_model)
+
+    get_sparse_embeddings(["a", "bb"])
+    embeddings = get_sparse_embeddings(["bb", "a"])
+
+    mock_model.embed.assert_called_once_with(["a", "bb"])
+    assert all(isinstance(e, SparseEmbedding) for e in embeddings)
+    assert embeddings[0].indices.tolist() == [2]
+    assert embeddings[1].indices.tolist() == [1]
+
+class TestEmbeddingModelRegistry:
+    """Tests for the process-wide embedding model registry."""
+
+    @pytest.fixture
+    def registry(self, mocker):
+        """Create a registry whose models are mocked."""
+        mocker.patch("src.services.embeddings.SparseTextEmbedding")
+        mocker.patch("src.services.embeddings.genai.Client")
+        return EmbeddingModelRegistry()
+
+    def test_models_are_built_once(self, registry):
+        """Test that repeated lookups reuse the same instances."""
+        sparse = registry.get_sparse_model()
+        dense = registry.get_dense_client()
+
+        for _ in range(3):
+            assert registry.get_sparse_model() is sparse
+            assert registry.get_dense_client() is dense
+
+        stats = registry.stats()
+        assert stats["sparse"] == {"loaded": True, "created": 1, "reused": 3}
+        assert stats["dense"] == {"loaded": True, "created": 1, "reused": 3}
+
+    def test_warmup(self, registry):
+        """Test that warmup builds both models."""
+        registry.warmup()
+
+        stats = registry.stats()
+        assert stats["sparse"]["created"] == 1
+        assert stats["dense"]["created"] == 1
+
+    def test_warmup_failure_is_not_raised(self, registry, mocker):
+        """Test that a failing model does not prevent the other from loading."""
+        mocker.patch("src.services.embeddings.SparseTextEmbedding", side_effect=RuntimeError("no model"))
+
+        registry.warmup()
+
+        stats = registry.stats()
+        assert stats["sparse"]["loaded"] is False
+        assert stats["dense"]["loaded"] is True
+
+    def test_reset(self, registry):
+        """Test that reset forces the models to be rebuilt."""
+        registry.get_sparse_model()
+        registry.get_sparse_model()
+
+        registry.reset()
+        assert registry.stats()["sparse"] == {"loaded": False, "created": 0, "reused": 0}
+
+        registry.get_sparse_model()
+        assert registry.stats()["sparse"] == {"loaded": True, "created": 1, "reused": 0}
+
+    @pytest.mark.filterwarnings("ignore::DeprecationWarning")
+    def test_forked_child_starts_empty(self, registry):
+        """Test that a forked worker does not inherit the parent's models."""
+        registry.get_dense_client()
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            loaded = registry.stats()["dense"]["loaded"]
+            os.write(write_fd, b"1" if loaded else b"0")
+            os._exit(0)
+
+        os.close(write_fd)
+        loaded_in_child = os.read(read_fd, 1)
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+
+        assert loaded_in_child == b"0"
+        assert registry.stats()["dense"]["loaded"] is True
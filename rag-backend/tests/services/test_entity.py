@@ -5,6 +5,9 @@ Tests for entity extraction, matching, and formatting functionality.
 import pytest
 from unittest.mock import patch, MagicMock, call, AsyncMock
 import os
+import threading
+
+import duckdb
 
 from src.services.entity import EntityExtractor
 
@@ -92,8 +95,8 @@ class TestEntityMatching:
 
     @pytest.fixture
     def entity_extractor(self):
-        """Create an instance of EntityExtractor for testing."""
-        return EntityExtractor(db_path="test_entities.db")
+        """Create an instance of EntityExtractor matching entities with SQL."""
+        return EntityExtractor(db_path="test_entities.db", use_index=False)
 
     @pytest.fixture
     def mock_duckdb_connect(self):
@@ -141,9 +144,10 @@ class TestEntityMatching:
         # Assert
         assert result is None
 
-    def test_match_entities(self, entity_extractor):
-        """Test matching multiple entities."""
+    def test_match_entities(self):
+        """Test matching multiple entities with the fuzzy index."""
         # Setup
+        entity_extractor = EntityExtractor(db_path="test_entities.db", use_index=True)
         entities = {
             "Game": ["mario", "zelda"],
             "Console": ["switch"]
@@ -169,6 +173,70 @@ class TestEntityMatching:
             assert result["Game"] == ["Super Mario Bros.", "The Legend of Zelda"]
             assert result["Console"] == ["Nintendo Switch"]
 
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Create a DuckDB database with the entity tables."""
+        db_path = str(tmp_path / "entities.db")
+        with duckdb.connect(db_path) as conn:
+            conn.sql("CREATE TABLE games (name VARCHAR UNIQUE)")
+            conn.sql("CREATE TABLE consoles (name VARCHAR UNIQUE)")
+            conn.sql("""
+                INSERT INTO games VALUES
+                ('super mario bros.'), ('super mario bros. 3'), ('the legend of zelda'), ('metroid')
+            """)
+            conn.sql("INSERT INTO consoles VALUES ('nintendo switch'), ('game boy')")
+        return db_path
+
+    def test_match_entities_single_query(self, db_path):
+        """Test that all terms are resolved with one connection and match the per-term results."""
+        # Setup
+        entity_extractor = EntityExtractor(db_path=db_path, use_index=False)
+        entities = {
+            "Console": ["nintendo swtch", "playstation"],
+            "Game": ["super mario bros 3", "zelda", "the legend of zelda", "metroid"],
+            "Publisher": ["nintendo"],
+            "Unknown": ["foo"],
+        }
+
+        # Execute
+        with patch("src.services.entity.duckdb.connect", wraps=duckdb.connect) as mock_connect:
+            result = entity_extractor.match_entities(entities)
+
+        # Assert
+        mock_connect.assert_called_once()
+        assert result == {
+            "Console": ["nintendo switch"],
+            "Game": ["super mario bros. 3", "the legend of zelda", "metroid"],
+        }
+        for entity_type in ["Console", "Game"]:
+            expected = [
+                entity_extractor.match_entity(term, entity_type) for term in entities[entity_type]
+            ]
+            assert result[entity_type] == [name for name in expected if name]
+
+    def test_match_entities_no_match(self, db_path):
+        """Test batch matching when no term matches."""
+        entity_extractor = EntityExtractor(db_path=db_path, use_index=False)
+
+        assert entity_extractor.match_entities({"Game": ["halo"]}) is None
+        assert entity_extractor.match_entities({"Game": []}) is None
+
+    @pytest.mark.asyncio
+    async def test_amatch_entities(self, entity_extractor):
+        """Test that matching runs in a worker thread."""
+        main_thread = threading.get_ident()
+        threads = []
+
+        def match_side_effect(entities):
+            threads.append(threading.get_ident())
+            return {"Game": ["Super Mario Bros."]}
+
+        with patch.object(entity_extractor, "match_entities", side_effect=match_side_effect):
+            result = await entity_extractor.amatch_entities({"Game": ["mario"]})
+
+        assert result == {"Game": ["Super Mario Bros."]}
+        assert threads and threads[0] != main_thread
+
 
 class TestEntityFormatting:
     """Tests for entity formatting functionality."""
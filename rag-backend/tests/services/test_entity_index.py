@@ -0,0 +1,158 @@
+"""
+Tests for the in-memory fuzzy entity index.
+"""
+
+import duckdb
+import pytest
+from unittest.mock import patch
+
+from src.services.entity import EntityExtractor
+from src.services.entity_index import FuzzyEntityIndex, levenshtein
+
+
+GAMES = [
+    "super mario bros.", "super mario bros. 3", "super mario world", "super mario 64",
+    "the legend of zelda", "the legend of zelda: ocarina of time", "zelda ii",
+    "metroid", "metroid prime", "pokémon red", "pokémon blue", "pokemon go",
+    "final fantasy vii", "final fantasy viii", "halo", "doom", "doom ii",
+    "street fighter ii", "mortal kombat", "tetris",
+]
+
+TERMS = [
+    "super mario bros", "super mario bros 3", "super mario wrld", "legend of zelda",
+    "the legend of zelda ocarina of time", "metroid prme", "pokemon red", "pokémon blu",
+    "final fantasy 7", "final fantasy viii", "halo", "hal", "dom", "doom 2", "streetfighter ii",
+    "tetriss", "mortal combat", "zelda", "", "x",
+]
+
+
+def sql_match(db_path, term, threshold):
+    """Match a term with the SQL query of EntityExtractor, returning the name and distance."""
+    with duckdb.connect(db_path) as conn:
+        rows = conn.execute(
+            """
+            SELECT
+                name,
+                levenshtein(LOWER(name), LOWER(?)) / GREATEST(LENGTH(name), LENGTH(?)) AS distance
+            FROM games
+            WHERE distance < ?
+            ORDER BY distance ASC, name ASC
+            LIMIT 1
+            """,
+            [term, term, threshold],
+        ).fetchall()
+    return rows[0] if rows else None
+
+
+class TestFuzzyEntityIndex:
+    """Tests for the fuzzy index."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Create a DuckDB database with a games table."""
+        db_path = str(tmp_path / "entities.db")
+        with duckdb.connect(db_path) as conn:
+            conn.sql("CREATE TABLE games (name VARCHAR UNIQUE)")
+            conn.executemany("INSERT INTO games VALUES (?)", [(name,) for name in GAMES])
+        return db_path
+
+    def test_levenshtein_matches_duckdb(self):
+        """Test that distances are computed on UTF-8 bytes like DuckDB."""
+        pairs = [("kitten", "sitting"), ("pokémon", "pokemon"), ("", "abc"), ("doom", "doom")]
+        for a, b in pairs:
+            expected = duckdb.sql(f"SELECT levenshtein('{a}', '{b}')").fetchone()[0]
+            assert levenshtein(a.encode(), b.encode()) == expected
+
+    @pytest.mark.parametrize("threshold", [0.1, 0.2, 0.35, 1.0])
+    def test_parity_with_sql(self, db_path, threshold):
+        """Test that the index returns the same matches as the SQL query."""
+        index = FuzzyEntityIndex(GAMES)
+
+        for term in TERMS:
+            expected = sql_match(db_path, term, threshold) if term else None
+            result = index.match(term, threshold)
+
+            if expected is None:
+                assert result is None, term
+            else:
+                assert result[0] == expected[0], term
+                assert result[1] == pytest.approx(expected[1]), term
+
+    def test_add_skips_known_names(self):
+        """Test that names already indexed are not added twice."""
+        index = FuzzyEntityIndex(["halo"])
+
+        assert index.add(["halo", "halo 2", ""]) == 1
+        assert len(index) == 2
+
+
+class TestEntityExtractorIndex:
+    """Tests for entity matching with the fuzzy index."""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """Create a DuckDB database with the entity tables."""
+        db_path = str(tmp_path / "entities.db")
+        with duckdb.connect(db_path) as conn:
+            for table_name in ["games", "consoles", "publishers"]:
+                conn.sql(f"CREATE TABLE {table_name} (name VARCHAR UNIQUE)")
+            conn.sql("INSERT INTO games VALUES ('super mario bros.'), ('metroid')")
+            conn.sql("INSERT INTO consoles VALUES ('nintendo switch')")
+        return db_path
+
+    def test_match_entity(self, db_path):
+        """Test matching entities from the index loaded from DuckDB."""
+        extractor = EntityExtractor(db_path=db_path, use_index=True)
+
+        assert extractor.match_entity("super mario bros", "Game") == "super mario bros."
+        assert extractor.match_entity("nintendo swtch", "Console") == "nintendo switch"
+        assert extractor.match_entity("zelda", "Game") is None
+
+    def test_incremental_refresh(self, db_path):
+        """Test that names inserted by another process are loaded on refresh."""
+        extractor = EntityExtractor(db_path=db_path, use_index=True)
+        extractor.refresh_index()
+        assert extractor.match_entity("the legend of zelda", "Game") is None
+
+        with duckdb.connect(db_path) as conn:
+            conn.sql("INSERT INTO games VALUES ('the legend of zelda')")
+
+        extractor.refresh_index()
+        assert extractor.match_entity("the legend of zelda", "Game") == "the legend of zelda"
+        assert len(extractor._indexes["Game"]) == 3
+
+    def test_refresh_is_read_only(self, db_path):
+        """Test that the refresh does not take the write lock of the entity database."""
+        extractor = EntityExtractor(db_path=db_path, use_index=True)
+
+        with patch("src.services.entity.duckdb.connect", wraps=duckdb.connect) as mock_connect:
+            extractor.refresh_index()
+
+        assert mock_connect.call_args.kwargs["read_only"] is True
+        assert extractor.match_entity("super mario bros", "Game") == "super mario bros."
+
+    def test_failed_refresh_is_retried(self, db_path):
+        """Test that a refresh failing on a locked database is retried on the next lookup."""
+        extractor = EntityExtractor(db_path=db_path, use_index=True)
+
+        with patch("src.services.entity.duckdb.connect", side_effect=duckdb.IOException("Could not set lock")):
+            extractor.refresh_index()
+        assert extractor._index_refreshed_at is None
+
+        assert extractor.match_entity("super mario bros", "Game") == "super mario bros."
+        assert extractor._index_refreshed_at is not None
+
+    def test_index_entities(self, db_path):
+        """Test that entities inserted by this process are matched without a refresh."""
+        extractor = EntityExtractor(db_path=db_path, use_index=True)
+        extractor.refresh_index()
+
+        extractor.index_entities("Publisher", ["nintendo"])
+
+        assert extractor.match_entity("nintendo", "Publisher") == "nintendo"
+
+    def test_missing_tables(self, tmp_path):
+        """Test matching against a database without entity tables."""
+        extractor = EntityExtractor(db_path=str(tmp_path / "empty.db"), use_index=True)
+
+        assert extractor.match_entity("metroid", "Game") is None
@@ -2,7 +2,7 @@ import pytest
 import aiohttp
 from aioresponses import aioresponses
 
-from src.services.hallucination import detect_hallucination
+from src.services.hallucination import detect_hallucination, detect_hallucination_batch
 
 
 @pytest.fixture
@@ -115,3 +115,72 @@ async def test_detect_hallucination_connection_error(mock_aioresponse):
     # Assert the function propagates the connection error
     with pytest.raises(aiohttp.ClientConnectorError):
         await detect_hallucination(query, context, response)
+
+
+@pytest.mark.asyncio
+async def test_detect_hallucination_batch(mock_aioresponse):
+    """Test that detect_hallucination_batch sends all the items in one request and returns their results."""
+    context = "The Chief Justice of Canada is Richard Wagner since 2017."
+    items = [
+        ("Who is the Chief Justice of Canada?", context, "Richard Wagner is the Chief Justice of Canada."),
+        ("Since when?", context, "Since 2015."),
+    ]
+    expected_results = [
+        {"hallucination_detected": False},
+        {"error": "Hallucination detection timed out"},
+    ]
+
+    mock_aioresponse.post(
+        'http://gpu-service:5001/detect_hallucination_batch',
+        status=200,
+        payload={"results": expected_results}
+    )
+
+    results = await detect_hallucination_batch(items, timeout=30)
+
+    assert results == expected_results
+    request = next(iter(mock_aioresponse.requests.values()))[0]
+    assert request.kwargs["json"] == {
+        "items": [
+            {"query": query, "context": context, "response": response}
+            for query, context, response in items
+        ],
+        "timeout": 30,
+    }
+
+
+@pytest.mark.asyncio
+async def test_detect_hallucination_batch_error(mock_aioresponse):
+    """Test that detect_hallucination_batch raises an exception when the GPU service returns an error."""
+    mock_aioresponse.post(
+        'http://gpu-service:5001/detect_hallucination_batch',
+        status=400,
+        body="item 0: response should be a string"
+    )
+
+    with pytest.raises(Exception) as excinfo:
+        await detect_hallucination_batch([("query", "context", "response")])
+
+    assert "GPU service batch hallucination detection failed" in str(excinfo.value)
+
+
+@pytest.mark.asyncio
+async def test_detect_hallucination_prunes_long_context(mock_aioresponse):
+    """Test that a context over the budget is reduced before the hallucination detection."""
+    sentences = [f"Article {i} says Richard Wagner is a judge." for i in range(500)]
+    pruned = sentences[0]
+
+    mock_aioresponse.post('http://gpu-service:5001/summarize', status=200, payload={"summary": pruned})
+    mock_aioresponse.post(
+        'http://gpu-service:5001/detect_hallucination',
+        status=200,
+        payload={"hallucination_detected": False}
+    )
+
+    await detect_hallucination("Who is Richard Wagner?", "\n".join(sentences), "Richard Wagner is a judge.")
+
+    detect_request = [
+        call for (method, url), calls in mock_aioresponse.requests.items()
+        if str(url).endswith("/detect_hallucination") for call in calls
+    ][0]
+    assert detect_request.kwargs["json"]["context"] == pruned
@@ -0,0 +1,221 @@
+"""
+Tests for the background hallucination detection jobs.
+"""
+
+import multiprocessing
+import threading
+import time
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.services.hallucination_jobs import DONE, ERROR, PENDING, HallucinationJobs
+
+
+RESULT = {"hallucination_score": 0.1, "hallucinated_sections": []}
+
+
+def store_jobs(db_path, worker, count):
+    """Store finished jobs from another process, as another gunicorn worker would."""
+    jobs = HallucinationJobs(db_path=db_path)
+    for i in range(count):
+        job_id = f"{worker}-{i}"
+        jobs._store(job_id, {"job_id": job_id, "status": DONE, "result": RESULT})
+
+
+class TestHallucinationJobs:
+    """Tests for the job pool and its bounded result store."""
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_submit_and_wait(self, mock_detect):
+        """Test that a job runs in the background and stores its result."""
+        mock_detect.return_value = RESULT
+        jobs = HallucinationJobs()
+
+        job_id = jobs.submit("question", "context", "answer")
+        job = jobs.wait(job_id, timeout=5, poll_interval=0.01)
+
+        assert job == {"job_id": job_id, "status": DONE, "result": RESULT}
+        mock_detect.assert_awaited_once_with("question", "context", "answer")
+        assert jobs.stats()["submitted"] == 1
+        assert jobs.stats()["done"] == 1
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_submit_returns_before_detection(self, mock_detect):
+        """Test that the job id is returned while the detection is still running."""
+        release = threading.Event()
+
+        async def slow_detect(*args):
+            release.wait(5)
+            return RESULT
+
+        mock_detect.side_effect = slow_detect
+        jobs = HallucinationJobs()
+
+        job_id = jobs.submit("question", "context", "answer")
+        assert jobs.get(job_id)["status"] == PENDING
+        assert jobs.wait(job_id, timeout=0.05, poll_interval=0.01)["status"] == PENDING
+
+        release.set()
+        assert jobs.wait(job_id, timeout=5, poll_interval=0.01)["status"] == DONE
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_failed_job(self, mock_detect):
+        """Test that the error of a failed detection is stored."""
+        mock_detect.side_effect = Exception("GPU service error")
+        jobs = HallucinationJobs()
+
+        job = jobs.wait(jobs.submit("question", "context", "answer"), timeout=5, poll_interval=0.01)
+
+        assert job["status"] == ERROR
+        assert job["error"] == "GPU service error"
+        assert jobs.stats()["errors"] == 1
+
+    def test_unknown_job(self):
+        """Test that an unknown job is reported as None."""
+        assert HallucinationJobs().get("missing") is None
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_store_is_bounded(self, mock_detect):
+        """Test that the oldest jobs are evicted beyond the maximum size."""
+        mock_detect.return_value = RESULT
+        jobs = HallucinationJobs(max_entries=2)
+
+        job_ids = []
+        for i in range(3):
+            job_ids.append(jobs.submit("question", "context", f"answer {i}"))
+            jobs.wait(job_ids[-1], timeout=5, poll_interval=0.01)
+
+        assert jobs.get(job_ids[0]) is None
+        assert jobs.get(job_ids[2])["status"] == DONE
+        assert jobs.stats()["memory_entries"] == 2
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_expired_job(self, mock_detect):
+        """Test that a job is forgotten after its TTL."""
+        mock_detect.return_value = RESULT
+        jobs = HallucinationJobs(ttl=0.05)
+
+        job_id = jobs.submit("question", "context", "answer")
+        jobs.wait(job_id, timeout=5, poll_interval=0.01)
+        time.sleep(0.1)
+
+        assert jobs.get(job_id) is None
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_disk_store_is_shared(self, mock_detect, tmp_path):
+        """Test that a job stored on disk can be read by another worker."""
+        mock_detect.return_value = RESULT
+        db_path = str(tmp_path / "hallucination_jobs.sqlite")
+        jobs = HallucinationJobs(db_path=db_path)
+
+        job_id = jobs.submit("question", "context", "answer")
+        jobs.wait(job_id, timeout=5, poll_interval=0.01)
+
+        other_worker = HallucinationJobs(db_path=db_path)
+        assert other_worker.get(job_id) == {"job_id": job_id, "status": DONE, "result": RESULT}
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    def test_disk_store_is_bounded(self, mock_detect, tmp_path):
+        """Test that the oldest jobs are removed from disk beyond the maximum size."""
+        mock_detect.return_value = RESULT
+        db_path = str(tmp_path / "hallucination_jobs.sqlite")
+        jobs = HallucinationJobs(db_path=db_path, max_entries=2)
+
+        job_ids = []
+        for i in range(3):
+            job_ids.append(jobs.submit("question", "context", f"answer {i}"))
+            jobs.wait(job_ids[-1], timeout=5, poll_interval=0.01)
+
+        other_worker = HallucinationJobs(db_path=db_path)
+        assert other_worker.get(job_ids[0]) is None
+        assert other_worker.get(job_ids[2])["status"] == DONE
+
+    def test_disk_store_is_shared_by_processes(self, tmp_path):
+        """Test that several processes write jobs to the same file while it is being polled."""
+        db_path = str(tmp_path / "hallucination_jobs.sqlite")
+        poller = HallucinationJobs(db_path=db_path)
+        poller.get("missing")
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=store_jobs, args=(db_path, worker, 20)) for worker in range(3)]
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            poller.get("0-0")
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        for worker in range(3):
+            for i in range(20):
+                assert poller.get(f"{worker}-{i}")["status"] == DONE
+
+
+class TestHallucinationRoutes:
+    """Tests for the asynchronous hallucination detection endpoints."""
+
+    @pytest.fixture
+    def jobs(self):
+        """Replace the job store used by the routes."""
+        jobs = HallucinationJobs()
+        with patch("src.routes.ask.hallucination_jobs", jobs), \
+                patch("src.routes.hallucination.hallucination_jobs", jobs):
+            yield jobs
+
+    @patch("src.services.hallucination_jobs.detect_hallucination", new_callable=AsyncMock)
+    @patch("src.routes.ask.detect_hallucination", new_callable=AsyncMock)
+    @patch("src.routes.ask.qa_pipeline", new_callable=AsyncMock)
+    def test_ask_async_hallucination(self, mock_pipeline, mock_sync_detect, mock_detect, client, jobs):
+        """Test that /ask returns a job id, whose result is then served by /hallucination."""
+        mock_pipeline.return_value = {"answer": "Miyamoto", "docs": [{"text": "Mario was created by Miyamoto."}]}
+        mock_detect.return_value = RESULT
+
+        response = client.get("/ask?question=who+created+mario&async_hallucination=true")
+
+        assert response.status_code == 200
+        body = response.get_json()
+        assert "hallucination" not in body
+        mock_sync_detect.assert_not_awaited()
+
+        job_id = body["hallucination_job_id"]
+        job = client.get(f"/hallucination/{job_id}?wait=5").get_json()
+        assert job == {"job_id": job_id, "status": DONE, "result": RESULT}
+        mock_detect.assert_awaited_once_with(
+            "who created mario", "Mario was created by Miyamoto.", "Miyamoto"
+        )
+
+        stream = client.get(f"/hallucination/{job_id}/stream")
+        assert stream.mimetype == "text/event-stream"
+        assert stream.get_data(as_text=True).startswith("event: hallucination\n")
+
+    @patch("src.routes.ask.detect_hallucination", new_callable=AsyncMock)
+    @patch("src.routes.ask.qa_pipeline", new_callable=AsyncMock)
+    def test_ask_sync_hallucination(self, mock_pipeline, mock_detect, client, jobs):
+        """Test that the detection stays synchronous by default."""
+        mock_pipeline.return_value = {"answer": "Miyamoto", "docs": [{"text": "Mario was created by Miyamoto."}]}
+        mock_detect.return_value = RESULT
+
+        body = client.get("/ask?question=who+created+mario").get_json()
+
+        assert body["hallucination"] == RESULT
+        assert "hallucination_job_id" not in body
+        assert jobs.stats()["submitted"] == 0
+
+    @patch("src.routes.hallucination.HALLUCINATION_WAIT_TIMEOUT", 0.05)
+    def test_wait_is_capped(self, client, jobs):
+        """Test that a pending job is returned once the maximum wait is over."""
+        jobs._store("running", {"job_id": "running", "status": PENDING})
+
+        start = time.monotonic()
+        assert client.get("/hallucination/running?wait=60").get_json()["status"] == PENDING
+        assert time.monotonic() - start < 5
+
+        stream = client.get("/hallucination/running/stream")
+        assert stream.get_data(as_text=True).startswith("event: pending\n")
+
+    def test_unknown_job(self, client, jobs):
+        """Test that an unknown job returns 404."""
+        assert client.get("/hallucination/missing").status_code == 404
+        assert client.get("/hallucination/missing/stream").status_code == 404
+        assert client.get("/hallucination/missing?wait=abc").status_code == 400
@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from aioresponses import aioresponses
+from src.services.http import HttpSessionPool, http_pool
+from src.services.chunking import summarize
+from src.services.rerank import rerank
+
+
+class TestHttpSessionPool:
+    """Tests for the per event loop aiohttp session pool."""
+
+    @pytest.mark.asyncio
+    async def test_session_reused_within_loop(self):
+        """Test that the same event loop always gets the same session."""
+        pool = HttpSessionPool()
+
+        first = pool.get()
+        second = pool.get()
+
+        assert first is second
+        assert pool.stats() == {"created": 1, "reused": 1, "closed": 0, "active": 1}
+        await pool.close()
+
+    def test_session_closed_with_loop(self):
+        """Test that each loop gets its own session, closed when the loop shuts down."""
+        pool = HttpSessionPool()
+
+        async def get():
+            return pool.get()
+
+        first = asyncio.run(get())
+        second = asyncio.run(get())
+
+        assert first is not second
+        assert first.closed and second.closed
+        assert pool.stats()["created"] == 2
+        assert pool.stats()["closed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        """Test that closing the pool closes the session of the running loop."""
+        pool = HttpSessionPool()
+        session = pool.get()
+
+        await pool.close()
+
+        assert session.closed
+        assert pool.stats()["active"] == 0
+        assert pool.stats()["closed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_gpu_clients_share_session(self):
+        """Test that successive GPU service calls reuse the pooled session."""
+        await http_pool.close()
+        created = http_pool.stats()["created"]
+        reused = http_pool.stats()["reused"]
+
+        with aioresponses() as m:
+            m.post("http://gpu-service:5001/summarize", payload={"summary": "Summary"})
+            m.post("http://gpu-service:5001/rerank", payload={"ranked_documents": []})
+
+            await summarize("query", "document")
+            await rerank("query", [])
+
+        assert http_pool.stats()["created"] == created + 1
+        assert http_pool.stats()["reused"] == reused + 1
+        await http_pool.close()
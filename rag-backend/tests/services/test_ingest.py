@@ -188,3 +188,24 @@ class TestIngestDocuments:
             assert doc.text == documents_request[i].text
             assert doc.dense_vec == mock_get_dense.return_value[i]
             assert doc.entities == extracted_entities[i]
+
+
+    @pytest.mark.asyncio
+    @patch("src.services.ingest.INGEST_SENTENCE_OFFSETS", True)
+    @patch("src.services.ingest.insert_entities")
+    @patch("src.services.ingest.get_dense_embeddings")
+    @patch("src.services.ingest.get_sparse_embeddings")
+    @patch("src.services.ingest.upsert_articles")
+    async def test_ingest_documents_with_sentence_offsets(
+        self, mock_upsert, mock_get_sparse, mock_get_dense, mock_insert_entities
+    ):
+        """Test that sentence offsets are computed at ingestion when enabled."""
+        mock_get_dense.return_value = [[0.1, 0.2, 0.3]]
+        mock_get_sparse.return_value = [MagicMock(indices=[1], values=[0.1])]
+
+        await ingest_documents([
+            IngestRequest(text="Zelda is a game. It runs on the NES.", entities={"game": ["Zelda"]})
+        ])
+
+        document = mock_upsert.call_args[0][0][0]
+        assert document.sentence_offsets == [0, 16, 17, 36]
@@ -0,0 +1,163 @@
+"""
+Tests for the LLM result cache.
+"""
+
+import multiprocessing
+import time
+from typing import List
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.baml_client.types import Entity, Question
+from src.services.llm_cache import LLMCache
+
+
+def use_cache(db_path, worker, count):
+    """Write and read results from another process, as another gunicorn worker would."""
+    cache = LLMCache(db_path=db_path)
+    for i in range(count):
+        cache._write_disk(("QueryExpansion", f"{worker}-{i}"), {"question": f"q{i}", "language": "en"})
+        assert cache._read_disk(("QueryExpansion", f"{worker}-0")) is not None
+    assert cache.stats()["functions"] == {}, "disk errors in worker"
+
+
+class TestLLMCache:
+    """Tests for the TTL + LRU cache of LLM results."""
+
+    @pytest.fixture
+    def question(self):
+        """Return an expanded question."""
+        return Question(question="who created mario?", language="en")
+
+    def test_make_key_normalises_text(self):
+        """Test that case and whitespace differences share a key."""
+        assert LLMCache.make_key("QueryExpansion", "Who created  Mario?") == \
+            LLMCache.make_key("QueryExpansion", " who created mario? ")
+        assert LLMCache.make_key("QueryExpansion", "mario") != LLMCache.make_key("ExtractEntities", "mario")
+
+    @pytest.mark.asyncio
+    async def test_get_or_call(self, question):
+        """Test that a repeated question is served from memory."""
+        cache = LLMCache()
+        call = AsyncMock(return_value=question)
+
+        first = await cache.get_or_call("QueryExpansion", "Who created Mario?", call, Question)
+        second = await cache.get_or_call("QueryExpansion", "who created mario?", call, Question)
+
+        call.assert_awaited_once()
+        assert first == second == question
+        assert isinstance(second, Question)
+
+        stats = cache.stats()["functions"]["QueryExpansion"]
+        assert stats["misses"] == 1
+        assert stats["memory_hits"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_list_results(self):
+        """Test caching a list of entities."""
+        cache = LLMCache()
+        entities = [Entity(name="Mario", type="Game"), Entity(name="Nintendo", type="Publisher")]
+        call = AsyncMock(return_value=entities)
+
+        await cache.get_or_call("ExtractEntities", "mario", call, List[Entity])
+        result = await cache.get_or_call("ExtractEntities", "mario", call, List[Entity])
+
+        call.assert_awaited_once()
+        assert result == entities
+        assert result[0].type == "Game"
+
+    @pytest.mark.asyncio
+    async def test_ttl(self, question):
+        """Test that expired results are recomputed."""
+        cache = LLMCache(ttl=60)
+        call = AsyncMock(return_value=question)
+
+        await cache.get_or_call("QueryExpansion", "mario", call, Question)
+        with patch("src.services.llm_cache.time.time", return_value=time.time() + 120):
+            await cache.get_or_call("QueryExpansion", "mario", call, Question)
+
+        assert call.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, question):
+        """Test that the least recently used result is evicted."""
+        cache = LLMCache(max_entries=2)
+        call = AsyncMock(return_value=question)
+
+        for text in ["a", "b", "a", "c"]:
+            await cache.get_or_call("QueryExpansion", text, call, Question)
+        assert call.await_count == 3
+
+        await cache.get_or_call("QueryExpansion", "b", call, Question)
+        assert call.await_count == 4
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, question):
+        """Test that a cache of size 0 always calls the function."""
+        cache = LLMCache(max_entries=0)
+        call = AsyncMock(return_value=question)
+
+        await cache.get_or_call("QueryExpansion", "mario", call, Question)
+        await cache.get_or_call("QueryExpansion", "mario", call, Question)
+
+        assert call.await_count == 2
+        assert cache.stats()["functions"] == {}
+
+    @pytest.mark.asyncio
+    async def test_disk_persistence(self, tmp_path, question):
+        """Test that a new cache on the same file starts warm."""
+        db_path = str(tmp_path / "llm_cache.sqlite")
+        call = AsyncMock(return_value=question)
+
+        await LLMCache(db_path=db_path).get_or_call("QueryExpansion", "mario", call, Question)
+
+        restarted = LLMCache(db_path=db_path)
+        result = await restarted.get_or_call("QueryExpansion", "mario", call, Question)
+
+        call.assert_awaited_once()
+        assert result == question
+        assert restarted.stats()["functions"]["QueryExpansion"]["disk_hits"] == 1
+
+    def test_disk_shared_by_processes(self, tmp_path):
+        """Test that several processes read and write the same file without lock errors."""
+        db_path = str(tmp_path / "llm_cache.sqlite")
+        reader = LLMCache(db_path=db_path)
+
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=use_cache, args=(db_path, worker, 20)) for worker in range(3)]
+        for worker in workers:
+            worker.start()
+        while any(worker.is_alive() for worker in workers):
+            reader._read_disk(("QueryExpansion", "0-0"))
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        for worker in range(3):
+            for i in range(20):
+                assert reader._read_disk(("QueryExpansion", f"{worker}-{i}"))[0]["question"] == f"q{i}"
+        assert reader.stats()["functions"] == {}
+
+    @pytest.mark.asyncio
+    async def test_disk_error_is_a_miss(self, question):
+        """Test that an unreadable cache file falls back to calling the function."""
+        cache = LLMCache(db_path="/dev/null/llm_cache.db")
+        call = AsyncMock(return_value=question)
+
+        result = await cache.get_or_call("QueryExpansion", "mario", call, Question)
+
+        assert result == question
+        assert cache.stats()["functions"]["QueryExpansion"]["disk_errors"] == 2
+
+    @pytest.mark.asyncio
+    async def test_call_errors_are_not_cached(self, question):
+        """Test that a failed call is retried on the next lookup."""
+        cache = LLMCache()
+        call = AsyncMock(side_effect=[RuntimeError("quota"), question])
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_call("QueryExpansion", "mario", call, Question)
+
+        assert await cache.get_or_call("QueryExpansion", "mario", call, Question) == question
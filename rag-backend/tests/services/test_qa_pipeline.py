@@ -1,7 +1,10 @@
+import asyncio
+import time
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
-from src.services.qa_pipeline import qa_pipeline
+from src.services.qa_pipeline import qa_pipeline, qa_pipeline_stream, summarize_documents
 
 
 @pytest.fixture
@@ -149,3 +152,155 @@ async def test_qa_pipeline_search_exception(mock_search, mock_query_exp):
     # Execute and Assert
     with pytest.raises(Exception, match="Search failed"):
         await qa_pipeline("What is the meaning of life?")
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.b.QueryExpansion")
+@patch("src.services.qa_pipeline.resolve_entities")
+@patch("src.services.qa_pipeline.search")
+@patch("src.services.qa_pipeline.b.AskQuestion")
+async def test_qa_pipeline_parallel_stages(mock_ask, mock_search, mock_resolve, mock_query_exp):
+    # Setup: expansion and entity extraction each take one LLM round-trip
+    async def slow_expansion(question):
+        await asyncio.sleep(0.3)
+        return MagicMock(question="expanded question", language="en")
+
+    async def slow_resolve(question):
+        await asyncio.sleep(0.3)
+        return {"Game": ["super mario bros."]}
+
+    mock_query_exp.side_effect = slow_expansion
+    mock_resolve.side_effect = slow_resolve
+    mock_search.return_value = [{"id": "1", "text": "Document", "metadata": {"title": "Doc 1"}}]
+    mock_ask.return_value = MagicMock(answer="Parallel answer")
+
+    # Execute
+    start = time.perf_counter()
+    result = await qa_pipeline("Who made Mario?", filter_by_entity=True, parallel_stages=True)
+    elapsed = time.perf_counter() - start
+
+    # Assert: entities are extracted from the raw question, during the expansion
+    assert elapsed < 0.5
+    mock_resolve.assert_called_once_with("Who made Mario?")
+    mock_search.assert_called_once_with(
+        "expanded question", method="hybrid", k=5, do_rerank=False,
+        entities={"Game": ["super mario bros."]},
+    )
+    assert result["answer"] == "Parallel answer"
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.b.QueryExpansion")
+@patch("src.services.qa_pipeline.resolve_entities")
+@patch("src.services.qa_pipeline.search")
+@patch("src.services.qa_pipeline.b.AskQuestion")
+async def test_qa_pipeline_parallel_stages_without_entities(mock_ask, mock_search, mock_resolve, mock_query_exp):
+    # Setup
+    mock_query_exp.return_value = MagicMock(question="expanded question", language="en")
+    mock_search.return_value = []
+    mock_ask.return_value = MagicMock(answer="Answer")
+
+    # Execute
+    await qa_pipeline("Who made Mario?", method="dense", parallel_stages=True)
+
+    # Assert: the expanded question is searched, and no entity is extracted
+    mock_resolve.assert_not_called()
+    assert mock_search.call_args[0][0] == "expanded question"
+    assert mock_search.call_args[1]["entities"] is None
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.summarize")
+async def test_summarize_documents_bounded_concurrency(mock_summarize):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def slow_summarize(question, text, sentences=None):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return f"summary of {text[:3]}"
+
+    mock_summarize.side_effect = slow_summarize
+    docs = [{"text": f"{i:03d}" + "x" * 1200} for i in range(5)] + [{"text": "short"}]
+
+    await summarize_documents("question", docs, chunk_size=1000, concurrency=2)
+
+    assert mock_summarize.call_count == 5
+    assert max_in_flight == 2
+    assert [doc["text"] for doc in docs] == [f"summary of {i:03d}" for i in range(5)] + ["short"]
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.summarize")
+@patch("src.services.qa_pipeline.summarize_batch")
+async def test_summarize_documents_batch(mock_summarize_batch, mock_summarize):
+    mock_summarize_batch.return_value = ["summary 1", "summary 2"]
+    docs = [{"text": "a" * 1200}, {"text": "short"}, {"text": "b" * 1200}]
+
+    await summarize_documents("question", docs, chunk_size=1000, batch=True)
+
+    mock_summarize_batch.assert_awaited_once_with("question", ["a" * 1200, "b" * 1200], sentences=[None, None])
+    mock_summarize.assert_not_called()
+    assert [doc["text"] for doc in docs] == ["summary 1", "short", "summary 2"]
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.summarize")
+async def test_summarize_documents_with_sentence_offsets(mock_summarize):
+    mock_summarize.return_value = "Summary"
+    text = "First sentence.  Second\nsentence. " + "x" * 1200
+    docs = [
+        {"text": text, "sentence_offsets": [0, 15, 17, 33]},
+        {"text": "y" * 1200},
+        {"text": "Short.", "sentence_offsets": [0, 6]},
+    ]
+
+    await summarize_documents("question", docs, chunk_size=1000)
+
+    assert mock_summarize.await_count == 2
+    assert mock_summarize.await_args_list[0].kwargs["sentences"] == ["First sentence.", "Second sentence."]
+    assert mock_summarize.await_args_list[1].kwargs["sentences"] is None
+    assert docs == [{"text": "Summary"}, {"text": "Summary"}, {"text": "Short."}]
+
+
+class FakeAnswerStream:
+    """Fake BAML stream yielding cumulative partial answers."""
+
+    def __init__(self, partials, final):
+        self.partials = partials
+        self.final = final
+
+    async def __aiter__(self):
+        for partial in self.partials:
+            yield MagicMock(answer=partial)
+
+    async def get_final_response(self):
+        return MagicMock(answer=self.final)
+
+
+@pytest.mark.asyncio
+@patch("src.services.qa_pipeline.b.QueryExpansion")
+@patch("src.services.qa_pipeline.search")
+@patch("src.services.qa_pipeline.summarize")
+@patch("src.services.qa_pipeline.b.stream.AskQuestion")
+async def test_qa_pipeline_stream(mock_stream_ask, mock_summarize, mock_search, mock_query_exp):
+    mock_query_exp.return_value = MagicMock(question="expanded question", language="en")
+    mock_search.return_value = [
+        {"id": "1", "text": "x" * 1200},
+        {"id": "2", "text": "Short document", "sentence_offsets": [0, 14]},
+    ]
+    mock_summarize.return_value = "Summarized text"
+    mock_stream_ask.return_value = FakeAnswerStream([None, "The", "The answer", "The answer"], "The answer is 42")
+
+    events = [event async for event in qa_pipeline_stream("What is the answer?")]
+
+    assert events[0] == ("docs", [{"id": "1", "text": "x" * 1200}, {"id": "2", "text": "Short document"}])
+    assert events[1:4] == [("token", "The"), ("token", " answer"), ("token", " is 42")]
+    assert events[4] == ("answer", {
+        "answer": "The answer is 42",
+        "docs": [{"id": "1", "text": "Summarized text"}, {"id": "2", "text": "Short document"}],
+    })
+    mock_stream_ask.assert_called_once_with("What is the answer?", ["Summarized text", "Short document"], "en")
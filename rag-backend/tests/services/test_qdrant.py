@@ -6,7 +6,12 @@ import pytest
 from unittest.mock import patch, AsyncMock, MagicMock, call
 import numpy as np
 
-from src.services.qdrant import create_articles_collection, upsert_articles, get_qdrant_client, COLLECTION_NAME
+import asyncio
+
+from src.services.qdrant import (
+    create_articles_collection, upsert_articles, get_qdrant_client, close_qdrant_client,
+    QdrantClientPool, CollectionRouter, COLLECTION_NAME, forget_ensured_collections,
+)
 from src.models.document import Document
 from qdrant_client.models import Distance, VectorParams, Modifier, SparseIndexParams, PointStruct
 
@@ -14,6 +19,13 @@ from qdrant_client.models import Distance, VectorParams, Modifier, SparseIndexPa
 class TestQdrantService:
     """Tests for Qdrant service functions."""
 
+    @pytest.fixture(autouse=True)
+    def reset_ensured_collections(self):
+        """Forget the collections checked by previous tests."""
+        forget_ensured_collections()
+        yield
+        forget_ensured_collections()
+
     @pytest.fixture
     def mock_qdrant_client(self):
         """Mock the Qdrant client."""
@@ -52,6 +64,7 @@ class TestQdrantService:
         }
         doc.sparse_vec = sample_sparse_vector
         doc.dense_vec = sample_dense_vector
+        doc.sentence_offsets = None
         return doc
 
     @pytest.mark.asyncio
@@ -88,6 +101,35 @@ class TestQdrantService:
         mock_qdrant_client.collection_exists.assert_called_once_with(collection_name="articles")
         mock_qdrant_client.create_collection.assert_not_called()
 
+    @pytest.mark.asyncio
+    async def test_create_articles_collection_through_alias(self, mock_qdrant_client):
+        """Test that the collection behind the write alias is checked."""
+        # Setup
+        mock_qdrant_client.collection_exists.return_value = True
+        mock_qdrant_client.get_aliases.return_value = MagicMock(aliases=[
+            MagicMock(alias_name="articles", collection_name="articles_v2"),
+        ])
+
+        # Execute
+        await create_articles_collection()
+
+        # Assert
+        mock_qdrant_client.collection_exists.assert_called_once_with(collection_name="articles_v2")
+        mock_qdrant_client.create_collection.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_create_articles_collection_checked_once(self, mock_qdrant_client):
+        """Test that the collection check is cached for the life of the process."""
+        # Setup
+        mock_qdrant_client.collection_exists.return_value = True
+
+        # Execute
+        await create_articles_collection()
+        await create_articles_collection()
+
+        # Assert
+        mock_qdrant_client.collection_exists.assert_called_once()
+
     @pytest.mark.asyncio
     async def test_upsert_articles_single_document(self, mock_qdrant_client, sample_document):
         """Test upserting a single article document."""
@@ -135,6 +177,7 @@ class TestQdrantService:
         doc2.sparse_vec.indices = [2, 5, 15]
         doc2.sparse_vec.values = [0.3, 0.7, 0.5]
         doc2.dense_vec = [0.2, 0.3, 0.4] * 256
+        doc2.sentence_offsets = None
 
         with patch("src.services.qdrant.create_articles_collection") as mock_create:
             # Execute
@@ -156,6 +199,65 @@ class TestQdrantService:
             assert call_args["points"][1].id == doc2.doc_id
             assert call_args["points"][1].payload["Character"] == ["Luigi"]
 
+    @pytest.mark.asyncio
+    async def test_upsert_articles_in_chunks(self, mock_qdrant_client, sample_document):
+        """Test that documents are sent in chunks, the last one waiting for the others."""
+        # Setup
+        documents = []
+        for i in range(5):
+            doc = MagicMock(spec=Document)
+            doc.doc_id = f"doc{i}"
+            doc.text = sample_document.text
+            doc.entities = {}
+            doc.sparse_vec = sample_document.sparse_vec
+            doc.dense_vec = sample_document.dense_vec
+            doc.sentence_offsets = None
+            documents.append(doc)
+
+        in_flight = []
+        max_in_flight = 0
+
+        async def slow_upsert(**kwargs):
+            nonlocal max_in_flight
+            in_flight.append(kwargs["points"])
+            max_in_flight = max(max_in_flight, len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(kwargs["points"])
+
+        mock_qdrant_client.upsert.side_effect = slow_upsert
+
+        with patch("src.services.qdrant.create_articles_collection"):
+            # Execute
+            await upsert_articles(documents, batch_size=2, parallelism=2)
+
+        # Assert
+        calls = mock_qdrant_client.upsert.call_args_list
+        assert [[p.id for p in c[1]["points"]] for c in calls] == [["doc0", "doc1"], ["doc2", "doc3"], ["doc4"]]
+        assert [c[1]["wait"] for c in calls] == [False, False, True]
+        assert max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_upsert_articles_without_wait(self, mock_qdrant_client, sample_document):
+        """Test that no chunk waits when wait is disabled."""
+        with patch("src.services.qdrant.create_articles_collection"):
+            # Execute
+            await upsert_articles([sample_document] * 3, wait=False, batch_size=1)
+
+        # Assert
+        assert mock_qdrant_client.upsert.call_count == 3
+        assert all(c[1]["wait"] is False for c in mock_qdrant_client.upsert.call_args_list)
+
+    @pytest.mark.asyncio
+    async def test_upsert_articles_with_sentence_offsets(self, mock_qdrant_client, sample_document):
+        """Test that sentence offsets are stored in the payload when computed."""
+        sample_document.sentence_offsets = [0, 66]
+
+        with patch("src.services.qdrant.create_articles_collection"):
+            await upsert_articles(sample_document)
+
+        point = mock_qdrant_client.upsert.call_args[1]["points"][0]
+        assert point.payload["sentence_offsets"] == [0, 66]
+
     @pytest.mark.asyncio
     async def test_upsert_articles_empty_list(self, mock_qdrant_client):
         """Test upserting an empty list of documents."""
@@ -182,3 +284,123 @@ class TestQdrantService:
             # Assert
             assert client == mock_client
             mock_client_class.assert_called_once()
+
+
+class TestQdrantClientPool:
+    """Tests for the per event loop Qdrant client pool."""
+
+    @pytest.mark.asyncio
+    async def test_client_reused_within_loop(self):
+        """Test that the same event loop always gets the same client."""
+        with patch("src.services.qdrant.AsyncQdrantClient") as mock_client_class:
+            pool = QdrantClientPool()
+
+            first = pool.get()
+            second = pool.get()
+
+            assert first is second
+            mock_client_class.assert_called_once()
+            assert pool.stats() == {"created": 1, "reused": 1, "closed": 0, "active": 1}
+
+    def test_one_client_per_loop(self):
+        """Test that each event loop gets its own client and closed loops are dropped."""
+        with patch("src.services.qdrant.AsyncQdrantClient", side_effect=lambda *a, **kw: MagicMock()):
+            pool = QdrantClientPool()
+
+            async def get():
+                return pool.get()
+
+            first_loop = asyncio.new_event_loop()
+            first = first_loop.run_until_complete(get())
+            first_loop.close()
+
+            second_loop = asyncio.new_event_loop()
+            second = second_loop.run_until_complete(get())
+
+            assert first is not second
+            assert pool.stats()["created"] == 2
+            assert pool.stats()["active"] == 1
+            second_loop.close()
+
+    def test_client_closed_with_loop(self):
+        """Test that the client of a loop is closed when the loop shuts down, as after each Flask request."""
+        with patch("src.services.qdrant.AsyncQdrantClient", side_effect=lambda *a, **kw: AsyncMock()):
+            pool = QdrantClientPool()
+
+            async def get():
+                return pool.get()
+
+            first = asyncio.run(get())
+            second = asyncio.run(get())
+
+            assert first is not second
+            first.close.assert_awaited_once()
+            second.close.assert_awaited_once()
+            assert pool.stats()["created"] == 2
+            assert pool.stats()["closed"] == 2
+            assert pool.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_close(self):
+        """Test that closing the pool closes the client of the running loop."""
+        with patch("src.services.qdrant.AsyncQdrantClient") as mock_client_class:
+            mock_client_class.return_value = AsyncMock()
+            pool = QdrantClientPool()
+            client = pool.get()
+
+            await pool.close()
+            # Let the cancelled companion task finish, without closing the client again
+            await asyncio.sleep(0)
+
+            client.close.assert_awaited_once()
+            assert pool.stats()["active"] == 0
+            assert pool.stats()["closed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_configuration(self, monkeypatch):
+        """Test that transport settings are read from the environment."""
+        monkeypatch.setenv("QDRANT_HOST", "http://qdrant:6333")
+        monkeypatch.setenv("QDRANT_PREFER_GRPC", "true")
+        monkeypatch.setenv("QDRANT_MAX_KEEPALIVE_CONNECTIONS", "8")
+
+        with patch("src.services.qdrant.AsyncQdrantClient") as mock_client_class:
+            QdrantClientPool().get()
+
+            args, kwargs = mock_client_class.call_args
+            assert args == ("http://qdrant:6333",)
+            assert kwargs["prefer_grpc"] is True
+            assert kwargs["grpc_port"] == 6334
+            assert kwargs["limits"].max_keepalive_connections == 8
+
+    @pytest.mark.asyncio
+    async def test_close_qdrant_client(self):
+        """Test the module level shutdown hook."""
+        with patch("src.services.qdrant.AsyncQdrantClient") as mock_client_class:
+            mock_client_class.return_value = AsyncMock()
+            client = await get_qdrant_client()
+
+            await close_qdrant_client()
+
+            client.close.assert_awaited_once()
+
+
+
+class TestCollectionRouter:
+    """Tests for the read/write collection routing."""
+
+    def test_write_defaults_to_read(self):
+        """Test that writes go to the read collection unless configured otherwise."""
+        assert CollectionRouter("articles").write == "articles"
+        assert CollectionRouter("articles", "articles_v2").write == "articles_v2"
+
+    @pytest.mark.asyncio
+    async def test_resolve(self):
+        """Test resolving aliases to their collection."""
+        router = CollectionRouter("articles")
+        client = AsyncMock()
+        client.get_aliases.return_value = MagicMock(aliases=[
+            MagicMock(alias_name="articles", collection_name="articles_v1"),
+        ])
+
+        assert await router.resolve(client, "articles") == "articles_v1"
+        assert await router.resolve(client, "articles_v2") == "articles_v2"
@@ -65,6 +65,32 @@ class TestRerank:
             assert result[2]["text"] == "Third document is not relevant."
             assert result[2]["score"] == 0.32
 
+    @pytest.mark.asyncio
+    async def test_rerank_keeps_sentence_offsets(self, rerank_url):
+        """Test that the sentence offsets are not sent to the GPU service, but kept on the documents."""
+        docs = [
+            {"id": "1", "text": "First document.", "sentence_offsets": [0, 15]},
+            {"id": "2", "text": "Second document."},
+        ]
+
+        with aioresponses() as m:
+            m.post(rerank_url, status=200, payload={
+                'ranked_documents': [{"id": "2", "text": "Second document."}, {"id": "1", "text": "First document."}]
+            })
+
+            result = await rerank("query", docs)
+
+            request = next(iter(m.requests.values()))[0]
+
+        assert request.kwargs["json"]["documents"] == [
+            {"id": "1", "text": "First document."},
+            {"id": "2", "text": "Second document."},
+        ]
+        assert result == [
+            {"id": "2", "text": "Second document."},
+            {"id": "1", "text": "First document.", "sentence_offsets": [0, 15]},
+        ]
+
     @pytest.mark.asyncio
     async def test_rerank_error(self, mock_docs, rerank_url):
         """Test error handling during reranking."""
@@ -2,13 +2,17 @@
 Tests for search functionality.
 """
 
+import asyncio
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock, call
 from qdrant_client import models
 
+from src.services.qdrant import COLLECTION_NAME
 from src.services.search import create_entity_filter, search, process_search_results
 from src.services.search_strategies import (
-    BM25SearchStrategy, DenseSearchStrategy, HybridSearchStrategy, SearchStrategy
+    BM25SearchStrategy, DenseSearchStrategy, EncodingTimings, HybridSearchStrategy, SearchStrategy
 )
 
 
@@ -81,23 +85,35 @@ class TestSearchStrategies:
         result.points = points
         return result
 
+    @pytest.fixture
+    def mock_fallback_results(self):
+        """Mock unfiltered search results overlapping with the filtered ones."""
+        points = []
+        for i in [1, 6, 2, 7, 8]:
+            point = MagicMock()
+            point.id = f"doc{i}"
+            point.payload = {"text": f"Document content {i}"}
+            points.append(point)
+
+        result = MagicMock()
+        result.points = points
+        return result
+
     @pytest.mark.asyncio
     async def test_bm25_strategy(self, mock_sparse_embeddings, mock_search_results):
         """Test BM25 search strategy."""
         # Setup
         query = "game console comparison"
-        entities = {"game": ["Super Mario Bros"]}
-        filter = create_entity_filter(entities)
         strategy = BM25SearchStrategy()
 
-        with patch("src.services.search_strategies.get_sparse_embeddings", return_value=mock_sparse_embeddings) as mock_get_embeddings:
+        with patch("src.services.search_strategies.get_sparse_embeddings", return_value=[mock_sparse_embeddings]) as mock_get_embeddings:
             with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
                 mock_qdrant_client = AsyncMock()
                 mock_qdrant_client.query_points = AsyncMock(return_value=mock_search_results)
                 mock_get_qdrant.return_value = mock_qdrant_client
 
                 # Execute
-                results = await strategy.execute_search(query, k=5, filter=filter)
+                results = await strategy.execute_search(query, k=5)
 
                 # Assert
                 mock_get_embeddings.assert_called_once_with(query)
@@ -105,36 +121,70 @@ class TestSearchStrategies:
 
                 # Check if the correct params were passed to query_points
                 args = mock_qdrant_client.query_points.call_args[1]
-                assert args["collection_name"] == "dev_articles"
+                assert args["collection_name"] == COLLECTION_NAME
                 assert args["using"] == "text"
                 assert isinstance(args["query"], models.SparseVector)
                 assert args["query"].indices == mock_sparse_embeddings.indices
                 assert args["query"].values == mock_sparse_embeddings.values
                 assert args["limit"] == 5
-                assert args["query_filter"] == filter
+                assert args["query_filter"] is None
 
                 # Check results
                 assert len(results) == 5
                 assert results[0].id == "doc1"
                 assert results[0].payload["text"] == "Document content 1"
 
+    @pytest.mark.asyncio
+    async def test_bm25_strategy_with_filter(self, mock_sparse_embeddings, mock_search_results):
+        """Test that a filtered BM25 search sends the filtered and fallback queries in one batch."""
+        # Setup
+        query = "game console comparison"
+        entities = {"game": ["Super Mario Bros"]}
+        filter = create_entity_filter(entities)
+        strategy = BM25SearchStrategy()
+
+        with patch("src.services.search_strategies.get_sparse_embeddings", return_value=[mock_sparse_embeddings]) as mock_get_embeddings:
+            with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
+                mock_qdrant_client = AsyncMock()
+                mock_qdrant_client.query_batch_points = AsyncMock(return_value=[mock_search_results, MagicMock(points=[])])
+                mock_get_qdrant.return_value = mock_qdrant_client
+
+                # Execute
+                results = await strategy.execute_search(query, k=5, filter=filter)
+
+                # Assert
+                mock_get_embeddings.assert_called_once_with(query)
+                mock_qdrant_client.query_points.assert_not_called()
+                mock_qdrant_client.query_batch_points.assert_called_once()
+
+                args = mock_qdrant_client.query_batch_points.call_args[1]
+                assert args["collection_name"] == COLLECTION_NAME
+                filtered, fallback = args["requests"]
+                assert filtered.using == fallback.using == "text"
+                assert filtered.query.indices == mock_sparse_embeddings.indices
+                assert filtered.filter == filter
+                assert fallback.filter is None
+                assert filtered.limit == fallback.limit == 5
+                assert filtered.with_payload is True
+
+                # Check results
+                assert [r.id for r in results] == ["doc1", "doc2", "doc3", "doc4", "doc5"]
+
     @pytest.mark.asyncio
     async def test_dense_strategy(self, mock_dense_embeddings, mock_search_results):
         """Test dense vector search strategy."""
         # Setup
         query = "game console comparison"
-        entities = {"console": ["Nintendo Switch"]}
-        filter = create_entity_filter(entities)
         strategy = DenseSearchStrategy()
 
-        with patch("src.services.search_strategies.get_dense_embeddings", return_value=mock_dense_embeddings) as mock_get_embeddings:
+        with patch("src.services.search_strategies.get_dense_embeddings", return_value=[mock_dense_embeddings]) as mock_get_embeddings:
             with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
                 mock_qdrant_client = AsyncMock()
                 mock_qdrant_client.query_points = AsyncMock(return_value=mock_search_results)
                 mock_get_qdrant.return_value = mock_qdrant_client
 
                 # Execute
-                results = await strategy.execute_search(query, k=5, filter=filter)
+                results = await strategy.execute_search(query, k=5)
 
                 # Assert
                 mock_get_embeddings.assert_called_once_with(query)
@@ -142,24 +192,109 @@ class TestSearchStrategies:
 
                 # Check if the correct params were passed to query_points
                 args = mock_qdrant_client.query_points.call_args[1]
-                assert args["collection_name"] == "dev_articles"
+                assert args["collection_name"] == COLLECTION_NAME
                 assert args["using"] == "embedding"
                 assert args["query"] == mock_dense_embeddings
                 assert args["limit"] == 5
-                assert args["query_filter"] == filter
+                assert args["query_filter"] is None
 
                 # Check results
                 assert len(results) == 5
                 assert results[0].id == "doc1"
                 assert results[0].payload["text"] == "Document content 1"
 
+    @pytest.mark.asyncio
+    async def test_dense_strategy_fallback_reuses_vectors(self, mock_dense_embeddings, mock_fallback_results):
+        """Test that the unfiltered fallback does not embed the query again and drops duplicates."""
+        # Setup
+        query = "game console comparison"
+        entities = {"console": ["Nintendo Switch"]}
+        filter = create_entity_filter(entities)
+        strategy = DenseSearchStrategy()
+
+        filtered_results = MagicMock()
+        filtered_results.points = [MagicMock(id="doc1"), MagicMock(id="doc2")]
+
+        with patch("src.services.search_strategies.get_dense_embeddings", return_value=[mock_dense_embeddings]) as mock_get_embeddings:
+            with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
+                mock_qdrant_client = AsyncMock()
+                mock_qdrant_client.query_batch_points = AsyncMock(return_value=[filtered_results, mock_fallback_results])
+                mock_get_qdrant.return_value = mock_qdrant_client
+
+                # Execute
+                results = await strategy.execute_search(query, k=4, filter=filter)
+
+                # Assert
+                mock_get_embeddings.assert_called_once_with(query)
+                mock_qdrant_client.query_batch_points.assert_called_once()
+
+                filtered, fallback = mock_qdrant_client.query_batch_points.call_args[1]["requests"]
+                assert filtered.query == fallback.query == mock_dense_embeddings
+                assert filtered.filter == filter
+                assert fallback.filter is None
+
+                # Filtered results first, then unseen fallback results
+                assert [r.id for r in results] == ["doc1", "doc2", "doc6", "doc7"]
+
+    @pytest.mark.asyncio
+    async def test_dense_strategy_search_params(self, mock_dense_embeddings, mock_search_results):
+        """Test that the search parameters are sent with the dense query."""
+        params = models.SearchParams(
+            hnsw_ef=128,
+            quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0),
+        )
+        strategy = DenseSearchStrategy(search_params=params)
+
+        with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
+            mock_qdrant_client = AsyncMock()
+            mock_qdrant_client.query_points = AsyncMock(return_value=mock_search_results)
+            mock_get_qdrant.return_value = mock_qdrant_client
+
+            await strategy.search_with_vectors(mock_dense_embeddings, k=5)
+
+            args = mock_qdrant_client.query_points.call_args[1]
+            assert args["search_params"] == params
+
+    def test_hybrid_strategy_search_params(self, mock_sparse_embeddings, mock_dense_embeddings):
+        """Test that the search parameters only apply to the dense prefetch."""
+        params = models.SearchParams(hnsw_ef=128)
+        strategy = HybridSearchStrategy(search_params=params)
+
+        request = strategy.build_query((mock_sparse_embeddings, mock_dense_embeddings), k=5)
+
+        assert request.prefetch[0].params is None
+        assert request.prefetch[1].params == params
+
+    @pytest.mark.asyncio
+    async def test_search_with_precomputed_vectors(self, mock_dense_embeddings, mock_search_results):
+        """Test that search_with_vectors queries the index without encoding."""
+        strategy = DenseSearchStrategy()
+
+        with patch("src.services.search_strategies.get_dense_embeddings") as mock_get_embeddings:
+            with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
+                mock_qdrant_client = AsyncMock()
+                mock_qdrant_client.query_points = AsyncMock(return_value=mock_search_results)
+                mock_get_qdrant.return_value = mock_qdrant_client
+
+                results = await strategy.search_with_vectors(mock_dense_embeddings, k=5)
+
+                mock_get_embeddings.assert_not_called()
+                assert len(results) == 5
+
+    def test_merge_fallback_results(self):
+        """Test merging filtered and fallback results."""
+        filtered = [MagicMock(id="a"), MagicMock(id="b")]
+        fallback = [MagicMock(id="b"), MagicMock(id="c"), MagicMock(id="d")]
+
+        assert [r.id for r in SearchStrategy.merge_fallback_results(filtered, fallback, 3)] == ["a", "b", "c"]
+        assert [r.id for r in SearchStrategy.merge_fallback_results(filtered, fallback, 1)] == ["a"]
+        assert [r.id for r in SearchStrategy.merge_fallback_results(filtered, [], 3)] == ["a", "b"]
+
     @pytest.mark.asyncio
     async def test_hybrid_strategy(self, mock_sparse_embeddings, mock_dense_embeddings, mock_search_results):
         """Test hybrid search strategy."""
         # Setup
         query = "game console comparison"
-        entities = {"publisher": ["Nintendo"]}
-        filter = create_entity_filter(entities)
         strategy = HybridSearchStrategy()
 
         with patch("src.services.search_strategies.get_sparse_embeddings", return_value=[mock_sparse_embeddings]) as mock_get_sparse:
@@ -170,7 +305,7 @@ class TestSearchStrategies:
                     mock_get_qdrant.return_value = mock_qdrant_client
 
                     # Execute
-                    results = await strategy.execute_search(query, k=5, filter=filter)
+                    results = await strategy.execute_search(query, k=5)
 
                     # Assert
                     mock_get_sparse.assert_called_once_with(query)
@@ -179,21 +314,100 @@ class TestSearchStrategies:
 
                     # Check if the correct params were passed to query_points
                     args = mock_qdrant_client.query_points.call_args[1]
-                    assert args["collection_name"] == "dev_articles"
+                    assert args["collection_name"] == COLLECTION_NAME
                     assert isinstance(args["query"], models.FusionQuery)
                     assert args["query"].fusion == models.Fusion.RRF
 
                     # Check prefetch strategies
                     prefetch = args["prefetch"]
                     assert len(prefetch) == 2
-                    assert prefetch[0]["using"] == "text"
-                    assert prefetch[1]["using"] == "embedding"
+                    assert prefetch[0].using == "text"
+                    assert prefetch[1].using == "embedding"
+                    assert prefetch[0].filter is None
 
                     # Check results
                     assert len(results) == 5
                     assert results[0].id == "doc1"
                     assert results[0].payload["text"] == "Document content 1"
 
+                    # Check timings
+                    assert set(strategy.timings) == {"sparse", "dense", "encoding"}
+
+    @pytest.mark.asyncio
+    async def test_hybrid_strategy_with_filter(self, mock_sparse_embeddings, mock_dense_embeddings, mock_search_results):
+        """Test that the filter is applied to both prefetches of the filtered query only."""
+        # Setup
+        query = "game console comparison"
+        entities = {"publisher": ["Nintendo"]}
+        filter = create_entity_filter(entities)
+        strategy = HybridSearchStrategy()
+
+        with patch("src.services.search_strategies.get_sparse_embeddings", return_value=[mock_sparse_embeddings]) as mock_get_sparse:
+            with patch("src.services.search_strategies.get_dense_embeddings", return_value=[mock_dense_embeddings]) as mock_get_dense:
+                with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant:
+                    mock_qdrant_client = AsyncMock()
+                    mock_qdrant_client.query_batch_points = AsyncMock(return_value=[mock_search_results, mock_search_results])
+                    mock_get_qdrant.return_value = mock_qdrant_client
+
+                    # Execute
+                    results = await strategy.execute_search(query, k=5, filter=filter)
+
+                    # Assert
+                    mock_get_sparse.assert_called_once_with(query)
+                    mock_get_dense.assert_called_once_with(query)
+
+                    filtered, fallback = mock_qdrant_client.query_batch_points.call_args[1]["requests"]
+                    assert all(p.filter == filter for p in filtered.prefetch)
+                    assert all(p.filter is None for p in fallback.prefetch)
+                    assert len(results) == 5
+
+    @pytest.mark.asyncio
+    async def test_hybrid_strategy_encodes_concurrently(self, mock_sparse_embeddings, mock_dense_embeddings, mock_search_results):
+        """Test that sparse and dense encoding overlap."""
+        # Setup
+        query = "game console comparison"
+        strategy = HybridSearchStrategy()
+        timings = EncodingTimings()
+
+        def slow_sparse(query):
+            time.sleep(0.3)
+            return [mock_sparse_embeddings]
+
+        async def slow_dense(query):
+            await asyncio.sleep(0.3)
+            return [mock_dense_embeddings]
+
+        with patch("src.services.search_strategies.get_sparse_embeddings", side_effect=slow_sparse):
+            with patch("src.services.search_strategies.get_dense_embeddings", side_effect=slow_dense):
+                with patch("src.services.search_strategies.get_qdrant_client") as mock_get_qdrant, \
+                        patch("src.services.search_strategies.hybrid_encoding_timings", timings):
+                    mock_qdrant_client = AsyncMock()
+                    mock_qdrant_client.query_points = AsyncMock(return_value=mock_search_results)
+                    mock_get_qdrant.return_value = mock_qdrant_client
+
+                    # Execute
+                    await strategy.execute_search(query, k=5)
+
+                    # Assert: both branches took ~0.3s but ran side by side
+                    assert strategy.timings["sparse"] >= 0.3
+                    assert strategy.timings["dense"] >= 0.3
+                    assert strategy.timings["encoding"] < 0.5
+                    # The timings are reported by /metrics
+                    assert timings.stats()["sparse"]["count"] == 1
+                    assert timings.stats()["encoding"]["max_ms"] < 500
+
+    def test_encoding_timings(self):
+        """Test that the timings of the hybrid encodings are aggregated per branch."""
+        timings = EncodingTimings()
+        timings.record({"sparse": 0.01, "dense": 0.03, "encoding": 0.03})
+        timings.record({"sparse": 0.03, "encoding": 0.03})
+
+        stats = timings.stats()
+
+        assert stats["sparse"] == {"count": 2, "mean_ms": pytest.approx(20), "max_ms": pytest.approx(30)}
+        assert stats["dense"]["count"] == 1
+        assert stats["encoding"]["count"] == 2
+
 class TestMainSearch:
     """Tests for the main search function."""
 
@@ -284,6 +498,25 @@ class TestMainSearch:
                         assert results[0]["id"] == "doc1"
                         assert results[1]["id"] == "doc2"
 
+    @pytest.mark.asyncio
+    async def test_search_with_precomputed_entities(self, mock_search_results):
+        """Test that precomputed entities are used as is."""
+        # Setup
+        query = "game console comparison"
+        entities = {"game": ["Super Mario Bros"]}
+
+        with patch("src.services.search.entity_extractor.extract_entities", AsyncMock()) as mock_extract:
+            with patch.object(DenseSearchStrategy, "execute_search", AsyncMock(return_value=mock_search_results)) as mock_execute:
+                with patch("src.services.search.process_search_results", AsyncMock(return_value=[])):
+
+                    # Execute
+                    await search(query, method="dense", k=5, entities=entities)
+
+                    # Assert
+                    mock_extract.assert_not_called()
+                    call_args = mock_execute.call_args[1]
+                    assert call_args["filter"] == create_entity_filter(entities)
+
     @pytest.mark.asyncio
     async def test_search_with_reranking(self, mock_search_results):
         """Test search function with reranking enabled."""
@@ -0,0 +1,93 @@
+"""
+Tests for the stage DAG executor.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.services.stages import StageGraph
+
+
+class TestStageGraph:
+    """Tests for StageGraph."""
+
+    @pytest.mark.asyncio
+    async def test_dependencies_results(self):
+        """Test that stages receive the results of their dependencies."""
+        graph = StageGraph()
+
+        async def double(a):
+            return a * 2
+
+        async def add(a, b):
+            return a + b
+
+        async def one():
+            return 1
+
+        graph.add("a", one)
+        graph.add("b", double, depends_on=["a"])
+        graph.add("c", add, depends_on=["a", "b"])
+
+        results = await graph.run()
+
+        assert results == {"a": 1, "b": 2, "c": 3}
+        assert set(graph.timings) == {"a", "b", "c"}
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_run_concurrently(self):
+        """Test that stages without dependencies between them overlap."""
+        graph = StageGraph()
+
+        async def slow():
+            await asyncio.sleep(0.2)
+            return True
+
+        graph.add("first", slow)
+        graph.add("second", slow)
+
+        start = time.perf_counter()
+        await graph.run()
+
+        assert time.perf_counter() - start < 0.35
+        assert graph.timings["second"]["start"] < 0.1
+
+    @pytest.mark.asyncio
+    async def test_failure_cancels_running_stages(self):
+        """Test that a failing stage cancels the others and raises its error."""
+        graph = StageGraph()
+        cancelled = []
+
+        async def fail():
+            raise RuntimeError("expansion failed")
+
+        async def slow():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        graph.add("fail", fail)
+        graph.add("slow", slow)
+
+        with pytest.raises(RuntimeError, match="expansion failed"):
+            await graph.run()
+
+        assert cancelled == [True]
+
+    def test_invalid_graph(self):
+        """Test that unknown dependencies and duplicate stages are rejected."""
+        graph = StageGraph()
+
+        async def stage(**kwargs):
+            return None
+
+        with pytest.raises(ValueError):
+            graph.add("search", stage, depends_on=["expansion"])
+
+        graph.add("expansion", stage)
+        with pytest.raises(ValueError):
+            graph.add("expansion", stage)
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from src.services.streaming import format_event, iterate_in_thread
+
+
+def test_format_event():
+    """Test that events are formatted as Server-Sent Events with a JSON payload."""
+    event = format_event("token", {"text": "Hello"})
+
+    assert event == 'event: token\ndata: {"text": "Hello"}\n\n'
+    assert json.loads(event.split("data: ")[1]) == {"text": "Hello"}
+
+
+def test_iterate_in_thread():
+    """Test that the items of an async iterable are yielded in order."""
+    async def numbers():
+        for i in range(3):
+            await asyncio.sleep(0)
+            yield i
+
+    assert list(iterate_in_thread(numbers)) == [0, 1, 2]
+
+
+def test_iterate_in_thread_yields_items_early():
+    """Test that an item is yielded before the next one is produced."""
+    release = threading.Event()
+
+    async def items():
+        yield "first"
+        await asyncio.to_thread(release.wait, 5)
+        yield "second"
+
+    iterator = iterate_in_thread(items)
+    assert next(iterator) == "first"
+    release.set()
+    assert list(iterator) == ["second"]
+
+
+def test_iterate_in_thread_raises_errors():
+    """Test that an error of the async iterable is raised to the caller."""
+    async def failing():
+        yield 1
+        raise ValueError("search failed")
+
+    iterator = iterate_in_thread(failing)
+    assert next(iterator) == 1
+    with pytest.raises(ValueError, match="search failed"):
+        next(iterator)
+
+
+def test_iterate_in_thread_cancelled_when_closed():
+    """Test that closing the iterator cancels the async iterable."""
+    cancelled = threading.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "tick"
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    iterator = iterate_in_thread(endless)
+    assert next(iterator) == "tick"
+    iterator.close()
+
+    assert cancelled.is_set()
@@ -0,0 +1,271 @@
+"""
+Tests for the ASGI adapter serving the Flask application.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from flask import Flask, Response, jsonify, request
+
+from src.utils.asgi import FlaskASGI, build_environ, supports_async_body
+
+
+@pytest.fixture
+def flask_app():
+    """Create a Flask application with async, sync and streamed views."""
+    app = Flask(__name__)
+    app.loops = []
+
+    @app.route('/async', methods=['GET'])
+    async def async_view():
+        app.loops.append(asyncio.get_running_loop())
+        await asyncio.sleep(float(request.args.get('delay', 0)))
+        return jsonify({'name': request.args.get('name')})
+
+    @app.route('/sync', methods=['POST'])
+    def sync_view():
+        return jsonify({'echo': request.get_json()['text']})
+
+    @app.route('/stream', methods=['GET'])
+    def stream_view():
+        def events():
+            for i in range(3):
+                yield f"data: {i}\n\n"
+        return Response(events(), mimetype="text/event-stream")
+
+    @app.route('/async-stream', methods=['GET'])
+    def async_stream_view():
+        async def events():
+            for i in range(3):
+                app.loops.append(asyncio.get_running_loop())
+                await asyncio.sleep(0)
+                yield f"data: {i}\n\n"
+        return Response(events(), mimetype="text/event-stream")
+
+    @app.route('/asgi', methods=['GET'])
+    def asgi_view():
+        return jsonify({'async_body': supports_async_body(request.environ)})
+
+    @app.route('/error', methods=['GET'])
+    async def error_view():
+        raise ValueError("boom")
+
+    @app.errorhandler(ValueError)
+    def handle_value_error(e):
+        return jsonify({'error': str(e)}), 400
+
+    @app.after_request
+    def add_header(response):
+        response.headers["X-Served-By"] = "flask"
+        return response
+
+    return app
+
+
+@pytest.fixture
+def client(flask_app):
+    """Create an HTTP client sending requests to the ASGI adapter."""
+    transport = httpx.ASGITransport(app=FlaskASGI(flask_app))
+    return httpx.AsyncClient(transport=transport, base_url="http://testserver")
+
+
+def test_build_environ():
+    """Test that an ASGI scope is converted to a WSGI environ."""
+    environ = build_environ({
+        "type": "http",
+        "method": "POST",
+        "path": "/ask",
+        "query_string": b"question=mario",
+        "headers": [(b"content-type", b"application/json"), (b"x-request-id", b"42")],
+        "server": ("localhost", 5000),
+        "client": ("10.0.0.1", 1234),
+    }, b'{"a": 1}')
+
+    assert environ["REQUEST_METHOD"] == "POST"
+    assert environ["PATH_INFO"] == "/ask"
+    assert environ["QUERY_STRING"] == "question=mario"
+    assert environ["CONTENT_TYPE"] == "application/json"
+    assert environ["HTTP_X_REQUEST_ID"] == "42"
+    assert environ["SERVER_PORT"] == "5000"
+    assert environ["REMOTE_ADDR"] == "10.0.0.1"
+    assert environ["wsgi.input"].read() == b'{"a": 1}'
+
+
+@pytest.mark.asyncio
+async def test_views(client):
+    """Test that async, sync and streamed views, hooks and error handlers are served."""
+    async with client:
+        response = await client.get("/async", params={"name": "mario"})
+        assert response.status_code == 200
+        assert response.json() == {"name": "mario"}
+        assert response.headers["X-Served-By"] == "flask"
+
+        response = await client.post("/sync", json={"text": "hello"})
+        assert response.json() == {"echo": "hello"}
+
+        response = await client.get("/stream")
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+
+        assert (await client.get("/asgi")).json() == {"async_body": True}
+
+        response = await client.get("/error")
+        assert response.status_code == 400
+        assert response.json() == {"error": "boom"}
+
+        assert (await client.get("/missing")).status_code == 404
+        assert (await client.post("/async")).status_code == 405
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_the_event_loop(flask_app, client):
+    """Test that async views run concurrently on the event loop of the server."""
+    async with client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(
+            client.get("/async", params={"name": str(i), "delay": 0.2}) for i in range(20)
+        ))
+        elapsed = time.perf_counter() - start
+
+    assert [r.json()["name"] for r in responses] == [str(i) for i in range(20)]
+    assert elapsed < 1
+    assert set(flask_app.loops) == {asyncio.get_running_loop()}
+
+
+@pytest.mark.asyncio
+async def test_async_body_streams_on_the_event_loop(flask_app, client):
+    """Test that an async iterable body is streamed on the event loop of the server."""
+    async with client:
+        response = await client.get("/async-stream")
+
+    assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    assert set(flask_app.loops) == {asyncio.get_running_loop()}
+
+
+@pytest.mark.asyncio
+async def test_async_body_cancelled_on_disconnect(flask_app):
+    """Test that an async iterable body stops when the client disconnects."""
+    closed = asyncio.Event()
+
+    @flask_app.route('/endless', methods=['GET'])
+    def endless_view():
+        async def events():
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield "data: tick\n\n"
+            finally:
+                closed.set()
+        return Response(events(), mimetype="text/event-stream")
+
+    messages = asyncio.Queue()
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+        if message.get("more_body"):
+            await messages.put({"type": "http.disconnect"})
+
+    await messages.put({"type": "http.request", "body": b""})
+    scope = {"type": "http", "method": "GET", "path": "/endless", "query_string": b"", "headers": []}
+    await asyncio.wait_for(FlaskASGI(flask_app)(scope, messages.get, send), timeout=5)
+
+    assert closed.is_set()
+    assert sent[0]["type"] == "http.response.start"
+
+
+def test_async_body_not_supported_under_wsgi(flask_app):
+    """Test that views served by a WSGI server are told to stream synchronous bodies."""
+    assert flask_app.test_client().get("/asgi").get_json() == {"async_body": False}
+
+
+@pytest.mark.asyncio
+async def test_lifespan(flask_app):
+    """Test that the startup and shutdown hooks run in the lifespan of the server."""
+    calls = []
+
+    async def startup():
+        calls.append("startup")
+
+    async def shutdown():
+        calls.append("shutdown")
+
+    app = FlaskASGI(flask_app, on_startup=[startup], on_shutdown=[shutdown])
+    messages = asyncio.Queue()
+    sent = []
+
+    async def send(message):
+        sent.append(message["type"])
+
+    await messages.put({"type": "lifespan.startup"})
+    await messages.put({"type": "lifespan.shutdown"})
+    await app({"type": "lifespan"}, messages.get, send)
+
+    assert calls == ["startup", "shutdown"]
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+
+
+@pytest.mark.asyncio
+async def test_lifespan_startup_failure(flask_app):
+    """Test that a failing startup hook is reported to the server."""
+    async def startup():
+        raise RuntimeError("Qdrant is unreachable")
+
+    app = FlaskASGI(flask_app, on_startup=[startup])
+    messages = asyncio.Queue()
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await messages.put({"type": "lifespan.startup"})
+    await app({"type": "lifespan"}, messages.get, send)
+
+    assert sent == [{"type": "lifespan.startup.failed", "message": "Qdrant is unreachable"}]
+
+
+@pytest.mark.asyncio
+async def test_application_routes():
+    """Test that the routes of the RAG backend are served by the ASGI entry point."""
+    from src.asgi import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.get("/metrics")
+        assert response.status_code == 200
+        assert "http" in response.json()
+
+        response = await client.get("/ask")
+        assert response.status_code == 400
+        assert response.json() == {"error": "Question is required"}
+
+
+@pytest.mark.asyncio
+@patch("src.routes.ask.iterate_in_thread", side_effect=AssertionError("background event loop used"))
+@patch("src.routes.ask.detect_hallucination", new_callable=AsyncMock)
+@patch("src.routes.ask.qa_pipeline_stream")
+async def test_ask_stream_runs_on_the_event_loop(mock_stream, mock_detect, mock_iterate):
+    """Test that /ask/stream runs the pipeline on the event loop of the server."""
+    from src.asgi import app
+
+    loops = []
+
+    async def pipeline(*args, **kwargs):
+        loops.append(asyncio.get_running_loop())
+        yield "token", "Miyamoto"
+        yield "answer", {"answer": "Miyamoto", "docs": [{"text": "Mario was created by Miyamoto."}]}
+
+    mock_stream.side_effect = pipeline
+    mock_detect.return_value = {"hallucination_detected": False}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        response = await client.get("/ask/stream", params={"question": "who created mario"})
+
+    events = [line for line in response.text.splitlines() if line.startswith("event: ")]
+    assert events == ["event: token", "event: answer", "event: hallucination"]
+    assert loops == [asyncio.get_running_loop()]
+    mock_iterate.assert_not_called()